@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Benchmark del generador (sin Firebase)
+Genera candidatos para cada combinación (tamaño, números) que puede salir de
+`difficulty_configs` del generador semanal, con semillas fijas, y mide por
+bucket: puzzles/s, latencia p50/p95/p99, tasa de éxito, tasa de timeouts y
+nodos expandidos. Los resultados se pueden guardar como línea base y
+compararse con ella para detectar regresiones.
+
+Con --compare-strategies mide solo la búsqueda de caminos con cada estrategia
+de path_engine.py y muestra la más rápida por tamaño entre las completas
+(por defecto se usa `heuristic`; las demás se eligen con --strategy).
+
+Los nodos expandidos no dependen de la máquina: con las mismas semillas, un
+cambio en la búsqueda que expanda más nodos se detecta siempre. Por eso la
+línea base de nodos, éxitos y timeouts (benchmark_nodes.json) está en el
+repositorio. Las latencias sí dependen de la máquina y se guardan aparte, en
+un fichero local sin versionar (benchmark_baseline.json) con el que solo se
+compara en el mismo equipo.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import contextlib
+from typing import List, Dict, Tuple, Optional
+
+from constructive_paths import PATH_ENGINES, ENGINE_BACKTRACKING
+from path_engine import (RESTART_SCHEDULES, RESTART_LUBY, SEARCH_STRATEGIES, parse_strategy_option,
+                         format_strategy_option)
+from level_store import LocalLevelStore
+from seeding import derive_seed
+from weekly_generator_based_on_production import WeeklyPuzzleGenerator
+
+# Línea base versionada (solo métricas deterministas) y la local con latencias (junto al módulo)
+DEFAULT_BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_nodes.json")
+DEFAULT_LOCAL_BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# Métricas de cada bucket que no dependen de la máquina
+DETERMINISTIC_METRICS = ("mean_nodes", "success_rate", "timeout_rate")
+
+# Semilla fija del benchmark
+DEFAULT_BENCH_SEED = 2024
+
+# Muestras por bucket
+DEFAULT_SAMPLES = 3
+
+# Empeoramiento relativo tolerado antes de marcar una regresión
+DEFAULT_TOLERANCE = 0.20
+
+# Diferencia mínima de latencia que cuenta como regresión (ruido en buckets rápidos)
+MIN_LATENCY_DELTA_MS = 5.0
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil `q` (0-100) con interpolación lineal"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def benchmark_buckets(generator: WeeklyPuzzleGenerator,
+                      sizes: Optional[List[int]] = None) -> List[Tuple[int, int]]:
+    """Combinaciones (tamaño, números) de todas las dificultades, sin repetir"""
+    buckets = set()
+    for config in generator.difficulty_configs.values():
+        for size in range(config['size_range'][0], config['size_range'][1] + 1):
+            if size > generator.max_size or (sizes and size not in sizes):
+                continue
+            for numbers in range(config['numbers_range'][0], config['numbers_range'][1] + 1):
+                if 2 <= numbers <= size * size:
+                    buckets.add((size, numbers))
+    return sorted(buckets)
+
+
+def run_bucket(generator: WeeklyPuzzleGenerator, size: int, numbers: int,
+               samples: int, seed: int) -> Dict:
+    """Mide `samples` candidatos de un bucket"""
+    latencies = []
+    nodes = []
+    successes = 0
+    timeouts = 0
+
+    totals = generator.metrics.totals
+
+    for sample in range(samples):
+        nodes_before = totals.get("nodes")
+        timeouts_before = totals.get("timeouts")
+
+        began = time.perf_counter()
+        candidate = generator.build_seeded_candidate(size, numbers, derive_seed(seed, "bench", size, numbers, sample))
+        latencies.append(time.perf_counter() - began)
+
+        nodes.append(totals.get("nodes") - nodes_before)
+        timeouts += totals.get("timeouts") > timeouts_before
+        successes += candidate is not None
+
+    total_time = sum(latencies)
+    return {
+        "size": size,
+        "numbers": numbers,
+        "samples": samples,
+        "puzzles_per_second": successes / total_time if total_time else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "success_rate": successes / samples,
+        "timeout_rate": timeouts / samples,
+        "mean_nodes": sum(nodes) / samples,
+    }
+
+
+def run_benchmark(engine: str = ENGINE_BACKTRACKING, samples: int = DEFAULT_SAMPLES,
+                  seed: int = DEFAULT_BENCH_SEED, sizes: Optional[List[int]] = None,
+                  minimal_clues: bool = False, restart_schedule: str = RESTART_LUBY,
+                  search_strategies: Optional[Dict[Optional[int], str]] = None) -> Dict:
+    """Ejecuta el benchmark completo y devuelve los resultados por bucket"""
+    generator = _quiet_generator(engine=engine, minimal_clues=minimal_clues,
+                                 restart_schedule=restart_schedule, search_strategies=search_strategies)
+
+    results = []
+    for size, numbers in benchmark_buckets(generator, sizes):
+        result = run_bucket(generator, size, numbers, samples, seed)
+        results.append(result)
+        print(f"   {size}x{size} {numbers:>2} números: p50 {result['p50_ms']:8.1f} ms, "
+              f"éxito {result['success_rate']:.0%}, timeouts {result['timeout_rate']:.0%}, "
+              f"{result['mean_nodes']:>10.0f} nodos")
+
+    return {
+        "engine": engine,
+        "seed": seed,
+        "samples": samples,
+        "minimal_clues": minimal_clues,
+        "restart_schedule": restart_schedule,
+        "search_strategies": format_strategy_option(search_strategies or {}),
+        "buckets": results,
+    }
+
+
+def compare_strategies(samples: int = DEFAULT_SAMPLES, seed: int = DEFAULT_BENCH_SEED,
+                       sizes: Optional[List[int]] = None, restart_schedule: str = RESTART_LUBY) -> Dict:
+    """Mide la búsqueda de caminos de cada estrategia en cada tamaño
+
+    Todas las estrategias buscan con las mismas semillas (extremos y orden de
+    direcciones); gana la de menor latencia media entre las búsquedas
+    completas que encuentran camino en todas las muestras (`beam` se mide,
+    pero un éxito con pocas muestras no demuestra que no vaya a fallar).
+    """
+    generator = _quiet_generator(restart_schedule=restart_schedule)
+    if not sizes:
+        sizes = sorted({size for size, _ in benchmark_buckets(generator)})
+
+    results = []
+    for size in sizes:
+        by_strategy = {}
+        for name in SEARCH_STRATEGIES:
+            generator.search_strategies = {None: name}
+            latencies = []
+            nodes = []
+            successes = 0
+            for sample in range(samples):
+                rng = random.Random(derive_seed(seed, "strategy", size, sample))
+                start, end = generator.select_start_end_points(size, rng)
+                nodes_before = generator.metrics.totals.get("nodes")
+                began = time.perf_counter()
+                successes += generator.find_hamiltonian_path(size, start, end, rng) is not None
+                latencies.append(time.perf_counter() - began)
+                nodes.append(generator.metrics.totals.get("nodes") - nodes_before)
+            by_strategy[name] = {
+                "mean_ms": sum(latencies) / samples * 1000,
+                "p95_ms": percentile(latencies, 95) * 1000,
+                "mean_nodes": sum(nodes) / samples,
+                "success_rate": successes / samples,
+            }
+
+        complete = [name for name, result in by_strategy.items()
+                    if result["success_rate"] == 1.0 and SEARCH_STRATEGIES[name].beam_width is None]
+        fastest = min(complete or by_strategy, key=lambda name: by_strategy[name]["mean_ms"])
+        results.append({"size": size, "strategies": by_strategy, "fastest": fastest})
+        print(f"   {size}x{size}: " + ", ".join(f"{name} {result['mean_ms']:.1f} ms"
+                                               f"{'' if result['success_rate'] == 1.0 else ' (fallos)'}"
+                                               for name, result in by_strategy.items())
+              + f" → {fastest}")
+
+    return {"seed": seed, "samples": samples, "restart_schedule": restart_schedule, "sizes": results}
+
+
+def _quiet_generator(**options) -> WeeklyPuzzleGenerator:
+    """Generador sin almacén ni mensajes (no cuentan en la medida)"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return WeeklyPuzzleGenerator(store=LocalLevelStore(":memory:"), quiet=True, **options)
+
+
+def node_baseline(results: Dict) -> Dict:
+    """Resultados sin latencias: lo que se puede comparar en cualquier máquina"""
+    buckets = [{key: bucket[key] for key in ("size", "numbers", "samples") + DETERMINISTIC_METRICS}
+               for bucket in results["buckets"]]
+    return dict(results, buckets=buckets)
+
+
+def find_regressions(current: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Buckets que empeoran respecto a la línea base (solo las métricas que esta tiene)"""
+    previous = {(b["size"], b["numbers"]): b for b in baseline.get("buckets", [])}
+    regressions = []
+
+    for bucket in current["buckets"]:
+        old = previous.get((bucket["size"], bucket["numbers"]))
+        if old is None:
+            continue
+        name = f"{bucket['size']}x{bucket['size']}/{bucket['numbers']}"
+
+        for metric in ("mean_nodes", "p50_ms", "p95_ms"):
+            if metric not in old:
+                continue
+            if metric != "mean_nodes" and bucket[metric] - old[metric] < MIN_LATENCY_DELTA_MS:
+                continue
+            if old[metric] > 0 and bucket[metric] > old[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {old[metric]:.1f} → {bucket[metric]:.1f}")
+        if "success_rate" in old and bucket["success_rate"] < old["success_rate"]:
+            regressions.append(f"{name}: success_rate {old['success_rate']:.0%} → {bucket['success_rate']:.0%}")
+        if "timeout_rate" in old and bucket["timeout_rate"] > old["timeout_rate"]:
+            regressions.append(f"{name}: timeout_rate {old['timeout_rate']:.0%} → {bucket['timeout_rate']:.0%}")
+
+    return regressions
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Benchmark del generador de PuzzlePath (sin Firebase)')
+
+    parser.add_argument('--engine', choices=PATH_ENGINES, default=ENGINE_BACKTRACKING,
+                       help='Motor de caminos (default: backtracking)')
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES,
+                       help=f'Puzzles por bucket (default: {DEFAULT_SAMPLES})')
+    parser.add_argument('--seed', type=int, default=DEFAULT_BENCH_SEED,
+                       help=f'Semilla del benchmark (default: {DEFAULT_BENCH_SEED})')
+    parser.add_argument('--sizes', type=int, nargs='+', help='Limitar a estos tamaños de grid')
+    parser.add_argument('--minimal-clues', action='store_true',
+                       help='Usar el mínimo de números que mantiene la solución única')
+    parser.add_argument('--restarts', choices=RESTART_SCHEDULES, default=RESTART_LUBY,
+                       help='Calendario de reinicios de la búsqueda (default: luby)')
+    parser.add_argument('--strategy', nargs='+', default=[], metavar='[TAMAÑO=]ESTRATEGIA',
+                       help=f'Estrategia de búsqueda ({", ".join(SEARCH_STRATEGIES)}; default: heuristic)')
+    parser.add_argument('--compare-strategies', action='store_true',
+                       help='Comparar solo la búsqueda de caminos de todas las estrategias por tamaño')
+    parser.add_argument('--baseline', type=str, default=DEFAULT_BASELINE_FILE,
+                       help='Línea base versionada de nodos, éxitos y timeouts (default: benchmark_nodes.json)')
+    parser.add_argument('--local-baseline', type=str, default=DEFAULT_LOCAL_BASELINE_FILE,
+                       help='Línea base local con latencias, sin versionar (default: benchmark_baseline.json)')
+    parser.add_argument('--save-baseline', action='store_true',
+                       help='Guardar los resultados como nueva línea base (versionada y local)')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                       help=f'Empeoramiento relativo tolerado (default: {DEFAULT_TOLERANCE})')
+    parser.add_argument('--output', type=str, help='Guardar los resultados en JSON')
+
+    args = parser.parse_args()
+
+    try:
+        search_strategies = parse_strategy_option(args.strategy)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.compare_strategies:
+        print(f"⏱️  Estrategias de búsqueda (reinicios {args.restarts}, "
+              f"{args.samples} muestras por tamaño, semilla {args.seed})")
+        comparison = compare_strategies(args.samples, args.seed, args.sizes, args.restarts)
+        print(f"\n🏁 Más rápida por tamaño: "
+              + ", ".join(f"{entry['size']}: {entry['fastest']}" for entry in comparison["sizes"]))
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(comparison, f, indent=2)
+            print(f"💾 Resultados guardados en: {args.output}")
+        return
+
+    print(f"⏱️  Benchmark del generador ({args.engine}, reinicios {args.restarts}, "
+          f"{args.samples} muestras por bucket, semilla {args.seed})")
+    results = run_benchmark(args.engine, args.samples, args.seed, args.sizes, args.minimal_clues, args.restarts,
+                            search_strategies)
+
+    buckets = results["buckets"]
+    total = sum(b["samples"] for b in buckets)
+    print(f"\n📊 {len(buckets)} buckets, {total} puzzles")
+    if buckets:
+        print(f"   - Éxito medio: {sum(b['success_rate'] for b in buckets) / len(buckets):.0%}")
+        print(f"   - Timeouts medios: {sum(b['timeout_rate'] for b in buckets) / len(buckets):.0%}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Resultados guardados en: {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(node_baseline(results), f, indent=2)
+            f.write("\n")
+        with open(args.local_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Línea base guardada en: {args.baseline} (nodos) y {args.local_baseline} (latencias)")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"ℹ️  Sin línea base en {args.baseline} (usa --save-baseline)")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    if (baseline.get("engine"), baseline.get("seed"), baseline.get("samples"),
+            baseline.get("restart_schedule", RESTART_LUBY), baseline.get("search_strategies", [])) != \
+            (args.engine, args.seed, args.samples, args.restarts, results["search_strategies"]):
+        print(f"⚠️  La línea base se tomó con otra configuración; la comparación no es fiable")
+
+    # Nodos, éxitos y timeouts contra la línea base del repositorio
+    regressions = find_regressions(results, node_baseline(baseline), args.tolerance)
+
+    # Latencias solo contra la línea base local de esta máquina
+    if os.path.exists(args.local_baseline):
+        with open(args.local_baseline) as f:
+            local = json.load(f)
+        latencies = [{key: value for key, value in bucket.items() if key not in DETERMINISTIC_METRICS}
+                     for bucket in local.get("buckets", [])]
+        regressions += find_regressions(results, dict(local, buckets=latencies), args.tolerance)
+    else:
+        print(f"ℹ️  Sin línea base local de latencias en {args.local_baseline}")
+
+    if regressions:
+        print(f"❌ {len(regressions)} regresiones respecto a la línea base:")
+        for regression in regressions:
+            print(f"   - {regression}")
+        sys.exit(1)
+
+    print(f"✅ Sin regresiones respecto a la línea base")
+
+
+if __name__ == "__main__":
+    main()
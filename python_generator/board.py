@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Tableros generales: rectangulares, con paredes y con huecos
+Un Board describe el tablero (filas, columnas, celdas bloqueadas y paredes
+entre celdas vecinas) y get_board_tables precalcula su adyacencia en formato
+CSR: los vecinos de la celda i = x * cols + y son
+`targets[offsets[i]:offsets[i + 1]]`. Sobre esas tablas trabajan la búsqueda
+de caminos, la validación, el solver de unicidad, la valoración de
+dificultad y la serialización para Firestore.
+
+Un tablero cuadrado sin paredes ni huecos (`is_plain`) sigue yendo por el
+motor de bitboards de path_engine.py, que aprovecha la geometría del grid
+(desplazamientos de bits, ventana 3x3) y es el caso rápido.
+"""
+
+import random
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Sequence, Tuple
+
+from feasibility import is_feasible_pair, sample_feasible_pair, has_hamiltonian_path, sample_rectangle_pair
+from path_engine import (Cell, Direction, DEFAULT_DIRECTIONS, HamiltonianSearch, SearchStrategy,
+                         flood_adjacency)
+
+Wall = Tuple[Cell, Cell]
+
+# Valor de las celdas bloqueadas en la matriz del puzzle
+BLOCKED_CELL = -1
+
+
+@dataclass(frozen=True)
+class Board:
+    """Tablero de rows x cols (celda (x, y): fila x, columna y)
+
+    `blocked` son los huecos (no forman parte del camino) y `walls` los pares
+    de celdas vecinas separados por una pared, con la menor primero. Usar
+    Board.create para validar un tablero que llega de fuera.
+    """
+    rows: int
+    cols: int
+    blocked: FrozenSet[Cell] = frozenset()
+    walls: FrozenSet[Wall] = frozenset()
+
+    @classmethod
+    def square(cls, size: int) -> "Board":
+        return cls(size, size)
+
+    @classmethod
+    def create(cls, rows: int, cols: int, blocked: Iterable[Sequence[int]] = (),
+               walls: Iterable[Sequence[Sequence[int]]] = ()) -> "Board":
+        """Tablero validado: celdas dentro, paredes entre vecinas y celdas abiertas conectadas"""
+        if rows < 1 or cols < 1:
+            raise ValueError(f"Tablero inválido: {rows}x{cols}")
+
+        blocked_cells = frozenset((x, y) for x, y in blocked)
+        normalized = set()
+        for a, b in walls:
+            a, b = (a[0], a[1]), (b[0], b[1])
+            if abs(a[0] - b[0]) + abs(a[1] - b[1]) != 1:
+                raise ValueError(f"Pared entre celdas no vecinas: {a} {b}")
+            normalized.add((min(a, b), max(a, b)))
+
+        for x, y in blocked_cells | {cell for wall in normalized for cell in wall}:
+            if not (0 <= x < rows and 0 <= y < cols):
+                raise ValueError(f"Celda fuera del tablero {rows}x{cols}: {(x, y)}")
+
+        board = cls(rows, cols, blocked_cells, frozenset(normalized))
+        if board.n_open < 2:
+            raise ValueError(f"El tablero necesita al menos 2 celdas abiertas")
+        if not get_board_tables(board).connected:
+            raise ValueError(f"Las celdas abiertas del tablero no están conectadas")
+        return board
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Board":
+        """Inverso de to_dict"""
+        return cls.create(data["rows"], data["cols"], data.get("blocked", ()), data.get("walls", ()))
+
+    def to_dict(self) -> Dict:
+        """Descripción serializable (JSON) del tablero"""
+        return {
+            "rows": self.rows,
+            "cols": self.cols,
+            "blocked": [list(cell) for cell in sorted(self.blocked)],
+            "walls": [[list(a), list(b)] for a, b in sorted(self.walls)],
+        }
+
+    def to_firestore(self) -> Dict:
+        """Como to_dict, sin arrays anidados (Firestore no los admite)"""
+        return {
+            "rows": self.rows,
+            "cols": self.cols,
+            "blocked": [{"x": x, "y": y} for x, y in sorted(self.blocked)],
+            "walls": [{"x1": a[0], "y1": a[1], "x2": b[0], "y2": b[1]} for a, b in sorted(self.walls)],
+        }
+
+    @classmethod
+    def from_firestore(cls, data: Dict) -> "Board":
+        """Inverso de to_firestore"""
+        return cls.create(data["rows"], data["cols"],
+                          [(cell["x"], cell["y"]) for cell in data.get("blocked", ())],
+                          [((wall["x1"], wall["y1"]), (wall["x2"], wall["y2"])) for wall in data.get("walls", ())])
+
+    @property
+    def is_plain(self) -> bool:
+        """Grid cuadrado completo: el caso rápido de path_engine.py"""
+        return self.rows == self.cols and self.is_rectangle
+
+    @property
+    def is_rectangle(self) -> bool:
+        """Rectángulo completo, sin huecos ni paredes: feasibility.py es exacto"""
+        return not self.blocked and not self.walls
+
+    @property
+    def n_open(self) -> int:
+        return self.rows * self.cols - len(self.blocked)
+
+    def index(self, cell: Cell) -> int:
+        return cell[0] * self.cols + cell[1]
+
+    def is_open(self, cell: Cell) -> bool:
+        x, y = cell
+        return 0 <= x < self.rows and 0 <= y < self.cols and cell not in self.blocked
+
+    def open_cells(self) -> List[Cell]:
+        return [(x, y) for x in range(self.rows) for y in range(self.cols) if (x, y) not in self.blocked]
+
+    def adjacent(self, a: Cell, b: Cell) -> bool:
+        """Celdas abiertas vecinas sin pared entre ellas"""
+        return (abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 and self.is_open(a) and self.is_open(b)
+                and (min(a, b), max(a, b)) not in self.walls)
+
+    def create_matrix(self) -> List[List[int]]:
+        """Matriz vacía del puzzle, con BLOCKED_CELL en los huecos"""
+        matrix = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
+        for x, y in self.blocked:
+            matrix[x][y] = BLOCKED_CELL
+        return matrix
+
+    def validate_path(self, path: List[Cell]) -> bool:
+        """Recorre todas las celdas abiertas una vez, entre vecinas y sin cruzar paredes"""
+        if len(path) != self.n_open or len(set(path)) != len(path):
+            return False
+        if not all(self.is_open(cell) for cell in path):
+            return False
+        return all(self.adjacent(a, b) for a, b in zip(path, path[1:]))
+
+
+@dataclass(frozen=True)
+class BoardTables:
+    """Adyacencia CSR precalculada de un tablero"""
+    n_cells: int                   # rows * cols (índices, incluidos los huecos)
+    n_open: int
+    open_mask: int
+    offsets: Tuple[int, ...]
+    targets: Tuple[int, ...]
+    degrees: Tuple[int, ...]
+    neighbor_masks: Tuple[int, ...]
+    connected: bool
+
+    def neighbors(self, i: int) -> Tuple[int, ...]:
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+
+@lru_cache(maxsize=256)
+def get_board_tables(board: Board) -> BoardTables:
+    """Calcula (una vez por tablero) la adyacencia CSR en el orden de DEFAULT_DIRECTIONS"""
+    offsets = [0]
+    targets = []
+    open_mask = 0
+    for x in range(board.rows):
+        for y in range(board.cols):
+            if board.is_open((x, y)):
+                open_mask |= 1 << board.index((x, y))
+                for dx, dy in DEFAULT_DIRECTIONS:
+                    if board.adjacent((x, y), (x + dx, y + dy)):
+                        targets.append(board.index((x + dx, y + dy)))
+            offsets.append(len(targets))
+
+    n_cells = board.rows * board.cols
+    neighbor_masks = tuple(sum(1 << n for n in targets[offsets[i]:offsets[i + 1]]) for i in range(n_cells))
+    first = open_mask & -open_mask
+    return BoardTables(
+        n_cells=n_cells,
+        n_open=bin(open_mask).count("1"),
+        open_mask=open_mask,
+        offsets=tuple(offsets),
+        targets=tuple(targets),
+        degrees=tuple(offsets[i + 1] - offsets[i] for i in range(n_cells)),
+        neighbor_masks=neighbor_masks,
+        connected=flood_adjacency(first, open_mask, neighbor_masks) == open_mask,
+    )
+
+
+@lru_cache(maxsize=1024)
+def get_board_neighbor_order(board: Board, directions: Tuple[Direction, ...]) -> Tuple[Tuple[int, ...], ...]:
+    """Vecinos de cada celda en el orden de `directions` (como get_neighbor_order)"""
+    tables = get_board_tables(board)
+    order = []
+    for i in range(tables.n_cells):
+        x, y = divmod(i, board.cols)
+        neighbors = tables.neighbors(i)
+        order.append(tuple(n for n in (board.index((x + dx, y + dy)) for dx, dy in directions
+                                       if 0 <= x + dx < board.rows and 0 <= y + dy < board.cols)
+                           if n in neighbors))
+    return tuple(order)
+
+
+def cell_color(cell: Cell) -> int:
+    """Color de la celda en el tablero de ajedrez (el camino alterna colores)"""
+    return (cell[0] + cell[1]) & 1
+
+
+def board_feasible_pair(board: Board, start: Cell, end: Cell) -> bool:
+    """Condición de paridad para un camino de `start` a `end` (necesaria, no suficiente)
+
+    El camino alterna colores: con tantas celdas abiertas de cada color los
+    extremos son de colores distintos, con una más de un color ambos son de
+    ese color, y con más diferencia no hay camino. Las paredes y huecos
+    pueden impedirlo igualmente; eso lo descubre la búsqueda.
+    """
+    if start == end or not board.is_open(start) or not board.is_open(end):
+        return False
+    cells = board.open_cells()
+    dark = sum(cell_color(cell) for cell in cells)
+    light = len(cells) - dark
+    if dark == light:
+        return cell_color(start) != cell_color(end)
+    if abs(dark - light) == 1:
+        majority = 1 if dark > light else 0
+        return cell_color(start) == majority and cell_color(end) == majority
+    return False
+
+
+def sample_board_pair(board: Board, rng: random.Random) -> Tuple[Cell, Cell]:
+    """Extremos al azar que cumplen la paridad (ValueError si no hay ninguno)"""
+    cells = board.open_cells()
+    dark = [cell for cell in cells if cell_color(cell)]
+    light = [cell for cell in cells if not cell_color(cell)]
+    if len(dark) == len(light):
+        start = rng.choice(cells)
+        end = rng.choice(light if cell_color(start) else dark)
+        return start, end
+    if abs(len(dark) - len(light)) == 1:
+        majority = dark if len(dark) > len(light) else light
+        if len(majority) >= 2:
+            start, end = rng.sample(majority, 2)
+            return start, end
+    raise ValueError(f"El tablero no admite camino hamiltoniano (paridad {len(dark)}/{len(light)})")
+
+
+def is_feasible_board_pair(board: Board, start: Cell, end: Cell) -> bool:
+    """Oráculo exacto de feasibility.py en rectángulos completos, paridad en el resto"""
+    if board.is_plain:
+        return is_feasible_pair(board.rows, start, end)
+    if board.is_rectangle:
+        return board.is_open(start) and board.is_open(end) and \
+            has_hamiltonian_path(board.rows, board.cols, start, end)
+    return board_feasible_pair(board, start, end)
+
+
+def sample_pair(board: Board, rng: random.Random) -> Tuple[Cell, Cell]:
+    """Extremos al azar para buscar un camino en `board`"""
+    if board.is_plain:
+        return sample_feasible_pair(board.rows, rng)
+    if board.is_rectangle:
+        return sample_rectangle_pair(board.rows, board.cols, rng)
+    return sample_board_pair(board, rng)
+
+
+def board_search(board: Board, start: Cell, end: Cell, strategy: SearchStrategy, rng: random.Random,
+                 directions: Sequence[Direction] = DEFAULT_DIRECTIONS) -> HamiltonianSearch:
+    """Búsqueda de camino en un tablero con la estrategia dada
+
+    Un grid cuadrado completo usa el motor de bitboards; cualquier otro, la
+    adyacencia CSR (Warnsdorff con el desempate y el beam de la estrategia;
+    las penalizaciones de borde solo tienen sentido en el grid cuadrado).
+    """
+    if board.is_plain:
+        return strategy.new_search(board.rows, start, end, rng, directions)
+
+    tiebreak = None
+    if strategy.randomized:
+        tiebreak = list(range(board.rows * board.cols))
+        rng.shuffle(tiebreak)
+    return HamiltonianSearch.on_adjacency(get_board_neighbor_order(board, tuple(directions)),
+                                          get_board_tables(board).open_mask, board.cols, start, end,
+                                          tiebreak=tiebreak, beam_width=strategy.beam_width)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Subida masiva de niveles a Firestore
+Parte las escrituras en lotes de como mucho 500 (límite de un WriteBatch),
+mantiene varios commits en vuelo a la vez y sube el ritmo poco a poco (regla
+500/50/5 de Firestore: empezar a 500 escrituras/s y aumentar un 50% cada 5
+minutos). Si un lote falla solo se reintenta ese lote, con espera
+exponencial; como cada escritura es un `set` completo, repetir un lote que sí
+llegó a aplicarse es inocuo.
+"""
+
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import List, Tuple, Dict, Optional
+
+from firebase_admin import firestore
+
+from board import Board
+
+# Máximo de escrituras por WriteBatch en Firestore
+MAX_BATCH_WRITES = 500
+
+# Commits simultáneos por defecto
+DEFAULT_MAX_IN_FLIGHT = 4
+
+# Ritmo inicial y subida gradual (regla 500/50/5)
+INITIAL_WRITES_PER_SECOND = 500
+RAMP_INTERVAL_SECONDS = 300
+RAMP_FACTOR = 1.5
+
+# Intentos por lote y espera base entre reintentos
+MAX_CHUNK_ATTEMPTS = 4
+RETRY_BASE_DELAY = 1.0
+
+
+def puzzle_to_firestore(puzzle: Dict) -> Tuple[str, Dict]:
+    """Id del documento y datos en formato Firestore de un puzzle generado"""
+    # Generar ID único para el nivel
+    level_id = f"level_{puzzle['level']:04d}"
+
+    # Convertir arrays anidados a formato compatible con Firestore
+    firestore_puzzle = {
+        "difficulty": puzzle["difficulty"],
+        "level": puzzle["level"],
+        "id": level_id,
+        "createdAt": firestore.SERVER_TIMESTAMP,
+        "isActive": True
+    }
+
+    # Tamaño: `gridSize` en los cuadrados, `rows` y `cols` en los rectángulos
+    for key in ("gridSize", "rows", "cols"):
+        if key in puzzle:
+            firestore_puzzle[key] = puzzle[key]
+
+    # Grid como mapa de filas y solución como lista de {x, y}
+    firestore_puzzle["grid"] = {str(i): row for i, row in enumerate(puzzle["grid"])}
+    firestore_puzzle["solution"] = [{"x": x, "y": y} for x, y in puzzle["solution"]]
+
+    # Números colocados (pueden no ser los pedidos, ver uniqueness.py)
+    if "numbers" in puzzle:
+        firestore_puzzle["numbers"] = puzzle["numbers"]
+
+    # Dificultad medida por el solver (ver difficulty_rating.py)
+    if "rating" in puzzle:
+        firestore_puzzle["rating"] = puzzle["rating"]
+
+    # Tablero no cuadrado, con huecos o con paredes (ver board.py)
+    if "board" in puzzle:
+        firestore_puzzle["board"] = Board.from_dict(puzzle["board"]).to_firestore()
+
+    return level_id, firestore_puzzle
+
+
+class RampUpLimiter:
+    """Limita escrituras por segundo con un ritmo que crece por tramos"""
+
+    def __init__(self, initial_rate: float = INITIAL_WRITES_PER_SECOND,
+                 ramp_interval: float = RAMP_INTERVAL_SECONDS, ramp_factor: float = RAMP_FACTOR,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.initial_rate = initial_rate
+        self.ramp_interval = ramp_interval
+        self.ramp_factor = ramp_factor
+        self.clock = clock
+        self.sleep = sleep
+        self.started = clock()
+        self.next_slot = self.started
+
+    def current_rate(self) -> float:
+        """Escrituras por segundo permitidas ahora mismo"""
+        steps = int((self.clock() - self.started) // self.ramp_interval)
+        return self.initial_rate * self.ramp_factor ** steps
+
+    def acquire(self, writes: int):
+        """Espera hasta que se puedan enviar `writes` escrituras"""
+        now = self.clock()
+        if self.next_slot > now:
+            self.sleep(self.next_slot - now)
+            now = self.next_slot
+        self.next_slot = now + writes / self.current_rate()
+
+
+@dataclass
+class UploadReport:
+    """Resultado de una subida masiva"""
+    uploaded: int = 0
+    commits: int = 0
+    retries: int = 0
+    failed: List[str] = field(default_factory=list)   # ids de documentos no subidos
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
+class BulkUploader:
+    """Sube documentos a una colección en lotes concurrentes con reintentos"""
+
+    def __init__(self, db, collection: str = 'levels', chunk_size: int = MAX_BATCH_WRITES,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, limiter: Optional[RampUpLimiter] = None,
+                 max_attempts: int = MAX_CHUNK_ATTEMPTS, retry_delay: float = RETRY_BASE_DELAY):
+        self.db = db
+        self.collection = collection
+        self.chunk_size = max(1, min(chunk_size, MAX_BATCH_WRITES))
+        self.max_in_flight = max(1, max_in_flight)
+        self.limiter = limiter or RampUpLimiter()
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def _commit(self, chunk: List[Tuple[str, Dict]], delay: float):
+        """Escribe un lote (tras `delay` segundos si es un reintento)"""
+        if delay:
+            time.sleep(delay)
+        batch = self.db.batch()
+        collection = self.db.collection(self.collection)
+        for doc_id, data in chunk:
+            batch.set(collection.document(doc_id), data)
+        batch.commit()
+
+    def upload(self, documents: List[Tuple[str, Dict]]) -> UploadReport:
+        """Sube todos los documentos y devuelve qué se subió y qué falló"""
+        report = UploadReport()
+        pending = deque((documents[i:i + self.chunk_size], 0)
+                        for i in range(0, len(documents), self.chunk_size))
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            while pending or in_flight:
+                while pending and len(in_flight) < self.max_in_flight:
+                    chunk, attempt = pending.popleft()
+                    self.limiter.acquire(len(chunk))
+                    delay = self.retry_delay * 2 ** (attempt - 1) if attempt else 0
+                    in_flight[pool.submit(self._commit, chunk, delay)] = (chunk, attempt)
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk, attempt = in_flight.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        report.uploaded += len(chunk)
+                        report.commits += 1
+                    elif attempt + 1 < self.max_attempts:
+                        print(f"⚠️  Lote de {len(chunk)} falló ({error}), reintentando...")
+                        report.retries += 1
+                        pending.append((chunk, attempt + 1))
+                    else:
+                        print(f"❌ Lote de {len(chunk)} falló tras {self.max_attempts} intentos: {error}")
+                        report.failed.extend(doc_id for doc_id, _ in chunk)
+
+        return report
+
+
+def upload_puzzles(db, puzzles: List[Dict], **options) -> UploadReport:
+    """Sube puzzles generados a la colección `levels`"""
+    uploader = BulkUploader(db, **options)
+    return uploader.upload([puzzle_to_firestore(puzzle) for puzzle in puzzles])
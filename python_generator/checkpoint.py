@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Diario de una ejecución del generador semanal
+Un fichero JSONL al que se añade una línea por evento, vaciada a disco al
+momento:
+
+- `run`: parámetros de la campaña (semilla, niveles, primer hueco, motor) y
+  el bloque de números de nivel reservado.
+- `level`: un hueco del plan terminado, con el puzzle aceptado (o sin él si
+  el nivel falló).
+- `uploaded`: niveles confirmados en el almacén.
+- `done`: la generación terminó.
+
+No hace falta guardar el estado de ningún generador aleatorio: cada
+configuración e intento deriva su semilla de (semilla de campaña, nivel,
+intento) (ver seeding.py), así que con la semilla y el siguiente hueco del
+plan se continúa exactamente donde se paró. Con `--resume` se suben primero
+los niveles generados y no confirmados, y se sigue con el resto del plan sin
+regenerar los terminados.
+"""
+
+import os
+import json
+from typing import Dict, Iterator, Optional, List
+
+# Diario por defecto (junto al módulo)
+DEFAULT_CHECKPOINT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "checkpoints", "weekly_run.jsonl")
+
+
+class RunJournal:
+    """Diario de una ejecución: se lee al abrirlo y se amplía línea a línea"""
+
+    def __init__(self, filename: str = DEFAULT_CHECKPOINT_FILE):
+        self.filename = filename
+        self.file = None
+
+        # Estado reconstruido a partir del fichero
+        self.run: Optional[Dict] = None
+        self.next_slot: Optional[int] = None       # siguiente hueco del plan por generar
+        self.last_level: Optional[int] = None      # último número de nivel asignado
+        self.finished = False
+        self.pending_uploads: Dict[int, Dict] = {}  # nivel -> puzzle sin confirmar al abrir el diario
+
+        if os.path.exists(filename):
+            self._load()
+
+    def _records(self) -> Iterator[Dict]:
+        """Líneas del diario (se ignora una línea cortada por una caída)"""
+        with open(self.filename) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def _load(self):
+        for record in self._records():
+            kind = record.get("type")
+            if kind == "run":
+                self.run = record
+                self.next_slot = record["start_level"]
+            elif kind == "level":
+                self.next_slot = record["slot"] + 1
+                puzzle = record.get("puzzle")
+                if puzzle:
+                    self.last_level = puzzle["level"]
+                    if self.run.get("upload"):
+                        self.pending_uploads[puzzle["level"]] = puzzle
+            elif kind == "uploaded":
+                for level in record["levels"]:
+                    self.pending_uploads.pop(level, None)
+            elif kind == "done":
+                self.finished = True
+
+    @property
+    def resumable(self) -> bool:
+        """Hay una ejecución sin terminar o con niveles sin subir"""
+        return self.run is not None and (not self.finished or bool(self.pending_uploads))
+
+    def puzzles(self) -> Iterator[Dict]:
+        """Puzzles aceptados en el diario, en orden (sin cargarlos todos)"""
+        if not os.path.exists(self.filename):
+            return
+        for record in self._records():
+            if record.get("type") == "level" and record.get("puzzle"):
+                yield record["puzzle"]
+
+    def _append(self, record: Dict):
+        if self.file is None:
+            directory = os.path.dirname(os.path.abspath(self.filename))
+            os.makedirs(directory, exist_ok=True)
+            self.file = open(self.filename, 'a')
+            # Cerrar una línea que quedara a medias
+            if self.file.tell() > 0:
+                with open(self.filename, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        self.file.write("\n")
+        self.file.write(json.dumps(record, separators=(',', ':')) + "\n")
+        self.file.flush()
+
+    def start_run(self, seed: int, count: int, start_level: int, block_end: Optional[int], **options):
+        """Empieza un diario nuevo (descarta el anterior)"""
+        self.close()
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+        self.run = dict(type="run", seed=seed, count=count, start_level=start_level,
+                        block_end=block_end, **options)
+        self.next_slot = start_level
+        self.last_level = None
+        self.finished = False
+        self.pending_uploads = {}
+        self._append(self.run)
+
+    def record_level(self, slot: int, puzzle: Optional[Dict]):
+        """Hueco del plan terminado (puzzle None si falló)"""
+        self._append({"type": "level", "slot": slot, "puzzle": puzzle})
+        self.next_slot = slot + 1
+        if puzzle:
+            self.last_level = puzzle["level"]
+
+    def record_uploaded(self, levels: List[int]):
+        """Niveles confirmados en el almacén"""
+        self._append({"type": "uploaded", "levels": levels})
+        for level in levels:
+            self.pending_uploads.pop(level, None)
+
+    def finish(self):
+        """La generación terminó"""
+        self._append({"type": "done"})
+        self.finished = True
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Espacio de configuraciones (tamaño, números) de cada dificultad
+Se precalcula una vez con todas las combinaciones de los rangos de cada
+dificultad y se quitan las que ya usa el catálogo, así que elegir una
+configuración libre es O(1): dificultad por peso entre las que aún tienen
+configuraciones y, dentro de ella, una posición al azar de la lista. Quitar
+una configuración también es O(1) (se intercambia con la última).
+
+Cuando una dificultad se queda sin configuraciones se sabe al construir el
+índice (`exhausted`), en vez de descubrirlo a base de sorteos fallidos.
+
+Una campaña planifica sobre una copia (`copy`) y quita cada configuración
+según la elige, así que no repite ninguna mientras queden libres.
+"""
+
+import random
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Config = Tuple[int, int]
+
+
+class ConfigSpace:
+    """Configuraciones libres de cada dificultad"""
+
+    def __init__(self, difficulty_configs: Dict[Enum, Dict], used: Iterable[Tuple[int, int, str]] = ()):
+        self.weights = {difficulty: config['weight'] for difficulty, config in difficulty_configs.items()}
+        self.totals: Dict[Enum, int] = {}
+        self.free: Dict[Enum, List[Config]] = {}
+        self.position: Dict[Enum, Dict[Config, int]] = {}
+
+        for difficulty, config in difficulty_configs.items():
+            pairs = sorted({(size, min(numbers, size * size))
+                            for size in range(config['size_range'][0], config['size_range'][1] + 1)
+                            for numbers in range(config['numbers_range'][0], config['numbers_range'][1] + 1)})
+            self.totals[difficulty] = len(pairs)
+            self.free[difficulty] = pairs
+            self.position[difficulty] = {pair: i for i, pair in enumerate(pairs)}
+
+        # En orden fijo: el de `used` (un set) cambia entre procesos y decide
+        # las posiciones que quedan tras quitar
+        by_value = {difficulty.value: difficulty for difficulty in difficulty_configs}
+        for size, numbers, value in sorted(used):
+            if value in by_value:
+                self.remove(by_value[value], size, numbers)
+
+    def remove(self, difficulty: Enum, size: int, numbers: int) -> bool:
+        """Marca una configuración como usada (False si no estaba libre)"""
+        position = self.position[difficulty]
+        index = position.pop((size, numbers), None)
+        if index is None:
+            return False
+        free = self.free[difficulty]
+        last = free.pop()
+        if index < len(free):
+            free[index] = last
+            position[last] = index
+        return True
+
+    def copy(self) -> 'ConfigSpace':
+        """Copia independiente: quitar de ella no cambia este índice"""
+        clone = ConfigSpace.__new__(ConfigSpace)
+        clone.weights = dict(self.weights)
+        clone.totals = dict(self.totals)
+        clone.free = {difficulty: list(free) for difficulty, free in self.free.items()}
+        clone.position = {difficulty: dict(position) for difficulty, position in self.position.items()}
+        return clone
+
+    def remaining(self, difficulty: Enum) -> int:
+        return len(self.free[difficulty])
+
+    @property
+    def exhausted(self) -> List[Enum]:
+        """Dificultades sin ninguna configuración libre"""
+        return [difficulty for difficulty, free in self.free.items() if not free]
+
+    def sample(self, rng: random.Random, difficulty: Optional[Enum] = None) -> Optional[Tuple[int, int, Enum]]:
+        """Configuración libre al azar (None si no queda ninguna)
+
+        Sin `difficulty`, la dificultad se elige por peso entre las que aún
+        tienen configuraciones libres.
+        """
+        if difficulty is None:
+            candidates = [d for d, free in self.free.items() if free]
+            if not candidates:
+                return None
+            difficulty = rng.choices(candidates, weights=[self.weights[d] for d in candidates])[0]
+
+        free = self.free[difficulty]
+        if not free:
+            return None
+        size, numbers = free[rng.randrange(len(free))]
+        return size, numbers, difficulty
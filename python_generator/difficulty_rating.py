@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Valoración de dificultad medida con un solver
+En vez de estimar la dificultad por tamaño y densidad de números, se recorre
+la solución como lo haría un jugador que dibuja el camino desde el 1 y se
+mide cuánto hay que pensar en cada paso:
+
+- Movimiento forzado: solo hay una casilla legal a la que ir.
+- Deducción: hay varias, pero las equivocadas caen con las reglas locales
+  del solver (callejón sin salida, dos vecinos forzados, celdas
+  desconectadas o número siguiente inalcanzable) sin buscar nada.
+- Ramificación: descartar alguna opción equivocada exige explorar; el
+  esfuerzo son los nodos que necesita el solver de uniqueness.py para
+  refutarla (con un presupuesto por opción, para que valorar cada candidato
+  sea barato).
+
+La puntuación (0-100) combina la proporción de pasos que no son forzados, el
+número de ramificaciones y el esfuerzo de búsqueda (en escala logarítmica);
+las bandas de RATING_BANDS la convierten en una etiqueta de dificultad.
+"""
+
+import math
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+from path_engine import get_neighbor_order, DEFAULT_DIRECTIONS
+from board import Board, get_board_neighbor_order
+from uniqueness import solve_clues, clues_from_grid, SolverStats, SolverBudgetExceeded
+
+Cell = Tuple[int, int]
+
+# Nodos como mucho para refutar cada opción equivocada
+RATING_NODE_BUDGET = 400
+
+# Límite superior de cada banda de puntuación (la última no tiene límite)
+RATING_BANDS = (
+    (12.0, "muy_facil"),
+    (28.0, "facil"),
+    (42.0, "normal"),
+    (55.0, "dificil"),
+    (math.inf, "extremo"),
+)
+
+# Peso de cada componente en la puntuación
+NON_FORCED_WEIGHT = 40.0     # proporción de pasos con más de una opción
+BRANCHING_WEIGHT = 25.0      # proporción de pasos que exigen buscar
+EFFORT_WEIGHT = 5.0          # por cada duplicación de los nodos de búsqueda
+
+
+@dataclass
+class DifficultyRating:
+    """Medidas del solver sobre un puzzle y su puntuación"""
+    steps: int = 0
+    forced_moves: int = 0
+    deductions: int = 0
+    branching_points: int = 0
+    search_nodes: int = 0
+    max_branch_nodes: int = 0
+    capped: int = 0          # refutaciones que agotaron el presupuesto
+    score: float = 0.0
+
+    @property
+    def band(self) -> str:
+        return rating_band(self.score)
+
+    def to_dict(self) -> Dict:
+        """Medidas para guardar junto al puzzle"""
+        return dict(asdict(self), band=self.band)
+
+
+def rating_band(score: float) -> str:
+    """Banda de dificultad de una puntuación"""
+    for limit, band in RATING_BANDS:
+        if score <= limit:
+            return band
+    return RATING_BANDS[-1][1]
+
+
+def rate_puzzle(grid: List[List[int]], solution: List[Cell],
+                node_budget: int = RATING_NODE_BUDGET, board: Optional[Board] = None) -> DifficultyRating:
+    """Valora un puzzle recorriendo su solución paso a paso (en `board` si no es cuadrado)"""
+    size = len(grid)
+    cols = len(grid[0])
+    if board is not None and not board.is_plain:
+        order = get_board_neighbor_order(board, DEFAULT_DIRECTIONS)
+    else:
+        order = get_neighbor_order(size, DEFAULT_DIRECTIONS)
+        board = None
+    clue_cells = clues_from_grid(grid)
+    last_number = len(clue_cells)
+    clue_number = [0] * (size * cols)
+    for number, cell in enumerate(clue_cells, 1):
+        clue_number[cell] = number
+
+    cells = [x * cols + y for x, y in solution]
+    n_cells = len(cells)
+    rating = DifficultyRating(steps=n_cells - 1)
+
+    visited = 1 << cells[0]
+    expected = 2
+    for i in range(1, n_cells):
+        head = cells[i - 1]
+        last_step = i == n_cells - 1
+
+        # Casillas a las que las reglas permiten ir
+        options = []
+        for n in order[head]:
+            if visited >> n & 1:
+                continue
+            number = clue_number[n]
+            if number and (number != expected or (number == last_number) != last_step):
+                continue
+            options.append(n)
+
+        if len(options) <= 1:
+            rating.forced_moves += 1
+        else:
+            branch_nodes = 0
+            for n in options:
+                if n == cells[i]:
+                    continue
+                branch_nodes += _refutation_nodes(size, clue_cells, cells[:i] + [n], node_budget, rating, board)
+            if branch_nodes <= len(options) - 1:
+                # Cada opción equivocada cayó en su primer nodo: reglas locales
+                rating.deductions += 1
+            else:
+                rating.branching_points += 1
+                rating.search_nodes += branch_nodes
+                rating.max_branch_nodes = max(rating.max_branch_nodes, branch_nodes)
+
+        visited |= 1 << cells[i]
+        if clue_number[cells[i]]:
+            expected = clue_number[cells[i]] + 1
+
+    steps = max(1, rating.steps)
+    rating.score = round(NON_FORCED_WEIGHT * (rating.deductions + rating.branching_points) / steps
+                         + BRANCHING_WEIGHT * rating.branching_points / steps
+                         + EFFORT_WEIGHT * math.log2(1 + rating.search_nodes), 1)
+    return rating
+
+
+def _refutation_nodes(size: int, clue_cells: List[int], prefix: List[int],
+                      node_budget: int, rating: DifficultyRating, board: Optional[Board] = None) -> int:
+    """Nodos que necesita el solver para descartar un camino que empieza por `prefix`"""
+    stats = SolverStats()
+    try:
+        solve_clues(size, clue_cells, limit=1, stats=stats, max_nodes=node_budget, prefix=prefix, board=board)
+    except SolverBudgetExceeded:
+        rating.capped += 1
+    return stats.nodes
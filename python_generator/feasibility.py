@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Oráculo de factibilidad de caminos hamiltonianos en grids rectangulares
+Decide en O(1) si existe un camino hamiltoniano entre dos celdas usando el
+teorema de Itai, Papadimitriou y Szwarcfiter (1982): hay camino si y solo si
+los extremos son compatibles en color (tablero de ajedrez) y el caso no es
+uno de los prohibidos para rectángulos de ancho 1, 2 o 3.
+"""
+
+import random
+from functools import lru_cache
+from typing import List, Tuple
+
+Cell = Tuple[int, int]
+
+
+def cell_color(cell: Cell) -> int:
+    """Color de la celda en el tablero de ajedrez (0 = color de las esquinas)"""
+    return (cell[0] + cell[1]) % 2
+
+
+def is_color_compatible(rows: int, cols: int, start: Cell, end: Cell) -> bool:
+    """Condición de paridad del tablero de ajedrez
+
+    Con un número par de celdas el camino alterna colores y acaba en el color
+    contrario; con un número impar empieza y acaba en el color mayoritario
+    (el de las esquinas).
+    """
+    if (rows * cols) % 2 == 0:
+        return cell_color(start) != cell_color(end)
+    return cell_color(start) == 0 and cell_color(end) == 0
+
+
+def _is_forbidden_3xn(cols: int, start: Cell, end: Cell) -> bool:
+    """Caso prohibido F3 para un rectángulo de 3 filas y `cols` par"""
+    if cols % 2 != 0:
+        return False
+
+    # El caso es prohibido si alguna imagen por simetría lo es
+    for s, t in ((start, end), (end, start)):
+        for flip_rows in (False, True):
+            for flip_cols in (False, True):
+                sr, sc = s
+                tr, tc = t
+                if flip_rows:
+                    sr, tr = 2 - sr, 2 - tr
+                if flip_cols:
+                    sc, tc = cols - 1 - sc, cols - 1 - tc
+                if (sr + sc) % 2 == 0:
+                    continue
+                if sc < tc - 1 or (sr == 1 and sc < tc):
+                    return True
+    return False
+
+
+def is_forbidden(rows: int, cols: int, start: Cell, end: Cell) -> bool:
+    """Casos prohibidos F1-F3 (solo aparecen con un lado de tamaño 1, 2 o 3)"""
+    # Orientar el rectángulo para que el lado corto sean las filas
+    if rows > cols:
+        rows, cols = cols, rows
+        start, end = (start[1], start[0]), (end[1], end[0])
+
+    if rows == 1:
+        # F1: en una fila los extremos tienen que ser los bordes
+        return {start[1], end[1]} != {0, cols - 1}
+
+    if rows == 2:
+        # F2: los extremos no pueden formar un "peldaño" interior
+        return start[1] == end[1] and 0 < start[1] < cols - 1
+
+    if rows == 3:
+        return _is_forbidden_3xn(cols, start, end)
+
+    return False
+
+
+def has_hamiltonian_path(rows: int, cols: int, start: Cell, end: Cell) -> bool:
+    """True si existe un camino hamiltoniano de `start` a `end` en un grid rows x cols"""
+    if start == end:
+        return rows * cols == 1
+    if not is_color_compatible(rows, cols, start, end):
+        return False
+    return not is_forbidden(rows, cols, start, end)
+
+
+def is_feasible_pair(size: int, start: Cell, end: Cell) -> bool:
+    """Versión para los grids cuadrados NxN de los generadores"""
+    return has_hamiltonian_path(size, size, start, end)
+
+
+@lru_cache(maxsize=None)
+def rectangle_pairs(rows: int, cols: int) -> Tuple[Tuple[Cell, Cell], ...]:
+    """Todos los pares (inicio, fin) ordenados con camino hamiltoniano en rows x cols"""
+    cells = [(i, j) for i in range(rows) for j in range(cols)]
+    return tuple((s, e) for s in cells for e in cells if has_hamiltonian_path(rows, cols, s, e))
+
+
+def feasible_pairs(size: int) -> Tuple[Tuple[Cell, Cell], ...]:
+    """Todos los pares (inicio, fin) ordenados con camino hamiltoniano en NxN"""
+    return rectangle_pairs(size, size)
+
+
+def sample_rectangle_pair(rows: int, cols: int, rng=random) -> Tuple[Cell, Cell]:
+    """Elige uniformemente un par (inicio, fin) con camino hamiltoniano en rows x cols"""
+    pairs = rectangle_pairs(rows, cols)
+    if not pairs:
+        raise ValueError(f"Un grid {rows}x{cols} no admite caminos hamiltonianos")
+    return rng.choice(pairs)
+
+
+def sample_feasible_pair(size: int, rng=random) -> Tuple[Cell, Cell]:
+    """Elige uniformemente un par (inicio, fin) que admite camino hamiltoniano"""
+    return sample_rectangle_pair(size, size, rng)
+
+
+def feasible_ends(size: int, start: Cell) -> List[Cell]:
+    """Celdas finales válidas para un inicio dado"""
+    return [e for s, e in feasible_pairs(size) if s == start]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Huella canónica de puzzles para detectar duplicados
+Un nivel girado, reflejado o recorrido al revés (números K..1) es el mismo
+puzzle para el jugador. La huella reduce grid + solución a la menor de sus 16
+variantes (8 simetrías del cuadrado x 2 sentidos), así que todas las variantes
+de un nivel comparten huella y la comprobación es una consulta a un set.
+
+En tableros rectangulares solo valen las 4 simetrías que conservan la forma
+(identidad, giro 180° y los dos espejos). Las celdas bloqueadas (-1) se
+mueven con el grid pero no se renumeran, y las paredes, si las hay, forman
+parte de la huella.
+"""
+
+import json
+import hashlib
+from typing import Iterable, List, Tuple, Optional, Dict
+
+Cell = Tuple[int, int]
+Wall = Tuple[Cell, Cell]
+
+# Simetrías del rectángulo como funciones de (x, y) con mx = filas - 1 y
+# my = columnas - 1; las que trasponen solo valen en grids cuadrados. En un
+# cuadrado coinciden con las SYMMETRIES de path_corpus.py
+SYMMETRIES = (
+    (lambda x, y, mx, my: (x, y), False),             # identidad
+    (lambda x, y, mx, my: (y, mx - x), True),         # giro 90°
+    (lambda x, y, mx, my: (mx - x, my - y), False),   # giro 180°
+    (lambda x, y, mx, my: (my - y, x), True),         # giro 270°
+    (lambda x, y, mx, my: (x, my - y), False),        # espejo horizontal
+    (lambda x, y, mx, my: (mx - x, y), False),        # espejo vertical
+    (lambda x, y, mx, my: (y, x), True),              # diagonal
+    (lambda x, y, mx, my: (my - y, mx - x), True),    # antidiagonal
+)
+
+
+def _variant(grid: List[List[int]], solution: List[Cell], walls: List[Wall], symmetry, reverse: bool):
+    """Grid, solución (y paredes) transformados como tuplas comparables"""
+    rows, cols = len(grid), len(grid[0])
+    mx, my = rows - 1, cols - 1
+    last_number = max(max(row) for row in grid)
+
+    transformed = [[0] * cols for _ in range(rows)]
+    for x, row in enumerate(grid):
+        for y, value in enumerate(row):
+            if value > 0 and reverse:
+                value = last_number + 1 - value
+            tx, ty = symmetry(x, y, mx, my)
+            transformed[tx][ty] = value
+
+    path = [symmetry(x, y, mx, my) for x, y in solution]
+    if reverse:
+        path.reverse()
+
+    variant = (tuple(tuple(row) for row in transformed), tuple(path))
+    if walls:
+        images = (sorted((symmetry(*a, mx, my), symmetry(*b, mx, my))) for a, b in walls)
+        variant += (tuple(sorted(tuple(wall) for wall in images)),)
+    return variant
+
+
+def canonical_form(grid: List[List[int]], solution: Optional[List[Cell]] = None,
+                   walls: Iterable[Wall] = ()):
+    """Menor variante (grid, solución) bajo simetrías e inversión del recorrido"""
+    solution = [tuple(cell) for cell in solution] if solution else []
+    walls = [(tuple(a), tuple(b)) for a, b in walls]
+    square = len(grid) == len(grid[0])
+    return min(_variant(grid, solution, walls, symmetry, reverse)
+               for symmetry, transposes in SYMMETRIES if square or not transposes
+               for reverse in (False, True))
+
+
+def puzzle_fingerprint(grid: List[List[int]], solution: Optional[List[Cell]] = None,
+                       walls: Iterable[Wall] = ()) -> str:
+    """Huella estable de un puzzle, igual para todas sus variantes simétricas"""
+    canonical = canonical_form(grid, solution, walls)
+    return hashlib.md5(json.dumps(canonical).encode()).hexdigest()
+
+
+def grid_from_firestore(grid_data: Dict[str, List[int]]) -> List[List[int]]:
+    """Grid desde el formato de Firestore ({"0": fila, "1": fila, ...})"""
+    return [grid_data[key] for key in sorted(grid_data, key=int)]
+
+
+def solution_from_firestore(solution_data: List[Dict[str, int]]) -> List[Cell]:
+    """Solución desde el formato de Firestore ([{"x": .., "y": ..}, ...])"""
+    return [(step["x"], step["y"]) for step in solution_data]
+
+
+def walls_from_firestore(board_data: Optional[Dict]) -> List[Wall]:
+    """Paredes del tablero en formato Firestore ([{"x1", "y1", "x2", "y2"}, ...], ver board.py)"""
+    return [((wall["x1"], wall["y1"]), (wall["x2"], wall["y2"])) for wall in (board_data or {}).get("walls", ())]
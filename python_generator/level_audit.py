@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Auditoría del catálogo de niveles
+Vuelve a comprobar los niveles ya publicados: lee la colección `levels`
+documento a documento (Firestore o almacén local) o un fichero JSONL
+exportado, y para cada nivel verifica que la solución esté dentro del
+tablero, sea continua (sin cruzar paredes), recorra cada celda abierta una
+vez, pase por los números en orden del 1 al último, y que el puzzle tenga
+solución única.
+
+Las comprobaciones del camino y de los números no recorren los niveles uno a
+uno: los niveles de un mismo tablero se apilan en matrices de NumPy
+(soluciones B x N x 2, grids B x celdas) y cada regla es una operación sobre
+el lote entero. La unicidad sí necesita el solver de uniqueness.py nivel a
+nivel, con presupuesto de nodos. Los lotes se reparten entre procesos con
+una ventana acotada, así que la memoria no crece con el tamaño del catálogo.
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+from collections import deque
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from board import Board, BLOCKED_CELL
+from fingerprint import grid_from_firestore, solution_from_firestore
+from uniqueness import solve_clues, clues_from_grid, SolverBudgetExceeded
+from puzzle_sink import read_puzzles
+from level_store import create_store, LEVEL_STORES, STORE_FIRESTORE
+
+Cell = Tuple[int, int]
+
+# Niveles por lote (cada lote es una tarea del pool)
+AUDIT_CHUNK_SIZE = 2000
+
+# Lotes en vuelo por proceso
+PREFETCH_PER_WORKER = 2
+
+# Nodos como mucho del solver para decidir la unicidad de un nivel
+AUDIT_NODE_BUDGET = 200_000
+
+# Problemas que se detectan
+ISSUE_FORMAT = "formato"            # documento ilegible o grid que no encaja con el tablero
+ISSUE_CELLS = "celdas"              # celdas de la solución fuera del tablero o bloqueadas
+ISSUE_CONTINUITY = "continuidad"    # pasos entre celdas no vecinas o a través de una pared
+ISSUE_COVERAGE = "cobertura"        # celdas abiertas sin recorrer o repetidas
+ISSUE_CLUES = "numeros"             # números fuera de orden, sin el 1 o sin el último en los extremos
+ISSUE_AMBIGUOUS = "ambiguo"         # más de una solución
+ISSUE_SOLVER = "solver"             # el solver no reproduce la solución guardada
+ISSUE_UNCHECKED = "sin_verificar"   # unicidad sin decidir dentro del presupuesto
+
+CORRUPT_ISSUES = (ISSUE_FORMAT, ISSUE_CELLS, ISSUE_CONTINUITY, ISSUE_COVERAGE, ISSUE_CLUES, ISSUE_SOLVER)
+
+
+@dataclass
+class AuditLevel:
+    """Nivel normalizado, venga de Firestore o de la salida de un generador"""
+    doc_id: str
+    level: Optional[int]
+    board: Board
+    grid: List[List[int]]
+    solution: List[Cell]
+
+
+@dataclass
+class LevelIssue:
+    """Problemas encontrados en un nivel"""
+    doc_id: str
+    level: Optional[int]
+    issues: List[str]
+    detail: str = ""
+
+    @property
+    def corrupt(self) -> bool:
+        return any(issue in CORRUPT_ISSUES for issue in self.issues)
+
+
+@dataclass
+class AuditReport:
+    """Resultado de una auditoría"""
+    audited: int = 0
+    seconds: float = 0.0
+    issues: List[LevelIssue] = field(default_factory=list)
+
+    @property
+    def corrupt(self) -> List[LevelIssue]:
+        return [issue for issue in self.issues if issue.corrupt]
+
+    @property
+    def ambiguous(self) -> List[LevelIssue]:
+        return [issue for issue in self.issues if ISSUE_AMBIGUOUS in issue.issues]
+
+    @property
+    def unchecked(self) -> List[LevelIssue]:
+        return [issue for issue in self.issues if ISSUE_UNCHECKED in issue.issues]
+
+    @property
+    def ok(self) -> bool:
+        return not self.corrupt and not self.ambiguous
+
+    def counts(self) -> Dict[str, int]:
+        """Niveles con cada tipo de problema"""
+        counts: Dict[str, int] = {}
+        for issue in self.issues:
+            for name in issue.issues:
+                counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def to_dict(self) -> Dict:
+        return {
+            "audited": self.audited,
+            "seconds": round(self.seconds, 3),
+            "counts": self.counts(),
+            "issues": [dict(asdict(issue), corrupt=issue.corrupt) for issue in self.issues],
+        }
+
+
+def level_from_document(doc_id: str, data: Dict) -> AuditLevel:
+    """Normaliza un documento de Firestore o un puzzle del JSONL de los generadores
+
+    Lanza KeyError, TypeError o ValueError si al documento le falta algo.
+    """
+    grid = data["grid"]
+    solution = data["solution"]
+    board_data = data.get("board")
+    if not board_data:
+        # Sin tablero: cuadrado de `gridSize` o rectángulo de `rows` x `cols`
+        rows = int(data["gridSize"] if "gridSize" in data else data["rows"])
+        board_data = {"rows": rows, "cols": int(data.get("cols", rows))}
+    if isinstance(grid, dict):
+        # Formato Firestore (ver bulk_upload.py)
+        grid = grid_from_firestore(grid)
+        solution = solution_from_firestore(solution)
+        board = Board.from_firestore(board_data)
+    else:
+        # Las celdas se quedan como listas [x, y]: NumPy no necesita tuplas
+        board = Board.from_dict(board_data)
+    return AuditLevel(doc_id, data.get("level"), board, grid, solution)
+
+
+def read_levels(documents: Iterable[Tuple[str, Dict]],
+                rejected: List[LevelIssue]) -> Iterator[AuditLevel]:
+    """Niveles normalizados; los documentos ilegibles van a `rejected`"""
+    for doc_id, data in documents:
+        try:
+            yield level_from_document(doc_id, data)
+        except (KeyError, TypeError, ValueError) as e:
+            rejected.append(LevelIssue(doc_id, data.get("level") if isinstance(data, dict) else None,
+                                       [ISSUE_FORMAT], f"{type(e).__name__}: {e}"))
+
+
+def file_documents(filename: str) -> Iterator[Tuple[str, Dict]]:
+    """Documentos de un fichero JSONL (salida de los generadores o exportación de Firestore)"""
+    for line, data in enumerate(read_puzzles(filename), 1):
+        doc_id = data.get("id") or (f"level_{data['level']:04d}" if isinstance(data.get("level"), int)
+                                    else f"línea {line}")
+        yield doc_id, data
+
+
+def check_batch(board: Board, levels: List[AuditLevel]) -> List[List[str]]:
+    """Problemas estructurales de cada nivel de un lote que comparte tablero
+
+    Las reglas se evalúan a la vez para todo el lote con NumPy; los niveles
+    cuya forma no encaja (grid de otras dimensiones, solución de otra
+    longitud) se marcan antes de apilar.
+    """
+    rows, cols, n_open = board.rows, board.cols, board.n_open
+    issues: List[List[str]] = [[] for _ in levels]
+
+    stacked = []
+    for i, level in enumerate(levels):
+        try:
+            if len(level.grid) != rows or set(map(len, level.grid)) != {cols}:
+                issues[i].append(ISSUE_FORMAT)
+            elif len(level.solution) != n_open:
+                issues[i].append(ISSUE_COVERAGE)
+            elif set(map(len, level.solution)) != {2}:
+                issues[i].append(ISSUE_FORMAT)
+            else:
+                stacked.append(i)
+        except TypeError:
+            # Filas o celdas que no son listas
+            issues[i].append(ISSUE_FORMAT)
+    if not stacked:
+        return issues
+
+    try:
+        # Filas y celdas ya tienen la longitud justa: se aplanan sin que NumPy revise la forma
+        grids = np.fromiter(chain.from_iterable(chain.from_iterable(levels[i].grid for i in stacked)),
+                            dtype=np.int64, count=len(stacked) * rows * cols).reshape(len(stacked), rows * cols)
+        paths = np.fromiter(chain.from_iterable(chain.from_iterable(levels[i].solution for i in stacked)),
+                            dtype=np.int64, count=len(stacked) * n_open * 2).reshape(len(stacked), n_open, 2)
+    except (TypeError, ValueError):
+        # Algún valor no numérico: se revisan por separado
+        if len(stacked) == 1:
+            issues[stacked[0]].append(ISSUE_FORMAT)
+            return issues
+        half = len(stacked) // 2
+        for part in (stacked[:half], stacked[half:]):
+            for i, found in zip(part, check_batch(board, [levels[i] for i in part])):
+                issues[i].extend(found)
+        return issues
+
+    open_cells = np.zeros(rows * cols, dtype=bool)
+    open_cells[[board.index(cell) for cell in board.open_cells()]] = True
+    open_indices = np.flatnonzero(open_cells)
+
+    x, y = paths[..., 0], paths[..., 1]
+    inside = (x >= 0) & (x < rows) & (y >= 0) & (y < cols)
+    cells = np.where(inside, x * cols + y, 0)
+    cells_ok = (inside & open_cells[cells]).all(axis=1)
+
+    # Pasos de una celda a una vecina, sin atravesar paredes
+    steps = (np.abs(np.diff(x, axis=1)) + np.abs(np.diff(y, axis=1))) == 1
+    if board.walls:
+        walls = np.zeros((rows * cols, rows * cols), dtype=bool)
+        for a, b in board.walls:
+            walls[board.index(a), board.index(b)] = walls[board.index(b), board.index(a)] = True
+        steps &= ~walls[cells[:, :-1], cells[:, 1:]]
+    continuity_ok = steps.all(axis=1)
+
+    # Cada celda abierta exactamente una vez
+    coverage_ok = cells_ok & (np.sort(cells, axis=1) == open_indices).all(axis=1)
+
+    # Números: el k-ésimo que se encuentra en el camino es el k, del 1 (inicio) al último (final)
+    values = np.take_along_axis(grids, cells, axis=1)
+    clues = values > 0
+    last = (grids > 0).sum(axis=1)
+    in_order = np.where(clues, values == np.cumsum(clues, axis=1), True).all(axis=1)
+    grid_ok = np.where(open_cells, grids >= 0, grids == BLOCKED_CELL).all(axis=1)
+    clues_ok = (coverage_ok & grid_ok & in_order & (last >= 2) & (values[:, 0] == 1)
+                & (values[:, -1] == last) & (clues.sum(axis=1) == last))
+
+    for row in np.flatnonzero(~(cells_ok & continuity_ok & clues_ok)):
+        i = stacked[row]
+        if not cells_ok[row]:
+            issues[i].append(ISSUE_CELLS)
+        if not continuity_ok[row]:
+            issues[i].append(ISSUE_CONTINUITY)
+        if cells_ok[row] and not coverage_ok[row]:
+            issues[i].append(ISSUE_COVERAGE)
+        if coverage_ok[row] and not clues_ok[row]:
+            issues[i].append(ISSUE_CLUES)
+    return issues
+
+
+def check_uniqueness(level: AuditLevel, node_budget: int) -> Optional[str]:
+    """Problema de unicidad de un nivel estructuralmente correcto (None si es único)"""
+    board = level.board
+    cells = [board.index(cell) for cell in level.solution]
+    try:
+        solutions = solve_clues(board.rows, clues_from_grid(level.grid), limit=2,
+                                max_nodes=node_budget, board=board)
+    except SolverBudgetExceeded:
+        return ISSUE_UNCHECKED
+    if len(solutions) > 1:
+        return ISSUE_AMBIGUOUS
+    if solutions != [cells]:
+        return ISSUE_SOLVER
+    return None
+
+
+def audit_chunk(levels: List[AuditLevel], node_budget: Optional[int] = AUDIT_NODE_BUDGET) -> List[LevelIssue]:
+    """Audita un lote de niveles (tarea del pool); sin `node_budget` no se mira la unicidad"""
+    by_board: Dict[Board, List[AuditLevel]] = {}
+    for level in levels:
+        by_board.setdefault(level.board, []).append(level)
+
+    found = []
+    for board, group in by_board.items():
+        for level, issues in zip(group, check_batch(board, group)):
+            if not issues and node_budget:
+                issue = check_uniqueness(level, node_budget)
+                issues = [issue] if issue else []
+            if issues:
+                found.append(LevelIssue(level.doc_id, level.level, issues, _describe(level, issues)))
+    return found
+
+
+def _describe(level: AuditLevel, issues: List[str]) -> str:
+    """Detalle legible del primer problema"""
+    board = level.board
+    if ISSUE_FORMAT in issues:
+        if len(level.grid) != board.rows:
+            return f"grid de {len(level.grid)} filas para un tablero {board.rows}x{board.cols}"
+        return "filas del grid, valores o celdas de la solución mal formados"
+    if ISSUE_COVERAGE in issues:
+        if len(level.solution) != board.n_open:
+            return f"solución de {len(level.solution)} celdas para {board.n_open} abiertas"
+        return f"{board.n_open - len(set(map(tuple, level.solution)))} celdas repetidas"
+    if ISSUE_CONTINUITY in issues:
+        for a, b in zip(level.solution, level.solution[1:]):
+            if not board.adjacent(tuple(a), tuple(b)):
+                return f"paso {a} -> {b}"
+    if ISSUE_CLUES in issues:
+        numbers = [level.grid[x][y] for x, y in level.solution if level.grid[x][y] > 0]
+        return f"números en el camino: {numbers[:12]}{'...' if len(numbers) > 12 else ''}"
+    return ""
+
+
+def chunked(levels: Iterable[AuditLevel], size: int) -> Iterator[List[AuditLevel]]:
+    chunk = []
+    for level in levels:
+        chunk.append(level)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def audit_levels(documents: Iterable[Tuple[str, Dict]], workers: int = 1,
+                 chunk_size: int = AUDIT_CHUNK_SIZE,
+                 node_budget: Optional[int] = AUDIT_NODE_BUDGET) -> AuditReport:
+    """Audita todos los documentos (pares id, datos) y devuelve el informe"""
+    began = time.perf_counter()
+    report = AuditReport()
+    rejected: List[LevelIssue] = []
+    chunks = chunked(read_levels(documents, rejected), chunk_size)
+
+    def counted(chunk: List[AuditLevel]) -> List[AuditLevel]:
+        report.audited += len(chunk)
+        return chunk
+
+    if workers <= 1:
+        for chunk in chunks:
+            report.issues.extend(audit_chunk(counted(chunk), node_budget))
+    else:
+        # Ventana acotada de lotes en vuelo: la lectura no se adelanta al pool
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            window = deque()
+            for chunk in chunks:
+                window.append(executor.submit(audit_chunk, counted(chunk), node_budget))
+                if len(window) >= workers * PREFETCH_PER_WORKER:
+                    report.issues.extend(window.popleft().result())
+            while window:
+                report.issues.extend(window.popleft().result())
+
+    report.audited += len(rejected)
+    report.issues.extend(rejected)
+    report.issues.sort(key=lambda issue: (issue.level is None, issue.level or 0, issue.doc_id))
+    report.seconds = time.perf_counter() - began
+    return report
+
+
+def print_audit_report(report: AuditReport, limit: int = 20):
+    """Resumen del informe"""
+    print(f"\n🔎 Niveles auditados: {report.audited} en {report.seconds:.2f} s")
+    if not report.issues:
+        print(f"✅ Ningún nivel corrupto ni ambiguo")
+        return
+
+    for name, count in sorted(report.counts().items()):
+        print(f"   - {name}: {count}")
+    print(f"   ❌ Corruptos: {len(report.corrupt)}, ⚠️  ambiguos: {len(report.ambiguous)}, "
+          f"sin verificar: {len(report.unchecked)}")
+    for issue in report.issues[:limit]:
+        detail = f" ({issue.detail})" if issue.detail else ""
+        print(f"   {issue.doc_id}: {', '.join(issue.issues)}{detail}")
+    if len(report.issues) > limit:
+        print(f"   ... y {len(report.issues) - limit} más (ver --report)")
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Auditoría del catálogo de niveles de PuzzlePath')
+
+    parser.add_argument('--input', type=str,
+                        help='Fichero JSONL a auditar (salida de los generadores o exportación de Firestore)')
+    parser.add_argument('--store', choices=LEVEL_STORES, default=STORE_FIRESTORE,
+                        help='Almacén a auditar si no se da --input: firestore o local (default: firestore)')
+    parser.add_argument('--store-path', type=str,
+                        help='Credenciales de Firebase o fichero SQLite del almacén local')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Procesos para auditar en paralelo (default: todos los núcleos)')
+    parser.add_argument('--chunk-size', type=int, default=AUDIT_CHUNK_SIZE,
+                        help=f'Niveles por lote (default: {AUDIT_CHUNK_SIZE})')
+    parser.add_argument('--node-budget', type=int, default=AUDIT_NODE_BUDGET,
+                        help=f'Nodos del solver por nivel para decidir la unicidad (default: {AUDIT_NODE_BUDGET})')
+    parser.add_argument('--no-uniqueness', action='store_true',
+                        help='Comprobar solo caminos y números, sin el solver')
+    parser.add_argument('--report', type=str, help='Guardar el informe completo en JSON')
+
+    args = parser.parse_args()
+
+    if args.input:
+        print(f"📂 Auditando {args.input}")
+        documents = file_documents(args.input)
+    else:
+        print(f"🔥 Auditando la colección levels ({args.store})")
+        documents = create_store(args.store, args.store_path, snapshot_file=None).stream_levels()
+
+    report = audit_levels(documents, workers=max(1, args.workers), chunk_size=max(1, args.chunk_size),
+                          node_budget=None if args.no_uniqueness else args.node_budget)
+    print_audit_report(report)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report.to_dict(), f, indent=2, ensure_ascii=False)
+        print(f"💾 Informe guardado en: {args.report}")
+
+    # Código 1 si hay niveles corruptos o ambiguos (para CI o tareas programadas)
+    sys.exit(0 if report.ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Reserva atómica de números de nivel
+Un documento contador (`counters/levels`, campo `next`) guarda el siguiente
+número libre. Cada proceso reserva un bloque de números en una transacción y
+luego los reparte localmente sin más viajes a Firestore, así que varios
+generadores pueden trabajar a la vez sobre el mismo proyecto sin pisarse los
+documentos `level_XXXX`.
+
+El juego pide los niveles por número (`level == N`), de modo que un hueco en
+la numeración es un nivel que falta: al terminar, los números no usados del
+último bloque se devuelven si nadie ha reservado después.
+"""
+
+from typing import Optional
+
+from firebase_admin import firestore
+
+COUNTER_COLLECTION = 'counters'
+LEVEL_COUNTER_DOC = 'levels'
+
+
+def first_free_level(db) -> int:
+    """Nivel siguiente al más alto de la colección `levels` (1 si está vacía)"""
+    query = db.collection('levels').order_by('level', direction=firestore.Query.DESCENDING).limit(1)
+    for doc in query.stream():
+        data = doc.to_dict()
+        if 'level' in data:
+            return data['level'] + 1
+    return 1
+
+
+def _counter_ref(db):
+    return db.collection(COUNTER_COLLECTION).document(LEVEL_COUNTER_DOC)
+
+
+def read_next_level(db) -> int:
+    """Siguiente número libre sin reservar nada (para ejecuciones sin subida)"""
+    snapshot = _counter_ref(db).get()
+    if snapshot.exists:
+        return snapshot.get('next')
+    return first_free_level(db)
+
+
+def reserve_level_block(db, count: int) -> int:
+    """Reserva `count` números consecutivos y devuelve el primero
+
+    Si el contador no existe todavía se inicializa con el nivel más alto de
+    la colección; dos procesos que lo creen a la vez entran en conflicto y
+    Firestore reintenta la transacción del segundo.
+    """
+    counter_ref = _counter_ref(db)
+
+    @firestore.transactional
+    def reserve(transaction) -> int:
+        snapshot = counter_ref.get(transaction=transaction)
+        start = snapshot.get('next') if snapshot.exists else first_free_level(db)
+        transaction.set(counter_ref, {'next': start + count, 'updatedAt': firestore.SERVER_TIMESTAMP})
+        return start
+
+    return reserve(db.transaction())
+
+
+def reserve_level_range(db, start: int, count: int) -> int:
+    """Reserva los números [start, start + count) elegidos por el llamador
+
+    Solo si ninguno está ya reservado (el contador no ha pasado de `start`);
+    si no, ValueError. Devuelve el valor que tenía el contador: si es menor
+    que `start`, los números intermedios quedan como hueco.
+    """
+    counter_ref = _counter_ref(db)
+
+    @firestore.transactional
+    def reserve(transaction) -> int:
+        snapshot = counter_ref.get(transaction=transaction)
+        current = snapshot.get('next') if snapshot.exists else first_free_level(db)
+        if start < current:
+            raise ValueError(f"Los niveles desde {start} ya están reservados (el contador va por {current})")
+        transaction.set(counter_ref, {'next': start + count, 'updatedAt': firestore.SERVER_TIMESTAMP})
+        return current
+
+    return reserve(db.transaction())
+
+
+def release_level_block(db, block_end: int, first_unused: int) -> bool:
+    """Devuelve los números [first_unused, block_end) si siguen al final del contador"""
+    counter_ref = _counter_ref(db)
+
+    @firestore.transactional
+    def release(transaction) -> bool:
+        snapshot = counter_ref.get(transaction=transaction)
+        if not snapshot.exists or snapshot.get('next') != block_end:
+            return False
+        transaction.update(counter_ref, {'next': first_unused, 'updatedAt': firestore.SERVER_TIMESTAMP})
+        return True
+
+    return release(db.transaction())
+
+
+class LevelNumberAllocator:
+    """Reparte números de nivel de bloques reservados en el contador del almacén
+
+    `store` es un LevelStore (ver level_store.py). Con `reserve=False`
+    (ejecuciones que no suben nada) solo se lee el contador una vez y los
+    números se cuentan localmente, sin escribir.
+    """
+
+    def __init__(self, store, block_size: int = 1, reserve: bool = True):
+        self.store = store
+        self.block_size = max(1, block_size)
+        self.reserve = reserve
+        self.next: Optional[int] = None
+        self.block_end: Optional[int] = None
+
+    def _ensure_block(self):
+        if self.next is not None and self.next < self.block_end:
+            return
+        if self.reserve:
+            start = self.store.reserve_levels(self.block_size)
+            print(f"🔢 Reservados los niveles {start}-{start + self.block_size - 1}")
+        else:
+            start = self.next if self.next is not None else self.store.read_next_level()
+        self.next = start
+        self.block_end = start + self.block_size
+
+    def claim(self, start: int):
+        """Usa el bloque [start, start + block_size) elegido por el llamador (--start-level)
+
+        Con `reserve` el rango se reserva en el contador: ValueError si
+        otro proceso ya tiene alguno de esos números.
+        """
+        if self.reserve:
+            previous = self.store.reserve_level_range(start, self.block_size)
+            print(f"🔢 Reservados los niveles {start}-{start + self.block_size - 1}")
+            if previous < start:
+                print(f"⚠️  Los niveles {previous}-{start - 1} quedan sin generar")
+        self.next = start
+        self.block_end = start + self.block_size
+
+    def restore(self, next_level: int, block_end: int):
+        """Continúa con un bloque reservado en una ejecución anterior (ver checkpoint.py)"""
+        self.next = next_level
+        self.block_end = block_end
+
+    def peek(self) -> int:
+        """Siguiente número que se entregará (reserva bloque si hace falta)"""
+        self._ensure_block()
+        return self.next
+
+    def next_level(self) -> int:
+        """Entrega el siguiente número del bloque"""
+        self._ensure_block()
+        level = self.next
+        self.next += 1
+        return level
+
+    def release(self) -> bool:
+        """Devuelve los números sin usar del bloque actual (True si no queda hueco)"""
+        if not self.reserve or self.next is None or self.next >= self.block_end:
+            return True
+        released = self.store.release_levels(self.block_end, self.next)
+        if released:
+            self.block_end = self.next
+        else:
+            print(f"⚠️  Niveles {self.next}-{self.block_end - 1} reservados sin usar: "
+                  f"otro proceso reservó después y quedarán huecos")
+        return released
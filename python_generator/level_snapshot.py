@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Copia local (SQLite) de los niveles publicados en Firebase
+Guarda solo lo que necesita el generador (nivel, tamaño, dificultad, números
+y huella canónica) junto con una marca de agua: el `createdAt` más reciente
+sincronizado. Cada arranque pide a Firestore solo los documentos con
+`createdAt` posterior, así que con la caché caliente las lecturas no crecen
+con el número de niveles.
+
+Los documentos borrados en Firestore no se eliminan de la copia; para
+empezar de cero basta con borrar el fichero (o usar `full=True`). Una copia
+con un esquema anterior (SNAPSHOT_VERSION) se vacía al abrirla y se vuelve a
+sincronizar entera.
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+from typing import List, Dict, Optional
+
+from fingerprint import puzzle_fingerprint, grid_from_firestore, solution_from_firestore, walls_from_firestore
+
+# Versión del esquema: al cambiarla las copias antiguas se rehacen
+SNAPSHOT_VERSION = 2
+
+# Fichero por defecto de la copia local
+DEFAULT_SNAPSHOT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "levels.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS levels (
+    doc_id TEXT PRIMARY KEY,
+    level INTEGER NOT NULL,
+    grid_size INTEGER,
+    difficulty TEXT NOT NULL,
+    num_numbers INTEGER NOT NULL,
+    fingerprint TEXT,
+    created_at TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def summarize_level(data: Dict) -> Optional[Dict]:
+    """Campos que usa el generador a partir de un documento de `levels`
+
+    `gridSize` es None en los tableros rectangulares (con `rows` y `cols`).
+    """
+    if 'level' not in data or 'difficulty' not in data or ('gridSize' not in data and 'rows' not in data):
+        return None
+
+    grid_data = data.get('grid') or {}
+    grid = grid_from_firestore(grid_data) if grid_data else []
+    num_numbers = sum(1 for row in grid for cell in row if cell > 0)
+
+    fingerprint = None
+    if grid:
+        # Huella canónica (cubre giros, espejos e inversión del recorrido)
+        fingerprint = puzzle_fingerprint(grid, solution_from_firestore(data.get('solution') or []),
+                                         walls_from_firestore(data.get('board')))
+
+    return {
+        'level': data['level'],
+        'gridSize': data.get('gridSize'),
+        'difficulty': data['difficulty'],
+        'num_numbers': num_numbers,
+        'fingerprint': fingerprint,
+    }
+
+
+class LevelSnapshot:
+    """Copia local incremental de la colección `levels`"""
+
+    def __init__(self, filename: str = DEFAULT_SNAPSHOT_FILE):
+        self.filename = filename
+        if filename != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        self.conn = sqlite3.connect(filename)
+        self.conn.executescript(SCHEMA)
+
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != str(SNAPSHOT_VERSION):
+            # Esquema anterior: empezar de cero (sin marca de agua)
+            self.conn.executescript("DROP TABLE levels; DELETE FROM meta;")
+            self.conn.executescript(SCHEMA)
+            self.conn.execute("INSERT INTO meta VALUES ('version', ?)", (str(SNAPSHOT_VERSION),))
+            self.conn.commit()
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        """`createdAt` más reciente ya sincronizado (None si nunca se sincronizó)"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'watermark'").fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def store(self, doc_id: str, data: Dict) -> bool:
+        """Guarda (o reemplaza) un documento; False si no es un nivel válido"""
+        summary = summarize_level(data)
+        if summary is None:
+            return False
+
+        created_at = data.get('createdAt')
+        self.conn.execute(
+            "INSERT OR REPLACE INTO levels VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (doc_id, summary['level'], summary['gridSize'], summary['difficulty'],
+             summary['num_numbers'], summary['fingerprint'],
+             created_at.isoformat() if isinstance(created_at, datetime) else None))
+        return True
+
+    def refresh(self, db, full: bool = False) -> int:
+        """Trae de Firestore los niveles creados después de la marca de agua
+
+        Basta con `createdAt > marca`: los documentos de un mismo lote
+        comparten timestamp y el lote se hace visible entero de una vez, así
+        que si ya se vio uno se vieron todos. Devuelve los documentos leídos.
+        """
+        levels_ref = db.collection('levels')
+        watermark = None if full else self.watermark
+
+        if watermark is None:
+            # Primera sincronización: todo (también documentos sin createdAt)
+            self.conn.execute("DELETE FROM levels")
+            docs = levels_ref.stream()
+        else:
+            docs = levels_ref.where('createdAt', '>', watermark).stream()
+
+        fetched = 0
+        newest = watermark
+        for doc in docs:
+            data = doc.to_dict()
+            fetched += 1
+            self.store(doc.id, data)
+
+            created_at = data.get('createdAt')
+            if isinstance(created_at, datetime) and (newest is None or created_at > newest):
+                newest = created_at
+
+        if newest is not None:
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('watermark', ?)", (newest.isoformat(),))
+        self.conn.commit()
+        return fetched
+
+    def levels(self) -> List[Dict]:
+        """Niveles guardados, con los campos de summarize_level"""
+        rows = self.conn.execute(
+            "SELECT level, grid_size, difficulty, num_numbers, fingerprint FROM levels ORDER BY level")
+        return [{'level': level, 'gridSize': grid_size, 'difficulty': difficulty,
+                 'num_numbers': num_numbers, 'fingerprint': fingerprint}
+                for level, grid_size, difficulty, num_numbers, fingerprint in rows]
+
+    def close(self):
+        self.conn.close()
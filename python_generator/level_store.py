@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Almacenamiento de niveles
+Los generadores no hablan con Firestore directamente sino con un LevelStore:
+cargar los niveles existentes, reservar números de nivel y escribir niveles
+en bloque. Hay dos implementaciones:
+
+- FirestoreLevelStore: el proyecto de Firebase (producción), con la copia
+  local de level_snapshot.py, el contador de level_counter.py y la subida
+  masiva de bulk_upload.py.
+- LocalLevelStore: un fichero SQLite con los mismos documentos, para probar,
+  medir o perfilar el pipeline completo sin conexión. Con ":memory:" sirve
+  también de almacén vacío (procesos worker, pruebas).
+"""
+
+import os
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import List, Dict, Iterator, Optional, Tuple
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+from level_counter import read_next_level, reserve_level_block, reserve_level_range, release_level_block
+from level_snapshot import LevelSnapshot, summarize_level, DEFAULT_SNAPSHOT_FILE
+from bulk_upload import puzzle_to_firestore, upload_puzzles, UploadReport
+
+# Fichero por defecto del almacén local
+DEFAULT_LOCAL_STORE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "local_store", "levels.sqlite")
+
+# Almacenes disponibles en los CLIs
+STORE_FIRESTORE = "firestore"
+STORE_LOCAL = "local"
+LEVEL_STORES = (STORE_FIRESTORE, STORE_LOCAL)
+
+
+class LevelStore(ABC):
+    """Interfaz común de los almacenes de niveles (un almacén incompleto no se puede instanciar)"""
+
+    @abstractmethod
+    def load_levels(self) -> List[Dict]:
+        """Niveles existentes con los campos de summarize_level"""
+
+    @abstractmethod
+    def stream_levels(self) -> Iterator[Tuple[str, Dict]]:
+        """Documentos completos (id y datos en formato Firestore), uno a uno"""
+
+    @abstractmethod
+    def read_next_level(self) -> int:
+        """Siguiente número de nivel libre, sin reservarlo"""
+
+    @abstractmethod
+    def reserve_levels(self, count: int) -> int:
+        """Reserva `count` números consecutivos de forma atómica y devuelve el primero"""
+
+    @abstractmethod
+    def reserve_level_range(self, start: int, count: int) -> int:
+        """Reserva [start, start + count) si nadie los tiene (ValueError si no); devuelve el contador previo"""
+
+    @abstractmethod
+    def release_levels(self, block_end: int, first_unused: int) -> bool:
+        """Devuelve [first_unused, block_end) si nadie ha reservado después"""
+
+    @abstractmethod
+    def write_levels(self, puzzles: List[Dict]) -> UploadReport:
+        """Escribe (o reemplaza) niveles generados"""
+
+
+class FirestoreLevelStore(LevelStore):
+    """Niveles en la colección `levels` de Firebase"""
+
+    def __init__(self, credentials_file: str = "service-account-key.json",
+                 snapshot_file: Optional[str] = DEFAULT_SNAPSHOT_FILE):
+        # Inicializar Firebase
+        if not firebase_admin._apps:
+            cred = credentials.Certificate(credentials_file)
+            firebase_admin.initialize_app(cred)
+
+        self.db = firestore.client()
+
+        # Copia local de los niveles (None: leer siempre la colección entera)
+        self.snapshot_file = snapshot_file
+
+    def load_levels(self) -> List[Dict]:
+        if self.snapshot_file:
+            snapshot = LevelSnapshot(self.snapshot_file)
+            fetched = snapshot.refresh(self.db)
+            levels = snapshot.levels()
+            snapshot.close()
+            print(f"   - Documentos leídos de Firebase: {fetched}")
+            return levels
+
+        docs = self.db.collection('levels').stream()
+        return [summary for summary in (summarize_level(doc.to_dict()) for doc in docs) if summary]
+
+    def stream_levels(self) -> Iterator[Tuple[str, Dict]]:
+        # La copia local solo guarda resúmenes: aquí se lee la colección entera
+        for doc in self.db.collection('levels').stream():
+            yield doc.id, doc.to_dict()
+
+    def read_next_level(self) -> int:
+        return read_next_level(self.db)
+
+    def reserve_levels(self, count: int) -> int:
+        return reserve_level_block(self.db, count)
+
+    def reserve_level_range(self, start: int, count: int) -> int:
+        return reserve_level_range(self.db, start, count)
+
+    def release_levels(self, block_end: int, first_unused: int) -> bool:
+        return release_level_block(self.db, block_end, first_unused)
+
+    def write_levels(self, puzzles: List[Dict]) -> UploadReport:
+        return upload_puzzles(self.db, puzzles)
+
+
+LOCAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS levels (
+    doc_id TEXT PRIMARY KEY,
+    level INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    next INTEGER NOT NULL
+);
+"""
+
+
+class LocalLevelStore(LevelStore):
+    """Niveles en un fichero SQLite con el mismo formato de documento que Firestore
+
+    La reserva de números usa una transacción `BEGIN IMMEDIATE`, así que
+    varios procesos de la misma máquina pueden compartir el fichero.
+    """
+
+    def __init__(self, filename: str = DEFAULT_LOCAL_STORE_FILE):
+        self.filename = filename
+        if filename != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        self.conn = sqlite3.connect(filename, isolation_level=None)
+        self.conn.executescript(LOCAL_SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        """Transacción con bloqueo de escritura desde el principio"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def load_levels(self) -> List[Dict]:
+        rows = self.conn.execute("SELECT data FROM levels ORDER BY level")
+        return [summary for summary in (summarize_level(json.loads(data)) for data, in rows) if summary]
+
+    def stream_levels(self) -> Iterator[Tuple[str, Dict]]:
+        for doc_id, data in self.conn.execute("SELECT doc_id, data FROM levels ORDER BY level"):
+            yield doc_id, json.loads(data)
+
+    def _next_level(self) -> int:
+        row = self.conn.execute("SELECT next FROM counters WHERE name = 'levels'").fetchone()
+        if row:
+            return row[0]
+        max_level, = self.conn.execute("SELECT MAX(level) FROM levels").fetchone()
+        return (max_level or 0) + 1
+
+    def read_next_level(self) -> int:
+        return self._next_level()
+
+    def reserve_levels(self, count: int) -> int:
+        with self._transaction():
+            start = self._next_level()
+            self.conn.execute("INSERT OR REPLACE INTO counters VALUES ('levels', ?)", (start + count,))
+        return start
+
+    def reserve_level_range(self, start: int, count: int) -> int:
+        with self._transaction():
+            current = self._next_level()
+            if start < current:
+                raise ValueError(f"Los niveles desde {start} ya están reservados (el contador va por {current})")
+            self.conn.execute("INSERT OR REPLACE INTO counters VALUES ('levels', ?)", (start + count,))
+        return current
+
+    def release_levels(self, block_end: int, first_unused: int) -> bool:
+        with self._transaction():
+            released = self._next_level() == block_end
+            if released:
+                self.conn.execute("UPDATE counters SET next = ? WHERE name = 'levels'", (first_unused,))
+        return released
+
+    def write_levels(self, puzzles: List[Dict]) -> UploadReport:
+        created_at = datetime.now(timezone.utc).isoformat()
+        rows = []
+        for puzzle in puzzles:
+            doc_id, data = puzzle_to_firestore(puzzle)
+            data["createdAt"] = created_at
+            rows.append((doc_id, data["level"], json.dumps(data), created_at))
+
+        # Un solo commit para todo el lote
+        with self._transaction():
+            self.conn.executemany("INSERT OR REPLACE INTO levels VALUES (?, ?, ?, ?)", rows)
+        return UploadReport(uploaded=len(rows), commits=1)
+
+
+def create_store(kind: str, path: Optional[str] = None,
+                 snapshot_file: Optional[str] = DEFAULT_SNAPSHOT_FILE) -> LevelStore:
+    """Almacén a partir de las opciones del CLI (`--store` y `--store-path`)"""
+    if kind == STORE_LOCAL:
+        return LocalLevelStore(path or DEFAULT_LOCAL_STORE_FILE)
+    return FirestoreLevelStore(path or "service-account-key.json", snapshot_file)
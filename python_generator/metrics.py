@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Métricas de generación
+Cuenta lo que cuesta cada nivel (nodos expandidos, retrocesos, podas, timeouts,
+reinicios de la búsqueda, duplicados rechazados, intentos, operaciones del
+almacén) y el tiempo de cada etapa (búsqueda de camino, colocación de
+números, control de duplicados, subida). Los datos se agrupan por nivel y por
+bucket (tamaño, números) y se exportan como JSON o como fichero de texto de
+Prometheus (para el textfile collector de node_exporter).
+
+Los contadores se acumulan en diccionarios planos y los tiempos con
+`time.perf_counter`, así que instrumentar el bucle de generación no cuesta
+más que unas sumas por intento.
+"""
+
+import os
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Optional, Tuple
+
+# Contadores que se registran
+COUNTERS = ("nodes", "backtracks", "pruned", "timeouts", "restarts", "duplicates", "attempts", "store_operations",
+            "steered", "ratings", "off_target")
+
+# Etapas cronometradas
+STAGE_PATH_SEARCH = "path_search"
+STAGE_CLUE_PLACEMENT = "clue_placement"
+STAGE_RATING = "rating"
+STAGE_DEDUP = "dedup"
+STAGE_UPLOAD = "upload"
+STAGES = (STAGE_PATH_SEARCH, STAGE_CLUE_PLACEMENT, STAGE_RATING, STAGE_DEDUP, STAGE_UPLOAD)
+
+# Prefijo de las métricas de Prometheus
+PROMETHEUS_PREFIX = "puzzlepath"
+
+COUNTER_HELP = {
+    "nodes": "Nodos expandidos por la búsqueda de caminos",
+    "backtracks": "Retrocesos de la búsqueda de caminos",
+    "pruned": "Nodos de la búsqueda de caminos descartados por poda",
+    "timeouts": "Búsquedas cortadas por presupuesto de nodos",
+    "restarts": "Reinicios de la búsqueda con otro orden o extremos",
+    "duplicates": "Candidatos rechazados por grid duplicado",
+    "attempts": "Candidatos construidos",
+    "store_operations": "Operaciones contra el almacén de niveles",
+    "steered": "Candidatos ajustados hacia la dificultad objetivo",
+    "ratings": "Colocaciones de números valoradas al ajustar la dificultad",
+    "off_target": "Candidatos rechazados por no alcanzar la dificultad objetivo",
+}
+
+
+@dataclass
+class Counters:
+    """Contadores y segundos por etapa"""
+    counts: Dict[str, int] = field(default_factory=dict)
+    seconds: Dict[str, float] = field(default_factory=dict)
+
+    def add(self, name: str, amount: int = 1):
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def add_time(self, stage: str, elapsed: float):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + elapsed
+
+    def get(self, name: str) -> int:
+        return self.counts.get(name, 0)
+
+    def merge(self, other: "Counters"):
+        for name, amount in other.counts.items():
+            self.add(name, amount)
+        for stage, elapsed in other.seconds.items():
+            self.add_time(stage, elapsed)
+
+
+@dataclass
+class LevelMetrics(Counters):
+    """Contadores de un nivel (o de un intento hecho en un worker)"""
+    level: Optional[int] = None
+    size: Optional[int] = None
+    numbers: Optional[int] = None
+    target: Optional[str] = None     # banda de dificultad objetivo (generación dirigida)
+    success: bool = False
+
+
+@dataclass
+class BucketMetrics(Counters):
+    """Contadores agregados de un bucket (tamaño, números) o de una banda objetivo"""
+    levels: int = 0
+    successes: int = 0
+
+
+class GenerationMetrics:
+    """Métricas de una ejecución: totales, por nivel y por bucket
+
+    `count` y `stage` apuntan siempre al nivel en curso (abierto con
+    `start_level`) y a los totales; lo que ocurre fuera de un nivel (carga de
+    niveles existentes, subida) solo cuenta en los totales.
+    """
+
+    def __init__(self, keep_levels: bool = True):
+        self.totals = Counters()
+        self.current = LevelMetrics()
+        self.buckets: Dict[Tuple[int, int], BucketMetrics] = {}
+        self.bands: Dict[str, BucketMetrics] = {}
+        self.keep_levels = keep_levels
+        self.levels: List[LevelMetrics] = []
+
+    def count(self, name: str, amount: int = 1):
+        """Suma `amount` al contador `name`"""
+        self.current.add(name, amount)
+        self.totals.add(name, amount)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Cronometra una etapa"""
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - began
+            self.current.add_time(name, elapsed)
+            self.totals.add_time(name, elapsed)
+
+    def merge(self, other: Counters):
+        """Añade contadores medidos en otro proceso al nivel en curso"""
+        self.current.merge(other)
+        self.totals.merge(other)
+
+    def start_level(self, size: int, numbers: int, level: Optional[int] = None,
+                    target: Optional[str] = None):
+        """Empieza a contar un nivel nuevo"""
+        self.current = LevelMetrics(level=level, size=size, numbers=numbers, target=target)
+
+    def finish_level(self, level: Optional[int], success: bool) -> LevelMetrics:
+        """Cierra el nivel en curso y lo acumula en su bucket"""
+        finished = self.current
+        if level is not None:
+            finished.level = level
+        finished.success = success
+
+        groups = [self.buckets.setdefault((finished.size, finished.numbers), BucketMetrics())]
+        if finished.target is not None:
+            groups.append(self.bands.setdefault(finished.target, BucketMetrics()))
+        for group in groups:
+            group.merge(finished)
+            group.levels += 1
+            group.successes += success
+
+        if self.keep_levels:
+            self.levels.append(finished)
+        self.current = LevelMetrics()
+        return finished
+
+    def to_dict(self) -> Dict:
+        """Todas las métricas en un diccionario serializable"""
+        return {
+            "totals": asdict(self.totals),
+            "buckets": [dict(asdict(bucket), size=size, numbers=numbers)
+                        for (size, numbers), bucket in sorted(self.buckets.items())],
+            "bands": [dict(asdict(band), band=name, acceptance=acceptance_rate(band))
+                      for name, band in sorted(self.bands.items())],
+            "levels": [asdict(level) for level in self.levels],
+        }
+
+    def prometheus_text(self) -> str:
+        """Métricas en el formato de texto de Prometheus"""
+        lines = []
+
+        def family(name: str, help_text: str, kind: str = "counter"):
+            lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} {kind}")
+
+        buckets = sorted(self.buckets.items())
+
+        family("levels_total", "Niveles intentados por bucket y resultado")
+        for (size, numbers), bucket in buckets:
+            for result, value in (("ok", bucket.successes), ("failed", bucket.levels - bucket.successes)):
+                lines.append(f'{PROMETHEUS_PREFIX}_levels_total{{size="{size}",numbers="{numbers}",'
+                             f'result="{result}"}} {value}')
+
+        for name in COUNTERS:
+            family(f"{name}_total", COUNTER_HELP[name])
+            lines.append(f"{PROMETHEUS_PREFIX}_{name}_total {self.totals.get(name)}")
+
+        family("stage_seconds_total", "Segundos por etapa de la generación")
+        for stage in STAGES:
+            lines.append(f'{PROMETHEUS_PREFIX}_stage_seconds_total{{stage="{stage}"}} '
+                         f'{self.totals.seconds.get(stage, 0.0):.6f}')
+
+        family("bucket_nodes_total", "Nodos expandidos por bucket")
+        for (size, numbers), bucket in buckets:
+            lines.append(f'{PROMETHEUS_PREFIX}_bucket_nodes_total{{size="{size}",numbers="{numbers}"}} '
+                         f'{bucket.get("nodes")}')
+
+        family("target_candidates_total", "Candidatos ajustados por banda objetivo y resultado")
+        for name, band in sorted(self.bands.items()):
+            rejected = band.get("off_target")
+            for result, value in (("accepted", band.get("steered") - rejected), ("rejected", rejected)):
+                lines.append(f'{PROMETHEUS_PREFIX}_target_candidates_total{{band="{name}",'
+                             f'result="{result}"}} {value}')
+
+        family("bucket_stage_seconds_total", "Segundos por etapa y bucket")
+        for (size, numbers), bucket in buckets:
+            for stage, elapsed in sorted(bucket.seconds.items()):
+                lines.append(f'{PROMETHEUS_PREFIX}_bucket_stage_seconds_total{{size="{size}",numbers="{numbers}",'
+                             f'stage="{stage}"}} {elapsed:.6f}')
+
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, filename: str):
+        """Guarda las métricas en JSON"""
+        _write_atomic(filename, json.dumps(self.to_dict(), indent=2))
+
+    def write_prometheus(self, filename: str):
+        """Guarda las métricas para el textfile collector (usar extensión .prom)"""
+        _write_atomic(filename, self.prometheus_text())
+
+
+def print_metrics_summary(metrics: GenerationMetrics):
+    """Resumen de las métricas al final de una ejecución"""
+    totals = metrics.totals
+    print(f"   📈 Métricas de generación:")
+    print(f"      Intentos: {totals.get('attempts')}, duplicados: {totals.get('duplicates')}")
+    print(f"      Nodos: {totals.get('nodes')}, retrocesos: {totals.get('backtracks')}, "
+          f"podas: {totals.get('pruned')}, reinicios: {totals.get('restarts')}, timeouts: {totals.get('timeouts')}")
+    for stage in STAGES:
+        if stage in totals.seconds:
+            print(f"      {stage}: {totals.seconds[stage]:.2f} s")
+    for name, band in sorted(metrics.bands.items()):
+        steered = band.get("steered")
+        print(f"      🎯 {name}: {steered - band.get('off_target')}/{steered} candidatos aceptados "
+              f"({acceptance_rate(band):.0%}), {band.get('ratings') / max(1, steered):.1f} valoraciones por candidato")
+
+
+def acceptance_rate(band: Counters) -> float:
+    """Fracción de candidatos que alcanzaron la banda objetivo"""
+    steered = band.get("steered")
+    return (steered - band.get("off_target")) / steered if steered else 0.0
+
+
+def _write_atomic(filename: str, content: str):
+    """Escribe en un temporal y lo renombra: el collector nunca lee un fichero a medias"""
+    directory = os.path.dirname(os.path.abspath(filename))
+    os.makedirs(directory, exist_ok=True)
+    temporary = f"{filename}.tmp"
+    with open(temporary, 'w') as f:
+        f.write(content)
+    os.replace(temporary, filename)
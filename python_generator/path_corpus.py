@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Corpus precalculado de caminos hamiltonianos
+Cada tamaño de grid tiene un fichero binario con caminos ya encontrados; al
+generar un puzzle se elige uno al azar y se le aplica una de las 16 simetrías
+(8 del cuadrado por 2 sentidos de recorrido), así que obtener un camino es
+una consulta O(1) en lugar de una búsqueda.
+
+Formato de `paths_<N>.bin`:
+    cabecera (8 bytes): b"PTHC", versión, tamaño N, 2 bytes reservados
+    registros de tamaño fijo: celda inicial (uint16 big-endian) + N²-1
+    movimientos de 2 bits (4 por byte, el primero en los bits altos)
+
+Cada camino se guarda en su forma canónica (la menor de sus 16 imágenes),
+de modo que el corpus no contiene dos caminos equivalentes por simetría.
+"""
+
+import os
+import mmap
+import random
+import argparse
+from typing import List, Tuple, Optional, Set
+from functools import lru_cache
+
+from path_engine import search_hamiltonian_path, path_node_budget, DEFAULT_DIRECTIONS
+from feasibility import sample_feasible_pair
+from constructive_paths import (generate_backbite_path, ENGINE_BACKTRACKING, ENGINE_BACKBITE,
+                                MAX_SIZE_BY_ENGINE)
+
+Cell = Tuple[int, int]
+
+CORPUS_MAGIC = b"PTHC"
+CORPUS_VERSION = 1
+HEADER_SIZE = 8
+
+# Directorio por defecto de los ficheros del corpus
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+# Código de 2 bits de cada movimiento (orden fijo, independiente del generador)
+MOVE_CODES = {(0, 1): 0, (1, 0): 1, (0, -1): 2, (-1, 0): 3}
+MOVE_DELTAS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+# Intentos seguidos sin camino nuevo tras los que el constructor se rinde
+MAX_BUILD_MISSES = 200
+
+# Simetrías del cuadrado como funciones de (x, y) con m = N - 1
+SYMMETRIES = (
+    lambda x, y, m: (x, y),           # identidad
+    lambda x, y, m: (y, m - x),       # giro 90°
+    lambda x, y, m: (m - x, m - y),   # giro 180°
+    lambda x, y, m: (m - y, x),       # giro 270°
+    lambda x, y, m: (x, m - y),       # espejo horizontal
+    lambda x, y, m: (m - x, y),       # espejo vertical
+    lambda x, y, m: (y, x),           # diagonal
+    lambda x, y, m: (m - y, m - x),   # antidiagonal
+)
+
+# Número de variantes: 8 simetrías x 2 sentidos
+NUM_VARIANTS = 2 * len(SYMMETRIES)
+
+
+def corpus_file(size: int, directory: str = DEFAULT_CORPUS_DIR) -> str:
+    """Ruta del fichero de corpus de un tamaño"""
+    return os.path.join(directory, f"paths_{size}.bin")
+
+
+def record_size(size: int) -> int:
+    """Bytes de cada registro: celda inicial + movimientos empaquetados"""
+    return 2 + (size * size - 1 + 3) // 4
+
+
+def transform_path(path: List[Cell], size: int, variant: int) -> List[Cell]:
+    """Aplica la variante `variant` (0-15): simetría variant % 8, invertido si >= 8"""
+    m = size - 1
+    symmetry = SYMMETRIES[variant % len(SYMMETRIES)]
+    transformed = [symmetry(x, y, m) for x, y in path]
+    if variant >= len(SYMMETRIES):
+        transformed.reverse()
+    return transformed
+
+
+def canonical_path(path: List[Cell], size: int) -> List[Cell]:
+    """Representante canónico: la menor de las 16 imágenes del camino"""
+    return min(transform_path(path, size, v) for v in range(NUM_VARIANTS))
+
+
+def encode_path(path: List[Cell], size: int) -> bytes:
+    """Codifica un camino como celda inicial + movimientos de 2 bits"""
+    x0, y0 = path[0]
+    data = bytearray((x0 * size + y0).to_bytes(2, "big"))
+    data.extend(bytes(record_size(size) - 2))
+    for i, ((x1, y1), (x2, y2)) in enumerate(zip(path, path[1:])):
+        code = MOVE_CODES[(x2 - x1, y2 - y1)]
+        data[2 + i // 4] |= code << (6 - 2 * (i % 4))
+    return bytes(data)
+
+
+def decode_path(record: bytes, size: int) -> List[Cell]:
+    """Inverso de encode_path"""
+    x, y = divmod(int.from_bytes(record[:2], "big"), size)
+    path = [(x, y)]
+    for i in range(size * size - 1):
+        dx, dy = MOVE_DELTAS[record[2 + i // 4] >> (6 - 2 * (i % 4)) & 3]
+        x += dx
+        y += dy
+        path.append((x, y))
+    return path
+
+
+def _check_header(header: bytes, size: int, filename: str):
+    """Valida la cabecera de un fichero de corpus"""
+    if header[:4] != CORPUS_MAGIC or header[4] != CORPUS_VERSION or header[5] != size:
+        raise ValueError(f"{filename} no es un corpus v{CORPUS_VERSION} de {size}x{size}")
+
+
+class PathCorpus:
+    """Corpus de un tamaño, mapeado en memoria (solo lectura)"""
+
+    def __init__(self, size: int, filename: str):
+        self.size = size
+        self.filename = filename
+        self.record_size = record_size(size)
+
+        with open(filename, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _check_header(self._map[:HEADER_SIZE], size, filename)
+        self.count = (len(self._map) - HEADER_SIZE) // self.record_size
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get_path(self, index: int) -> List[Cell]:
+        """Camino canónico número `index`"""
+        offset = HEADER_SIZE + index * self.record_size
+        return decode_path(self._map[offset:offset + self.record_size], self.size)
+
+    def sample_path(self, rng=random) -> List[Cell]:
+        """Camino al azar con una simetría y un sentido al azar"""
+        path = self.get_path(rng.randrange(self.count))
+        return transform_path(path, self.size, rng.randrange(NUM_VARIANTS))
+
+
+@lru_cache(maxsize=None)
+def load_corpus(size: int, directory: str = DEFAULT_CORPUS_DIR) -> Optional[PathCorpus]:
+    """Corpus de un tamaño (mapeado una sola vez por proceso), o None si no hay"""
+    filename = corpus_file(size, directory)
+    if not os.path.exists(filename):
+        return None
+    corpus = PathCorpus(size, filename)
+    return corpus if len(corpus) else None
+
+
+def sample_corpus_path(size: int, rng=random, directory: str = DEFAULT_CORPUS_DIR) -> Optional[List[Cell]]:
+    """Camino al azar del corpus de `size` (None si no hay corpus para ese tamaño)"""
+    corpus = load_corpus(size, directory)
+    return corpus.sample_path(rng) if corpus else None
+
+
+def read_records(size: int, filename: str) -> Set[bytes]:
+    """Registros ya guardados en un fichero de corpus"""
+    rsize = record_size(size)
+    with open(filename, "rb") as f:
+        _check_header(f.read(HEADER_SIZE), size, filename)
+        data = f.read()
+    return {data[i:i + rsize] for i in range(0, len(data) - rsize + 1, rsize)}
+
+
+def _random_search_path(size: int, rng, node_budget: int) -> Optional[List[Cell]]:
+    """Camino por búsqueda con extremos y orden de direcciones al azar
+
+    La búsqueda se corta tras `node_budget` nodos y devuelve None: en 8x8 hay pares
+    que siguen sin resolverse tras millones de nodos.
+    """
+    start, end = sample_feasible_pair(size, rng)
+    directions = list(DEFAULT_DIRECTIONS)
+    rng.shuffle(directions)
+    return search_hamiltonian_path(size, start, end, directions, max_nodes=node_budget)
+
+
+def build_corpus(size: int, count: int, directory: str = DEFAULT_CORPUS_DIR,
+                 engine: str = ENGINE_BACKBITE, rng=random, node_budget: Optional[int] = None) -> int:
+    """Añade hasta `count` caminos nuevos al corpus de `size` (incremental)
+
+    Los caminos que ya estaban (o alguna de sus simetrías) no se repiten. En
+    grids pequeños hay pocos caminos distintos, así que se para tras
+    MAX_BUILD_MISSES intentos seguidos sin novedades; con backtracking, una
+    búsqueda que agota `node_budget` nodos (por defecto path_node_budget)
+    cuenta también como intento fallido. Devuelve los añadidos.
+    """
+    if node_budget is None:
+        node_budget = path_node_budget(size)
+    filename = corpus_file(size, directory)
+    os.makedirs(directory, exist_ok=True)
+
+    if os.path.exists(filename):
+        known = read_records(size, filename)
+    else:
+        known = set()
+        with open(filename, "wb") as f:
+            f.write(CORPUS_MAGIC + bytes([CORPUS_VERSION, size, 0, 0]))
+
+    added = 0
+    misses = 0
+
+    with open(filename, "ab") as f:
+        while added < count and misses < MAX_BUILD_MISSES:
+            if engine == ENGINE_BACKBITE:
+                path = generate_backbite_path(size, rng=rng)
+            else:
+                path = _random_search_path(size, rng, node_budget)
+            if not path:
+                misses += 1
+                continue
+
+            record = encode_path(canonical_path(path, size), size)
+            if record in known:
+                misses += 1
+                continue
+
+            f.write(record)
+            known.add(record)
+            added += 1
+            misses = 0
+
+    # Un corpus abierto antes de añadir caminos no vería los nuevos registros
+    load_corpus.cache_clear()
+    return added
+
+
+def main():
+    """Construye o amplía el corpus de caminos"""
+    parser = argparse.ArgumentParser(description='Constructor del corpus de caminos para PuzzlePath')
+
+    parser.add_argument('--sizes', type=int, nargs='+', default=[4, 5, 6, 7],
+                       help='Tamaños de grid (default: 4 5 6 7)')
+    parser.add_argument('--count', type=int, default=1000,
+                       help='Caminos nuevos por tamaño (default: 1000)')
+    parser.add_argument('--dir', type=str, default=DEFAULT_CORPUS_DIR,
+                       help='Directorio del corpus (default: corpus/)')
+    parser.add_argument('--engine', choices=(ENGINE_BACKTRACKING, ENGINE_BACKBITE), default=ENGINE_BACKBITE,
+                       help='Motor con el que se buscan los caminos (default: backbite)')
+    parser.add_argument('--seed', type=int, help='Semilla para reproducibilidad')
+
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"📚 Constructor del corpus de caminos")
+
+    for size in args.sizes:
+        if size < 3 or size > MAX_SIZE_BY_ENGINE[args.engine]:
+            print(f"❌ Tamaño inválido: {size} (debe ser entre 3 y {MAX_SIZE_BY_ENGINE[args.engine]})")
+            continue
+
+        added = build_corpus(size, args.count, args.dir, args.engine, rng)
+        total = len(read_records(size, corpus_file(size, args.dir)))
+        print(f"✅ {size}x{size}: {added} caminos nuevos ({total} en total)")
+
+
+if __name__ == "__main__":
+    main()
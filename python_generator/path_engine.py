@@ -0,0 +1,688 @@
+#!/usr/bin/env python3
+"""
+Motor de búsqueda de caminos hamiltonianos basado en bitboards
+Representa el grid como una máscara de bits (una celda = un bit) y usa tablas
+precalculadas por tamaño (vecinos, grados, penalizaciones) para que cada nodo
+de la búsqueda sea O(1) sin sets de tuplas ni closures por nivel.
+
+La búsqueda poda en cada paso lo que ya no puede acabar en camino: celdas
+libres que se quedan con un solo vecino (hay que ir ya) o ninguno, el final
+aislado o alcanzado antes de tiempo, y celdas libres partidas en dos
+regiones (ver HamiltonianSearch).
+"""
+
+import time
+import random
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple, Optional, Sequence
+from dataclasses import dataclass
+
+Cell = Tuple[int, int]
+Direction = Tuple[int, int]
+
+# Orden por defecto de los generadores: derecha, abajo, izquierda, arriba
+DEFAULT_DIRECTIONS: Tuple[Direction, ...] = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+# Cada cuántos nodos se consulta el reloj cuando hay deadline
+DEADLINE_CHECK_INTERVAL = 1024
+
+# Nodos por segundo de referencia para convertir los timeouts en presupuestos
+NOMINAL_NODES_PER_SECOND = 400000
+
+# Calendarios de reinicio: nodos de cada intento antes de reiniciar la
+# búsqueda con otro orden de direcciones y otros extremos
+RESTART_LUBY = "luby"            # unidad × 1 1 2 1 1 2 4 1 1 2 ...
+RESTART_GEOMETRIC = "geometric"  # unidad × 1, 1.5, 2.25, ...
+RESTART_NONE = "none"            # cada intento hasta agotar el presupuesto
+RESTART_SCHEDULES = (RESTART_LUBY, RESTART_GEOMETRIC, RESTART_NONE)
+
+# Unidad del calendario por celda del grid y razón del geométrico
+RESTART_UNIT_PER_CELL = 8
+GEOMETRIC_FACTOR = 1.5
+
+# Estrategias de búsqueda (ver SearchStrategy)
+STRATEGY_WARNSDORFF = "warnsdorff"   # solo grado libre
+STRATEGY_HEURISTIC = "heuristic"     # grado + penalización de esquinas y bordes (HEURISTIC_WEIGHTS)
+STRATEGY_RANDOMIZED = "randomized"   # Warnsdorff con empates al azar
+STRATEGY_BEAM = "beam"               # Warnsdorff probando solo los 2 mejores vecinos
+
+
+class PenaltyWeights(NamedTuple):
+    """Penalización estática de una celda de esquina, de borde y por distancia al centro"""
+    corner: int
+    edge: int
+    center: int
+
+
+# Pesos de la heurística: los de HamiltonianSearch, la estrategia `heuristic`
+# y el corpus (las versiones anteriores del generador semanal usaban 5/2/1)
+HEURISTIC_WEIGHTS = PenaltyWeights(corner=2, edge=1, center=0)
+
+
+@dataclass
+class GridTables:
+    """Tablas precalculadas para un grid NxN (celda i = x * size + y)"""
+    size: int
+    n_cells: int
+    full_mask: int
+    neighbor_masks: Tuple[int, ...]
+    degrees: Tuple[int, ...]
+    is_corner: Tuple[bool, ...]
+    is_edge: Tuple[bool, ...]
+    center_distance: Tuple[int, ...]
+    not_first_col: int         # máscara sin la columna 0 (desplazamientos a la derecha)
+    not_last_col: int          # máscara sin la última columna (desplazamientos a la izquierda)
+    window_masks: Tuple[int, ...]  # celdas válidas de la ventana 3x3 de cada celda (9 bits)
+
+
+@dataclass
+class SearchStats:
+    """Contadores de una búsqueda (acumulables entre intentos)"""
+    nodes: int = 0
+    backtracks: int = 0
+    pruned: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def path_node_budget(size: int) -> int:
+    """Nodos como mucho para encontrar un camino de `size`x`size`
+
+    Sale de los timeouts originales (5 s en 4x4 ... 25 s en 8x8) a un ritmo
+    nominal fijo, para que el resultado no dependa de la carga de la máquina.
+    """
+    timeout = 5 if size <= 4 else (10 if size <= 5 else (15 if size <= 6 else (20 if size <= 7 else 25)))
+    return timeout * NOMINAL_NODES_PER_SECOND
+
+
+def luby(i: int) -> int:
+    """Término i-ésimo (desde 1) de la secuencia de Luby"""
+    while True:
+        k = i.bit_length()
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+
+
+def restart_limits(schedule: str, size: int) -> Iterator[Optional[int]]:
+    """Nodos de cada intento según el calendario (None: sin corte)
+
+    La búsqueda tiene una cola muy pesada: la mayoría de órdenes y extremos
+    dan camino en pocos miles de nodos y unos pocos se pierden en millones.
+    Cortar pronto y reiniciar acota esa cola; Luby es óptimo (salvo un
+    factor logarítmico) sin conocer la distribución.
+    """
+    unit = RESTART_UNIT_PER_CELL * size * size
+    i = 1
+    while True:
+        if schedule == RESTART_LUBY:
+            yield unit * luby(i)
+        elif schedule == RESTART_GEOMETRIC:
+            yield int(unit * GEOMETRIC_FACTOR ** (i - 1))
+        else:
+            yield None
+        i += 1
+
+
+def cell_index(size: int, cell: Cell) -> int:
+    """Convierte (x, y) en el índice de bit"""
+    return cell[0] * size + cell[1]
+
+
+def index_cell(size: int, index: int) -> Cell:
+    """Convierte un índice de bit en (x, y)"""
+    return divmod(index, size)
+
+
+@lru_cache(maxsize=None)
+def get_grid_tables(size: int) -> GridTables:
+    """Calcula (una vez por tamaño) las máscaras de vecinos y tablas de grado"""
+    n_cells = size * size
+    neighbor_masks = []
+    degrees = []
+    is_corner = []
+    is_edge = []
+    center_distance = []
+    window_masks = []
+    center = size // 2
+    not_first_col = 0
+    not_last_col = 0
+
+    for x in range(size):
+        for y in range(size):
+            mask = 0
+            for dx, dy in DEFAULT_DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < size and 0 <= ny < size:
+                    mask |= 1 << (nx * size + ny)
+            neighbor_masks.append(mask)
+            degrees.append(bin(mask).count("1"))
+
+            border_x = x in (0, size - 1)
+            border_y = y in (0, size - 1)
+            is_corner.append(border_x and border_y)
+            is_edge.append(border_x or border_y)
+            center_distance.append(abs(x - center) + abs(y - center))
+
+            if y > 0:
+                not_first_col |= 1 << (x * size + y)
+            if y < size - 1:
+                not_last_col |= 1 << (x * size + y)
+            window = 0
+            for r in range(3):
+                for c in range(3):
+                    if 0 <= x + r - 1 < size and 0 <= y + c - 1 < size:
+                        window |= 1 << (r * 3 + c)
+            window_masks.append(window)
+
+    return GridTables(
+        size=size,
+        n_cells=n_cells,
+        full_mask=(1 << n_cells) - 1,
+        neighbor_masks=tuple(neighbor_masks),
+        degrees=tuple(degrees),
+        is_corner=tuple(is_corner),
+        is_edge=tuple(is_edge),
+        center_distance=tuple(center_distance),
+        not_first_col=not_first_col,
+        not_last_col=not_last_col,
+        window_masks=tuple(window_masks),
+    )
+
+
+def _ring_splits(window: int) -> bool:
+    """¿Pueden quedar separados los vecinos libres de la celda central de una ventana 3x3?
+
+    Los vecinos ortogonales libres (bits 1, 5, 7, 3 en orden circular) están
+    unidos sin pasar por el centro si la diagonal entre dos consecutivos
+    también está libre. Si forman un solo grupo, quitar el centro no puede
+    partir la región libre; si forman varios, hace falta un flood fill.
+    """
+    orthogonal = [window >> bit & 1 for bit in (1, 5, 7, 3)]
+    diagonal = [window >> bit & 1 for bit in (2, 8, 6, 0)]
+    links = sum(orthogonal[k] & orthogonal[(k + 1) % 4] & diagonal[k] for k in range(4))
+    return sum(orthogonal) - links >= 2
+
+
+# Para cada patrón de la ventana 3x3, si quitar el centro puede desconectar
+RING_SPLITS: Tuple[bool, ...] = tuple(_ring_splits(window) for window in range(512))
+
+
+def neighbors_connected(seeds: int, region: int, tables: GridTables) -> bool:
+    """¿Están todas las celdas de `seeds` en la misma componente de `region`?
+
+    Flood fill sobre bitboard desde la primera semilla: cada vuelta crece una
+    celda en las cuatro direcciones a la vez y para en cuanto alcanza todas
+    las semillas (normalmente mucho antes de recorrer la región entera).
+    """
+    size = tables.size
+    not_first_col = tables.not_first_col
+    not_last_col = tables.not_last_col
+    reach = seeds & -seeds
+    while True:
+        grown = (reach | ((reach << 1) & not_first_col) | ((reach >> 1) & not_last_col)
+                 | (reach << size) | (reach >> size)) & region
+        if grown & seeds == seeds:
+            return True
+        if grown == reach:
+            return False
+        reach = grown
+
+
+@lru_cache(maxsize=None)
+def get_neighbor_order(size: int, directions: Tuple[Direction, ...]) -> Tuple[Tuple[int, ...], ...]:
+    """Lista de vecinos de cada celda en el orden de `directions`
+
+    Solo hay 24 permutaciones de las 4 direcciones, así que la cache es pequeña.
+    """
+    order = []
+    for x in range(size):
+        for y in range(size):
+            cells = []
+            for dx, dy in directions:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < size and 0 <= ny < size:
+                    cells.append(nx * size + ny)
+            order.append(tuple(cells))
+    return tuple(order)
+
+
+@lru_cache(maxsize=None)
+def get_penalty_table(size: int, corner_penalty: int, edge_penalty: int,
+                      center_weight: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """Penalizaciones estáticas de la heurística por celda
+
+    Devuelve (penalización normal, penalización si la celda es el final): las
+    esquinas y bordes no se penalizan cuando la celda es el punto final.
+    """
+    tables = get_grid_tables(size)
+    penalties = []
+    end_penalties = []
+
+    for i in range(tables.n_cells):
+        center = center_weight * tables.center_distance[i]
+        if tables.is_corner[i]:
+            border = corner_penalty
+        elif tables.is_edge[i]:
+            border = edge_penalty
+        else:
+            border = 0
+        penalties.append(border + center)
+        end_penalties.append(center)
+
+    return tuple(penalties), tuple(end_penalties)
+
+
+@dataclass(frozen=True)
+class SearchStrategy:
+    """Cómo ordena (y recorta) los vecinos la búsqueda de caminos
+
+    Los vecinos libres se prueban por grado libre (regla de Warnsdorff) más
+    una penalización estática por celda (esquinas, bordes y distancia al
+    centro). Con `randomized` los empates se deshacen con un orden de celdas
+    al azar, distinto en cada búsqueda; con `beam_width` solo se prueban los mejores vecinos de cada
+    nodo, lo que hace la búsqueda incompleta (un fallo no prueba que no haya
+    camino: cuenta con los reinicios).
+    """
+    name: str
+    corner_penalty: int = 0
+    edge_penalty: int = 0
+    center_weight: int = 0
+    randomized: bool = False
+    beam_width: Optional[int] = None
+
+    def new_search(self, size: int, start: Cell, end: Cell, rng: random.Random,
+                   directions: Sequence[Direction] = DEFAULT_DIRECTIONS) -> "HamiltonianSearch":
+        """Búsqueda de `start` a `end` con esta estrategia
+
+        `rng` es obligatorio: el desempate al azar de `randomized` tiene que
+        salir de la semilla del intento, no del `random` global.
+        """
+        tiebreak = None
+        if self.randomized:
+            tiebreak = list(range(size * size))
+            rng.shuffle(tiebreak)
+        return HamiltonianSearch(size, start, end, directions,
+                                 corner_penalty=self.corner_penalty, edge_penalty=self.edge_penalty,
+                                 center_weight=self.center_weight,
+                                 tiebreak=tiebreak,
+                                 beam_width=self.beam_width)
+
+
+SEARCH_STRATEGIES: Dict[str, SearchStrategy] = {
+    STRATEGY_WARNSDORFF: SearchStrategy(STRATEGY_WARNSDORFF),
+    STRATEGY_HEURISTIC: SearchStrategy(STRATEGY_HEURISTIC, corner_penalty=HEURISTIC_WEIGHTS.corner,
+                                       edge_penalty=HEURISTIC_WEIGHTS.edge, center_weight=HEURISTIC_WEIGHTS.center),
+    STRATEGY_RANDOMIZED: SearchStrategy(STRATEGY_RANDOMIZED, randomized=True),
+    STRATEGY_BEAM: SearchStrategy(STRATEGY_BEAM, beam_width=2),
+}
+
+# Estrategia por defecto en todos los tamaños: la búsqueda completa con la
+# heurística. `beam` (incompleta) y las demás solo se usan con --strategy
+DEFAULT_STRATEGY = STRATEGY_HEURISTIC
+
+
+def parse_strategy_option(values: Iterable[str]) -> Dict[Optional[int], str]:
+    """Interpreta `--strategy`: NOMBRE (todos los tamaños) o TAMAÑO=NOMBRE"""
+    overrides: Dict[Optional[int], str] = {}
+    for value in values:
+        size, _, name = value.rpartition("=")
+        if name not in SEARCH_STRATEGIES:
+            raise ValueError(f"Estrategia desconocida: {name} (opciones: {', '.join(SEARCH_STRATEGIES)})")
+        overrides[int(size) if size else None] = name
+    return overrides
+
+
+def format_strategy_option(overrides: Dict[Optional[int], str]) -> List[str]:
+    """Inverso de parse_strategy_option (para guardarlo en el diario)"""
+    return [name if size is None else f"{size}={name}" for size, name in overrides.items()]
+
+
+def strategy_for_size(size: int, overrides: Optional[Dict[Optional[int], str]] = None) -> SearchStrategy:
+    """Estrategia de un tamaño: la indicada para él, la indicada para todos o la de por defecto"""
+    overrides = overrides or {}
+    name = overrides.get(size, overrides.get(None, DEFAULT_STRATEGY))
+    return SEARCH_STRATEGIES[name]
+
+
+def flood_adjacency(seeds: int, region: int, neighbor_masks: Sequence[int]) -> int:
+    """Celdas de `region` alcanzables desde `seeds` con una adyacencia cualquiera"""
+    reach = seeds & region
+    frontier = reach
+    while frontier:
+        grown = 0
+        while frontier:
+            low = frontier & -frontier
+            frontier ^= low
+            grown |= neighbor_masks[low.bit_length() - 1]
+        frontier = grown & region & ~reach
+        reach |= frontier
+    return reach
+
+
+def adjacency_connected(seeds: int, region: int, neighbor_masks: Sequence[int]) -> bool:
+    """Como neighbors_connected, con una adyacencia cualquiera (para en cuanto alcanza las semillas)"""
+    reach = seeds & -seeds
+    frontier = reach
+    while frontier:
+        grown = 0
+        while frontier:
+            low = frontier & -frontier
+            frontier ^= low
+            grown |= neighbor_masks[low.bit_length() - 1]
+        frontier = grown & region & ~reach
+        reach |= frontier
+        if reach & seeds == seeds:
+            return True
+    return reach & seeds == seeds
+
+
+class HamiltonianSearch:
+    """Búsqueda iterativa con pila explícita, suspendible y reanudable
+
+    La pila vive en arrays preasignados: `path[d]` es la celda a profundidad d
+    y sus candidatos ordenados ocupan `candidates[4*d : 4*d + cand_count[d]]`,
+    con `cand_next[d]` apuntando al siguiente por probar (-1 = aún sin
+    expandir). Como todo el estado está en el objeto, `run()` puede parar por
+    presupuesto de nodos o deadline y continuar después donde lo dejó, y no hay
+    límite de recursión de Python.
+
+    `tiebreak` (un rango por celda) deshace los empates de la heurística en
+    vez del orden de `directions`; `beam_width` limita los vecinos que se
+    prueban en cada nodo (ver SearchStrategy).
+
+    Con `prune` (por defecto) cada nodo comprueba, antes de ordenar sus
+    vecinos, que el resto del camino aún sea posible, mirando solo lo que ha
+    cambiado al visitar la celda actual:
+
+    - Un vecino libre que se queda sin vecinos libres es un callejón: poda.
+      Si se queda con uno, hay que ir a él ahora (movimiento forzado); si hay
+      dos así, poda.
+    - El final no se visita antes de la última celda y debe conservar algún
+      vecino libre.
+    - Si los vecinos libres de la celda actual no quedan unidos alrededor de
+      ella (tabla RING_SPLITS sobre su ventana 3x3), un flood fill comprueba
+      que las celdas libres sigan en una sola región.
+
+    Solo se descartan subárboles sin ningún camino, así que sin corte por
+    presupuesto el camino encontrado es el mismo que sin poda.
+    """
+
+    FOUND = "found"
+    EXHAUSTED = "exhausted"
+    SUSPENDED = "suspended"
+
+    def __init__(self, size: int, start: Cell, end: Cell,
+                 directions: Sequence[Direction] = DEFAULT_DIRECTIONS,
+                 corner_penalty: int = HEURISTIC_WEIGHTS.corner, edge_penalty: int = HEURISTIC_WEIGHTS.edge,
+                 center_weight: int = HEURISTIC_WEIGHTS.center, tiebreak: Optional[Sequence[int]] = None,
+                 beam_width: Optional[int] = None, prune: bool = True):
+        tables = get_grid_tables(size)
+        penalties, end_penalties = get_penalty_table(size, corner_penalty, edge_penalty, center_weight)
+
+        self.size = size
+        self.tables = tables
+        self.window_masks = tables.window_masks
+        self.start = start
+        self.end = end
+        self.order = get_neighbor_order(size, tuple(directions))
+        self.start_idx = cell_index(size, start)
+        self.end_idx = cell_index(size, end)
+
+        penalty = list(penalties)
+        penalty[self.end_idx] = end_penalties[self.end_idx]
+        self._init_state(tables.degrees, tables.neighbor_masks, tables.full_mask, penalty,
+                         tiebreak, beam_width, prune)
+
+    @classmethod
+    def on_adjacency(cls, order: Sequence[Sequence[int]], cells_mask: int, width: int,
+                     start: Cell, end: Cell, tiebreak: Optional[Sequence[int]] = None,
+                     beam_width: Optional[int] = None, prune: bool = True) -> "HamiltonianSearch":
+        """Búsqueda sobre una adyacencia cualquiera (tableros con paredes o huecos, ver board.py)
+
+        `order[i]` son los vecinos de la celda i = x * width + y en el orden en
+        que se prueban y `cells_mask` las celdas que hay que recorrer. Sin
+        penalizaciones de borde, y la conexión se comprueba con un flood fill
+        sobre la adyacencia en vez de con la ventana 3x3 del grid.
+        """
+        search = cls.__new__(cls)
+        search.size = width
+        search.tables = None
+        search.window_masks = None
+        search.start = start
+        search.end = end
+        search.order = order
+        search.start_idx = start[0] * width + start[1]
+        search.end_idx = end[0] * width + end[1]
+        neighbor_masks = [sum(1 << n for n in neighbors) for neighbors in order]
+        degrees = [len(neighbors) for neighbors in order]
+        search._init_state(degrees, neighbor_masks, cells_mask, [0] * len(order), tiebreak, beam_width, prune)
+        return search
+
+    def _init_state(self, degrees: Sequence[int], neighbor_masks: Sequence[int], cells_mask: int,
+                    penalty: List[int], tiebreak: Optional[Sequence[int]], beam_width: Optional[int],
+                    prune: bool):
+        """Estado inicial común: grados, celdas libres y pila preasignada"""
+        n_total = len(penalty)
+        n_cells = bin(cells_mask).count("1")
+        self.n_cells = n_cells
+        self.neighbor_masks = neighbor_masks
+        self.prune = prune
+
+        # Con desempate propio, la clave es (grado + penalización) * celdas + rango
+        self.penalty = penalty
+        self.scale = 1
+        if tiebreak is not None:
+            self.scale = n_total
+            self.penalty = [p * n_total + t for p, t in zip(penalty, tiebreak)]
+        self.beam_width = beam_width or 4
+
+        # Grado libre de cada celda (vecinos aún no visitados)
+        self.degree = list(degrees)
+        for n in self.order[self.start_idx]:
+            self.degree[n] -= 1
+        self.free = cells_mask & ~(1 << self.start_idx)
+
+        # Pila preasignada
+        self.path = [0] * n_cells
+        self.candidates = [0] * (4 * n_cells)
+        self.cand_count = [0] * n_cells
+        self.cand_next = [-1] * n_cells
+        self.path[0] = self.start_idx
+        self.depth = 1
+
+        self.nodes = 0
+        self.backtracks = 0
+        self.pruned = 0
+        self.status: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.FOUND, self.EXHAUSTED)
+
+    def run(self, max_nodes: Optional[int] = None, deadline: Optional[float] = None) -> str:
+        """Avanza la búsqueda hasta encontrar camino, agotarla o suspenderse
+
+        `max_nodes` limita los nodos expandidos en esta llamada; `deadline` es
+        un instante de `time.time()` consultado cada DEADLINE_CHECK_INTERVAL
+        nodos. Devuelve FOUND, EXHAUSTED o SUSPENDED.
+        """
+        if self.finished:
+            return self.status
+
+        order = self.order
+        degree = self.degree
+        penalty = self.penalty
+        scale = self.scale
+        beam_width = self.beam_width
+        path = self.path
+        candidates = self.candidates
+        cand_count = self.cand_count
+        cand_next = self.cand_next
+        n_cells = self.n_cells
+        end_idx = self.end_idx
+        free = self.free
+        depth = self.depth
+        nodes = self.nodes
+        backtracks = self.backtracks
+        pruned = self.pruned
+
+        prune = self.prune
+        tables = self.tables
+        size = self.size
+        neighbor_masks = self.neighbor_masks
+        window_masks = self.window_masks
+        ring_splits = RING_SPLITS
+        not_end = ~(1 << end_idx)
+        window_shift = size + 1
+        node_limit = nodes + max_nodes if max_nodes is not None else None
+        status = self.SUSPENDED
+
+        while True:
+            top = depth - 1
+            current = path[top]
+
+            if cand_next[top] < 0:
+                # Entrar en un nodo nuevo (punto de suspensión seguro)
+                if node_limit is not None and nodes >= node_limit:
+                    break
+                if deadline is not None and (nodes + 1) % DEADLINE_CHECK_INTERVAL == 0 and time.time() > deadline:
+                    break
+                nodes += 1
+
+                if depth == n_cells:
+                    if current == end_idx:
+                        status = self.FOUND
+                        break
+                    cand_count[top] = 0
+                else:
+                    count = 0
+                    forced = -1
+                    available = free
+                    if prune:
+                        available = free & not_end
+                        viable = True
+                        if depth == n_cells - 1:
+                            # Solo queda el final
+                            available = 0
+                            if neighbor_masks[current] >> end_idx & 1:
+                                forced = end_idx
+                        elif degree[end_idx] == 0:
+                            viable = False
+                        else:
+                            for m in order[current]:
+                                if available >> m & 1 and degree[m] < 2:
+                                    if degree[m] == 0 or forced >= 0:
+                                        viable = False
+                                        break
+                                    forced = m
+                            if viable and window_masks is not None:
+                                shifted = free << window_shift
+                                window = (((shifted >> current) & 7) | (((shifted >> (current + size)) & 7) << 3)
+                                          | (((shifted >> (current + 2 * size)) & 7) << 6)) & window_masks[current]
+                                if ring_splits[window] and not neighbors_connected(neighbor_masks[current] & free,
+                                                                                   free, tables):
+                                    viable = False
+                            elif viable:
+                                # Sin geometría de grid: flood fill si quedan dos o más vecinos libres
+                                seeds = neighbor_masks[current] & free
+                                if seeds & (seeds - 1) and not adjacency_connected(seeds, free, neighbor_masks):
+                                    viable = False
+                        if not viable:
+                            pruned += 1
+                            available = 0
+                            forced = -1
+
+                    if forced >= 0:
+                        candidates[4 * top] = forced
+                        count = 1
+                    elif available:
+                        if scale == 1:
+                            ranked = [(degree[n] + penalty[n], k, n) for k, n in enumerate(order[current]) if available >> n & 1]
+                        else:
+                            ranked = [(degree[n] * scale + penalty[n], k, n) for k, n in enumerate(order[current]) if available >> n & 1]
+                        count = len(ranked)
+                        if count > 1:
+                            ranked.sort()
+                            if count > beam_width:
+                                count = beam_width
+                        base = 4 * top
+                        for k in range(count):
+                            candidates[base + k] = ranked[k][2]
+                    cand_count[top] = count
+                cand_next[top] = 0
+
+            k = cand_next[top]
+            if k < cand_count[top]:
+                # Avanzar al siguiente candidato
+                cand_next[top] = k + 1
+                n = candidates[4 * top + k]
+                free ^= 1 << n
+                for m in order[n]:
+                    degree[m] -= 1
+                path[depth] = n
+                cand_next[depth] = -1
+                depth += 1
+            else:
+                # Retroceder
+                if depth == 1:
+                    status = self.EXHAUSTED
+                    break
+                free |= 1 << current
+                for m in order[current]:
+                    degree[m] += 1
+                depth -= 1
+                backtracks += 1
+
+        self.free = free
+        self.depth = depth
+        self.nodes = nodes
+        self.backtracks = backtracks
+        self.pruned = pruned
+        self.status = status
+        return status
+
+    def get_path(self) -> Optional[List[Cell]]:
+        """Camino encontrado en formato [(x, y), ...] (None si no hay)"""
+        if self.status != self.FOUND:
+            return None
+        # `size` es el ancho de fila (también en tableros rectangulares)
+        return [divmod(i, self.size) for i in self.path[:self.depth]]
+
+
+def search_hamiltonian_path(size: int, start: Cell, end: Cell,
+                            directions: Sequence[Direction] = DEFAULT_DIRECTIONS,
+                            corner_penalty: int = HEURISTIC_WEIGHTS.corner,
+                            edge_penalty: int = HEURISTIC_WEIGHTS.edge,
+                            center_weight: int = HEURISTIC_WEIGHTS.center,
+                            deadline: Optional[float] = None,
+                            stats: Optional[SearchStats] = None,
+                            max_nodes: Optional[int] = None) -> Optional[List[Cell]]:
+    """Un intento de búsqueda del camino hamiltoniano de `start` a `end`
+
+    Explora los vecinos en el mismo orden que el backtracking original
+    (ordenación estable por grado libre + penalización, desempatando por el
+    orden de `directions`) y la poda solo quita subárboles sin camino, así
+    que devuelve exactamente el mismo camino.
+    `deadline` es un instante de `time.time()`; se consulta cada
+    DEADLINE_CHECK_INTERVAL nodos. `max_nodes` corta la búsqueda tras ese
+    número de nodos (None si se corta sin camino). Para poder reanudar una
+    búsqueda cortada, usar HamiltonianSearch directamente.
+    """
+    if deadline is not None and time.time() > deadline:
+        return None
+
+    search = HamiltonianSearch(size, start, end, directions, corner_penalty, edge_penalty, center_weight)
+    began = time.time()
+    search.run(max_nodes=max_nodes, deadline=deadline)
+
+    if stats is not None:
+        stats.nodes += search.nodes
+        stats.backtracks += search.backtracks
+        stats.pruned += search.pruned
+        stats.elapsed += time.time() - began
+
+    return search.get_path()
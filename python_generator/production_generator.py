@@ -8,13 +8,28 @@ import os
 import json
 import random
 import argparse
+import itertools
 from typing import List, Tuple, Optional, Dict
 from dataclasses import dataclass
 from enum import Enum
-import firebase_admin
-from firebase_admin import credentials, firestore
 from dotenv import load_dotenv
 
+from path_engine import (HamiltonianSearch, path_node_budget, restart_limits, RESTART_SCHEDULES,
+                         RESTART_LUBY, RESTART_NONE, SEARCH_STRATEGIES, DEFAULT_STRATEGY,
+                         strategy_for_size, parse_strategy_option)
+from board import Board, board_search, is_feasible_board_pair, sample_pair
+from constructive_paths import (generate_backbite_path, ENGINE_BACKTRACKING, ENGINE_BACKBITE,
+                                ENGINE_CORPUS, PATH_ENGINES, MAX_SIZE_BY_ENGINE)
+from path_corpus import sample_corpus_path, DEFAULT_CORPUS_DIR
+from uniqueness import place_unique_clues, evenly_spaced_positions, grid_from_positions
+from seeding import level_rng
+from level_counter import LevelNumberAllocator
+from level_store import LevelStore, FirestoreLevelStore, create_store, LEVEL_STORES, STORE_FIRESTORE
+from puzzle_sink import JsonlSink, UploadSink
+from difficulty_rating import rate_puzzle, DifficultyRating
+from metrics import (GenerationMetrics, print_metrics_summary, STAGE_PATH_SEARCH, STAGE_CLUE_PLACEMENT,
+                     STAGE_RATING, STAGE_UPLOAD)
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -35,272 +50,215 @@ class PuzzleConfig:
 class ProductionPuzzleGenerator:
     """Generador de puzzles para producción con integración Firebase"""
     
-    def __init__(self):
+    def __init__(self, engine: str = ENGINE_BACKTRACKING, minimal_clues: bool = False,
+                 corpus_dir: str = DEFAULT_CORPUS_DIR, level_block_size: int = 1,
+                 reserve_levels: bool = True, store: Optional[LevelStore] = None,
+                 quiet: bool = False, restart_schedule: str = RESTART_LUBY,
+                 search_strategies: Optional[Dict[Optional[int], str]] = None):
         self.directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]  # derecha, abajo, izquierda, arriba
         
-        # Inicializar Firebase
-        if not firebase_admin._apps:
-            cred = credentials.Certificate("service-account-key.json")
-            firebase_admin.initialize_app(cred)
+        # Generador aleatorio propio (nunca el módulo `random` global)
+        self.rng = random.Random()
+        
+        # Motor de caminos: backtracking (búsqueda), backbite (constructivo) o corpus (precalculado)
+        self.engine = engine
+        self.max_size = MAX_SIZE_BY_ENGINE[engine]
+        self.corpus_dir = corpus_dir
+        
+        # Reducir los números al mínimo que mantiene la solución única
+        self.minimal_clues = minimal_clues
+        
+        # Almacén de niveles: Firebase salvo que se indique otro (ver level_store.py)
+        self.store = store or FirestoreLevelStore()
+        
+        # Números de nivel reservados por bloques en el contador del almacén
+        self.level_allocator = LevelNumberAllocator(self.store, level_block_size, reserve_levels)
         
-        self.db = firestore.client()
+        # Contadores y tiempos por etapa, nivel y bucket (ver metrics.py)
+        self.metrics = GenerationMetrics()
+        
+        # Sin mensajes por puzzle: solo resúmenes
+        self.quiet = quiet
+        
+        # Calendario de reinicios de la búsqueda de caminos (ver path_engine.py)
+        self.restart_schedule = restart_schedule
+        
+        # Estrategia de búsqueda por tamaño (None: todos los tamaños; ver path_engine.py)
+        self.search_strategies = dict(search_strategies or {})
+    
+    def log(self, message: str):
+        """Mensaje de progreso dentro del bucle de generación (se omite con quiet)"""
+        if not self.quiet:
+            print(message)
     
     def create_matrix(self, size: int) -> List[List[int]]:
         """Crea una matriz de tamaño NxN"""
         return [[0 for _ in range(size)] for _ in range(size)]
     
-    def select_start_end_points(self, size: int) -> Tuple[Tuple[int, int], Tuple[int, int]]:
-        """Selecciona puntos de inicio y fin aleatorios diferentes"""
-        all_points = [(i, j) for i in range(size) for j in range(size)]
-        start_point = random.choice(all_points)
-        
-        # Asegurar que el punto final sea diferente
-        remaining_points = [p for p in all_points if p != start_point]
-        end_point = random.choice(remaining_points)
-        
-        return start_point, end_point
-    
-    def find_hamiltonian_path(self, size: int, start: Tuple[int, int], end: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
-        """Busca un camino hamiltoniano (recorre todas las celdas sin repetir)"""
-        def is_valid(x: int, y: int) -> bool:
-            return 0 <= x < size and 0 <= y < size
-        
-        def get_neighbors(x: int, y: int) -> List[Tuple[int, int]]:
-            neighbors = []
-            for dx, dy in self.directions:
-                nx, ny = x + dx, y + dy
-                if is_valid(nx, ny) and (nx, ny) not in visited:
-                    neighbors.append((nx, ny))
-            return neighbors
-        
-        def count_accessible_cells(x: int, y: int) -> int:
-            """Cuenta cuántas celdas son accesibles desde una posición"""
-            count = 0
-            for dx, dy in self.directions:
-                nx, ny = x + dx, y + dy
-                if is_valid(nx, ny) and (nx, ny) not in visited:
-                    count += 1
-            return count
-        
-        def backtrack(current: Tuple[int, int], path: List[Tuple[int, int]]) -> bool:
-            if len(path) == size * size:
-                return current == end
-            
-            # Obtener vecinos y ordenarlos por heurística
-            neighbors = get_neighbors(*current)
-            
-            # Heurística: preferir vecinos con menos opciones futuras
-            def heuristic_score(pos):
-                # Si es el final y estamos cerca del final del camino, dar prioridad
-                if pos == end and len(path) == size * size - 1:
-                    return -1000
-                
-                # Contar opciones futuras
-                future_options = count_accessible_cells(*pos)
-                
-                # Penalizar esquinas y bordes si no son el final
-                if pos != end:
-                    if (pos[0] in [0, size-1] and pos[1] in [0, size-1]):
-                        future_options += 2  # Penalizar esquinas
-                    elif pos[0] in [0, size-1] or pos[1] in [0, size-1]:
-                        future_options += 1  # Penalizar bordes
-                
-                return future_options
-            
-            neighbors.sort(key=heuristic_score)
-            
-            for next_pos in neighbors:
-                path.append(next_pos)
-                visited.add(next_pos)
-                
-                if backtrack(next_pos, path):
-                    return True
-                
-                path.pop()
-                visited.remove(next_pos)
-            
-            return False
-        
-        # Intentar múltiples veces con diferentes estrategias
+    def select_start_end_points(self, size: int, rng: Optional[random.Random] = None,
+                                board: Optional[Board] = None) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """Selecciona puntos de inicio y fin aleatorios que admiten camino hamiltoniano"""
+        # Solo se muestrean pares factibles (paridad y casos prohibidos, ver feasibility.py y board.py)
+        return sample_pair(board or Board.square(size), rng or self.rng)
+    
+    def find_hamiltonian_path(self, size: int, start: Tuple[int, int], end: Tuple[int, int],
+                              rng: Optional[random.Random] = None,
+                              board: Optional[Board] = None) -> Optional[List[Tuple[int, int]]]:
+        """Busca un camino hamiltoniano (recorre todas las celdas sin repetir)
+        
+        Con presupuesto de nodos y calendario de reinicios (ver path_engine.py):
+        cada intento cortado se reinicia con otro orden de direcciones y otros
+        extremos. El orden de los vecinos lo decide la estrategia del tamaño.
+        Con `board` el camino recorre las celdas abiertas del tablero; el
+        presupuesto y los reinicios son los del lado mayor.
+        """
+        rng = rng or self.rng
+        board = board or Board.square(size)
+        size = max(board.rows, board.cols)
+        
+        # Copia local: barajar no modifica el estado compartido del generador
+        directions = list(self.directions)
+        
+        # Descartar pares imposibles antes de gastar intentos en la búsqueda
+        if not is_feasible_board_pair(board, start, end):
+            start, end = sample_pair(board, rng)
+        
+        node_budget = path_node_budget(size)
+        strategy = strategy_for_size(size, self.search_strategies)
+        
+        # Sin calendario, pocos intentos largos; con él, tantos como quepan en el presupuesto
         max_attempts = 20 if size <= 4 else 30
-        
-        for attempt in range(max_attempts):
-            visited = {start}
-            path = [start]
+        attempts = range(max_attempts) if self.restart_schedule == RESTART_NONE else itertools.count()
+        
+        for attempt, limit in zip(attempts, restart_limits(self.restart_schedule, size)):
+            if node_budget <= 0:
+                self.metrics.count("timeouts")
+                break
+            if attempt > 0:
+                self.metrics.count("restarts")
             
-            if backtrack(start, path):
-                return path
+            # Búsqueda sobre bitboard o sobre la adyacencia del tablero (ver board.py)
+            search = board_search(board, start, end, strategy, rng, directions)
+            search.run(max_nodes=node_budget if limit is None else min(limit, node_budget))
+            node_budget -= search.nodes
+            self.metrics.count("nodes", search.nodes)
+            self.metrics.count("backtracks", search.backtracks)
+            self.metrics.count("pruned", search.pruned)
+            if search.status == HamiltonianSearch.FOUND:
+                return search.get_path()
             
             # Si falla, intentar con un orden diferente de direcciones
-            random.shuffle(self.directions)
+            rng.shuffle(directions)
             
-            # Para puzzles pequeños, también probar diferentes puntos de inicio/fin
-            if size <= 4 and attempt > 10:
-                # Generar nuevos puntos de inicio/fin
-                all_points = [(i, j) for i in range(size) for j in range(size)]
-                start = random.choice(all_points)
-                remaining = [p for p in all_points if p != start]
-                end = random.choice(remaining)
+            # Y con otros puntos de inicio/fin (sin calendario, solo en puzzles pequeños)
+            if limit is not None or (size <= 4 and attempt > 10):
+                start, end = sample_pair(board, rng)
         
         return None
     
-    def validate_and_add_numbers(self, path: List[Tuple[int, int]], num_numbers: int) -> Tuple[List[List[int]], bool]:
-        """Valida el camino y añade números secuenciales"""
-        if not path:
-            return [], False
-        
-        size = int(len(path) ** 0.5)
-        matrix = self.create_matrix(size)
-        
-        # Verificar que el camino use todas las celdas
-        if len(path) != size * size:
-            return matrix, False
-        
-        # Verificar que no haya celdas repetidas
-        if len(set(path)) != len(path):
-            return matrix, False
-        
-        # Verificar que el camino sea continuo
-        for i in range(len(path) - 1):
-            x1, y1 = path[i]
-            x2, y2 = path[i + 1]
-            if abs(x1 - x2) + abs(y1 - y2) != 1:
-                return matrix, False
-        
-        # Colocar números secuenciales
-        if num_numbers > len(path):
-            num_numbers = len(path)
-        
-        # Distribuir números uniformemente
-        step = len(path) // (num_numbers - 1) if num_numbers > 1 else 1
-        
-        for i in range(num_numbers):
-            if i == 0:
-                # Primer número en el inicio
-                pos = 0
-            elif i == num_numbers - 1:
-                # Último número en el final
-                pos = len(path) - 1
-            else:
-                # Números intermedios distribuidos
-                pos = i * step
-            
-            x, y = path[pos]
-            matrix[x][y] = i + 1
-        
-        return matrix, True
-    
-    def calculate_difficulty(self, size: int, num_numbers: int, path_length: int) -> Difficulty:
-        """Calcula la dificultad del puzzle"""
-        # Factores de dificultad
-        grid_complexity = size * size
-        number_density = num_numbers / grid_complexity
-        path_efficiency = path_length / grid_complexity
-        
-        # Puntuación de dificultad (0-100)
-        score = 0
-        
-        # Factor de tamaño
-        if size <= 4:
-            score += 10
-        elif size <= 5:
-            score += 25
-        elif size <= 6:
-            score += 40
-        else:
-            score += 60
-        
-        # Factor de densidad de números
-        if number_density <= 0.25:
-            score += 30
-        elif number_density <= 0.4:
-            score += 20
-        elif number_density <= 0.6:
-            score += 10
-        else:
-            score += 5
-        
-        # Factor de eficiencia del camino
-        if path_efficiency >= 0.95:
-            score += 20
-        elif path_efficiency >= 0.9:
-            score += 15
-        elif path_efficiency >= 0.8:
-            score += 10
-        else:
-            score += 5
-        
-        # Determinar dificultad
-        if score <= 25:
-            return Difficulty.MUY_FACIL
-        elif score <= 40:
-            return Difficulty.FACIL
-        elif score <= 60:
-            return Difficulty.NORMAL
-        elif score <= 80:
-            return Difficulty.DIFICIL
-        else:
-            return Difficulty.EXTREMO
+    def place_unique_numbers(self, path: List[Tuple[int, int]], num_numbers: int,
+                             board: Board) -> List[List[int]]:
+        """Coloca los números de forma que el camino sea la única solución"""
+        # Partir del reparto uniforme y reparar/minimizar con el solver (ver uniqueness.py)
+        positions = evenly_spaced_positions(len(path), num_numbers)
+        positions = place_unique_clues(board.rows, path, positions, minimize=self.minimal_clues, board=board)
+        return grid_from_positions(board.rows, path, positions, board)
+    
+    def calculate_difficulty(self, puzzle_matrix: List[List[int]], path: List[Tuple[int, int]],
+                             board: Optional[Board] = None) -> Tuple[Difficulty, DifficultyRating]:
+        """Calcula la dificultad resolviendo el puzzle (ver difficulty_rating.py)"""
+        with self.metrics.stage(STAGE_RATING):
+            rating = rate_puzzle(puzzle_matrix, path, board=board)
+        return Difficulty(rating.band), rating
     
     def get_next_level_number(self) -> int:
-        """Obtiene el siguiente número de nivel desde Firebase"""
-        try:
-            # Buscar el nivel con el número más alto
-            levels_ref = self.db.collection('levels')
-            query = levels_ref.order_by('level', direction=firestore.Query.DESCENDING).limit(1)
-            
-            docs = query.stream()
-            max_level = 0
-            
-            for doc in docs:
-                data = doc.to_dict()
-                if 'level' in data:
-                    max_level = data['level']
-                    break
-            
-            return max_level + 1
-            
-        except Exception as e:
-            print(f"⚠️  Error obteniendo número de nivel: {e}")
-            print("   Usando nivel 1 como fallback")
-            return 1
+        """Obtiene el siguiente número de nivel del bloque reservado en Firebase
+        
+        Si la reserva falla la excepción se propaga y la ejecución se corta:
+        un número sin reservar podría sobrescribir un nivel existente.
+        """
+        # Solo hay viaje a Firestore cuando se agota el bloque (ver level_counter.py)
+        return self.level_allocator.next_level()
     
-    def generate_puzzle(self, size: int, num_numbers: int) -> Optional[Dict]:
-        """Genera un puzzle completo"""
+    def constructed_path(self, size: int, rng: random.Random) -> List[Tuple[int, int]]:
+        """Camino sin búsqueda: del corpus precalculado o por backbite"""
+        if self.engine == ENGINE_CORPUS:
+            path = sample_corpus_path(size, rng, self.corpus_dir)
+            if path:
+                return path
+            self.log(f"⚠️  Sin corpus de caminos {size}x{size}, usando backbite")
+        return generate_backbite_path(size, rng=rng)
+    
+    def generate_puzzle(self, size: int, num_numbers: int,
+                        rng: Optional[random.Random] = None,
+                        board: Optional[Board] = None) -> Optional[Dict]:
+        """Genera un puzzle completo
+        
+        Todo el azar sale de `rng` (por defecto el del generador), así que un
+        puzzle se puede regenerar por separado a partir de su semilla. Con
+        `board` (ver board.py) el puzzle usa ese tablero en vez del grid
+        cuadrado de `size`; solo lo admite el motor de backtracking.
+        """
+        rng = rng or self.rng
+        board = board or Board.square(size)
+        size = board.rows
+        
         # Validar parámetros
-        if size < 3 or size > 8:
-            print(f"❌ Tamaño de matriz inválido: {size} (debe ser entre 3 y 8)")
+        if not board.is_plain and self.engine != ENGINE_BACKTRACKING:
+            print(f"❌ El motor {self.engine} solo genera grids cuadrados completos")
+            return None
+        
+        if max(board.rows, board.cols) < 3 or max(board.rows, board.cols) > self.max_size:
+            print(f"❌ Tamaño de matriz inválido: {board.rows}x{board.cols} (debe ser entre 3 y {self.max_size})")
             return None
         
-        if num_numbers < 2 or num_numbers > size * size:
+        if num_numbers < 2 or num_numbers > board.n_open:
             print(f"❌ Número de números inválido: {num_numbers}")
             return None
         
-        print(f"🔄 Generando puzzle {size}x{size} con {num_numbers} números...")
+        self.log(f"🔄 Generando puzzle {board.rows}x{board.cols} con {num_numbers} números...")
+        self.metrics.start_level(size, num_numbers)
+        self.metrics.count("attempts")
         
         # 1. Crear matriz
-        matrix = self.create_matrix(size)
+        matrix = board.create_matrix()
         
-        # 2. Seleccionar puntos de inicio y fin
-        start_point, end_point = self.select_start_end_points(size)
-        print(f"📍 Inicio: {start_point}, Fin: {end_point}")
+        with self.metrics.stage(STAGE_PATH_SEARCH):
+            if self.engine in (ENGINE_BACKBITE, ENGINE_CORPUS):
+                # 2-3. Tomar un camino del corpus o construirlo (sin búsqueda)
+                path = self.constructed_path(size, rng)
+                self.log(f"📍 Inicio: {path[0]}, Fin: {path[-1]}")
+            else:
+                # 2. Seleccionar puntos de inicio y fin
+                start_point, end_point = self.select_start_end_points(size, rng, board)
+                self.log(f"📍 Inicio: {start_point}, Fin: {end_point}")
+                
+                # 3. Buscar camino hamiltoniano
+                path = self.find_hamiltonian_path(size, start_point, end_point, rng, board)
         
-        # 3. Buscar camino hamiltoniano
-        path = self.find_hamiltonian_path(size, start_point, end_point)
         if not path:
+            self.metrics.finish_level(None, False)
             print(f"❌ No se pudo encontrar un camino válido")
             return None
         
-        print(f"✅ Camino encontrado: {len(path)} pasos")
+        self.log(f"✅ Camino encontrado: {len(path)} pasos")
         
-        # 4. Validar y añadir números
-        puzzle_matrix, is_valid = self.validate_and_add_numbers(path, num_numbers)
-        if not is_valid:
-            print(f"❌ Camino inválido")
-            return None
+        with self.metrics.stage(STAGE_CLUE_PLACEMENT):
+            # 4. Validar el camino (todas las celdas abiertas, continuo, sin cruzar paredes)
+            if not board.validate_path(path):
+                self.metrics.finish_level(None, False)
+                print(f"❌ Camino inválido")
+                return None
+            
+            # 4b. Colocar los números garantizando solución única
+            puzzle_matrix = self.place_unique_numbers(path, num_numbers, board)
+        
+        placed_numbers = sum(1 for row in puzzle_matrix for cell in row if cell > 0)
+        if placed_numbers != num_numbers:
+            self.log(f"🔢 Números ajustados para solución única: {num_numbers} → {placed_numbers}")
         
         # 5. Calcular dificultad
-        difficulty = self.calculate_difficulty(size, num_numbers, len(path))
+        difficulty, rating = self.calculate_difficulty(puzzle_matrix, path, board)
         
         # 6. Obtener número de nivel
         level_number = self.get_next_level_number()
@@ -311,49 +269,44 @@ class ProductionPuzzleGenerator:
             "gridSize": size,
             "grid": puzzle_matrix,  # Usar 'grid' para compatibilidad con el juego
             "solution": path,
-            "level": level_number
+            "level": level_number,
+            "numbers": placed_numbers,  # Los colocados, no los pedidos
+            "rating": rating.to_dict()
         }
-        
-        print(f"✅ Puzzle generado: {difficulty.value} (Nivel {level_number})")
+        if board.rows != board.cols:
+            # Un rectángulo no tiene un solo tamaño: filas y columnas por separado
+            del result["gridSize"]
+            result["rows"], result["cols"] = board.rows, board.cols
+        if not board.is_plain:
+            # Filas, columnas, huecos y paredes para el juego (ver board.py)
+            result["board"] = board.to_dict()
+        
+        self.metrics.finish_level(level_number, True)
+        self.log(f"✅ Puzzle generado: {difficulty.value} (puntuación {rating.score}, Nivel {level_number})")
         return result
     
     def upload_to_firebase(self, puzzle: Dict) -> bool:
-        """Sube el puzzle a Firebase"""
+        """Sube el puzzle al almacén de niveles"""
+        return self.upload_batch_to_firebase([puzzle])
+    
+    def upload_batch_to_firebase(self, puzzles: List[Dict]) -> bool:
+        """Sube varios puzzles en lotes (ver bulk_upload.py)"""
         try:
-            # Generar ID único para el nivel
-            level_id = f"level_{puzzle['level']:04d}"
-            
-            # Convertir arrays anidados a formato compatible con Firestore
-            firestore_puzzle = {
-                "difficulty": puzzle["difficulty"],
-                "gridSize": puzzle["gridSize"],
-                "level": puzzle["level"],
-                "id": level_id,
-                "createdAt": firestore.SERVER_TIMESTAMP,
-                "isActive": True
-            }
+            print(f"📤 Subiendo {len(puzzles)} puzzles...")
             
-            # Convertir grid a formato Firestore
-            grid_data = {}
-            for i, row in enumerate(puzzle["grid"]):
-                grid_data[str(i)] = row
-            firestore_puzzle["grid"] = grid_data
+            with self.metrics.stage(STAGE_UPLOAD):
+                report = self.store.write_levels(puzzles)
             
-            # Convertir solution a formato Firestore
-            solution_data = []
-            for x, y in puzzle["solution"]:
-                solution_data.append({"x": x, "y": y})
-            firestore_puzzle["solution"] = solution_data
+            self.metrics.count("store_operations", report.commits)
+            if not report.ok:
+                print(f"❌ {len(report.failed)} niveles sin subir: {', '.join(report.failed)}")
+                return False
             
-            # Subir a Firestore
-            doc_ref = self.db.collection('levels').document(level_id)
-            doc_ref.set(firestore_puzzle)
-            
-            print(f"✅ Nivel {puzzle['level']} subido a Firebase: {level_id}")
+            print(f"✅ {report.uploaded} puzzles subidos en {report.commits} lotes")
             return True
             
         except Exception as e:
-            print(f"❌ Error subiendo nivel: {e}")
+            print(f"❌ Error subiendo lote: {e}")
             return False
     
     def generate_and_upload(self, size: int, num_numbers: int) -> bool:
@@ -370,7 +323,11 @@ def main():
     parser = argparse.ArgumentParser(description='Generador de Producción para PuzzlePath')
     
     parser.add_argument('--size', type=int, default=4, 
-                       help='Tamaño de la matriz (3-8, default: 4)')
+                       help='Tamaño de la matriz (3-8, hasta 20 con --engine backbite, default: 4)')
+    parser.add_argument('--cols', type=int,
+                       help='Columnas de un tablero rectangular de --size filas (default: cuadrado)')
+    parser.add_argument('--board', type=str,
+                       help='Tablero en JSON con filas, columnas, huecos y paredes (ver board.py; ignora --size y --cols)')
     parser.add_argument('--numbers', type=int, default=4,
                        help='Número de números en el puzzle (2-N², default: 4)')
     parser.add_argument('--count', type=int, default=1,
@@ -379,25 +336,68 @@ def main():
     parser.add_argument('--no-upload', action='store_true', 
                        help='No subir a Firebase (solo generar)')
     parser.add_argument('--seed', type=int, help='Semilla para reproducibilidad')
+    parser.add_argument('--engine', choices=PATH_ENGINES, default=ENGINE_BACKTRACKING,
+                       help='Motor de caminos: backtracking, backbite (constructivo) o corpus (precalculado, default: backtracking)')
+    parser.add_argument('--store', choices=LEVEL_STORES, default=STORE_FIRESTORE,
+                       help='Almacén de niveles: firestore o local (SQLite, sin conexión, default: firestore)')
+    parser.add_argument('--store-path', type=str,
+                       help='Credenciales de Firebase o fichero SQLite del almacén local')
+    parser.add_argument('--corpus-dir', type=str, default=DEFAULT_CORPUS_DIR,
+                       help='Directorio del corpus de caminos para --engine corpus (default: corpus/)')
+    parser.add_argument('--minimal-clues', action='store_true',
+                       help='Usar el mínimo de números que mantiene la solución única')
+    parser.add_argument('--restarts', choices=RESTART_SCHEDULES, default=RESTART_LUBY,
+                       help='Calendario de reinicios de la búsqueda de caminos: luby, geometric o none (default: luby)')
+    parser.add_argument('--strategy', nargs='+', default=[], metavar='[TAMAÑO=]ESTRATEGIA',
+                       help=f'Estrategia de búsqueda de caminos para todos los tamaños o para uno '
+                            f'({", ".join(SEARCH_STRATEGIES)}; default: {DEFAULT_STRATEGY})')
+    parser.add_argument('--quiet', action='store_true',
+                       help='Sin mensajes por puzzle (solo resúmenes)')
+    parser.add_argument('--metrics-json', type=str,
+                       help='Guardar las métricas (por nivel y bucket) en JSON')
+    parser.add_argument('--metrics-prom', type=str,
+                       help='Guardar las métricas en formato de texto de Prometheus (.prom)')
     
     args = parser.parse_args()
     
-    # Configurar semilla si se proporciona
-    if args.seed:
-        random.seed(args.seed)
+    try:
+        search_strategies = parse_strategy_option(args.strategy)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    # Configurar semilla si se proporciona (cada puzzle deriva la suya)
+    if args.seed is not None:
         print(f"🌱 Semilla configurada: {args.seed}")
     
+    # Tablero: cuadrado de --size salvo que se pida otro
+    try:
+        if args.board:
+            with open(args.board) as f:
+                board = Board.from_dict(json.load(f))
+        else:
+            board = Board.create(args.size, args.cols or args.size)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        parser.error(f"Tablero inválido: {e}")
+    args.size = board.rows
+    
     # Validar parámetros
-    if args.size < 3 or args.size > 8:
-        print(f"❌ Tamaño inválido: {args.size} (debe ser entre 3 y 8)")
+    max_size = MAX_SIZE_BY_ENGINE[args.engine]
+    if max(board.rows, board.cols) < 3 or max(board.rows, board.cols) > max_size:
+        print(f"❌ Tamaño inválido: {board.rows}x{board.cols} (debe ser entre 3 y {max_size})")
         return
     
-    if args.numbers < 2 or args.numbers > args.size * args.size:
+    if not board.is_plain and args.engine != ENGINE_BACKTRACKING:
+        print(f"❌ El motor {args.engine} solo genera grids cuadrados completos")
+        return
+    
+    if args.numbers < 2 or args.numbers > board.n_open:
         print(f"❌ Número de números inválido: {args.numbers}")
         return
     
     print(f"🎮 Generador de Producción para PuzzlePath")
-    print(f"📊 Configuración: {args.size}x{args.size}, {args.numbers} números")
+    print(f"📊 Configuración: {board.rows}x{board.cols}, {args.numbers} números")
+    if board.blocked or board.walls:
+        print(f"🧱 Tablero con {len(board.blocked)} huecos y {len(board.walls)} paredes")
     print(f"🎯 Generando {args.count} puzzle(s)...")
     
     if not args.no_upload:
@@ -405,52 +405,89 @@ def main():
     else:
         print(f"💾 Los puzzles NO se subirán a Firebase")
     
-    generator = ProductionPuzzleGenerator()
-    puzzles = []
+    # Un solo bloque de números para toda la ejecución (sin reservar si no se sube)
+    generator = ProductionPuzzleGenerator(engine=args.engine, minimal_clues=args.minimal_clues,
+                                          corpus_dir=args.corpus_dir, level_block_size=args.count,
+                                          reserve_levels=not args.no_upload,
+                                          store=create_store(args.store, args.store_path),
+                                          quiet=args.quiet, restart_schedule=args.restarts,
+                                          search_strategies=search_strategies)
+    # Detalle por nivel solo si se va a exportar
+    generator.metrics.keep_levels = bool(args.metrics_json)
     
-    for i in range(args.count):
-        print(f"\n🔄 Generando puzzle {i + 1}/{args.count}...")
-        
-        puzzle = generator.generate_puzzle(args.size, args.numbers)
-        
-        if puzzle:
-            puzzles.append(puzzle)
+    # Cada puzzle se escribe y se sube en cuanto se genera (ver puzzle_sink.py)
+    sinks = []
+    if args.output:
+        sinks.append(JsonlSink(args.output))
+    uploader = None
+    if not args.no_upload:
+        uploader = UploadSink(generator.upload_batch_to_firebase)
+        sinks.append(uploader)
+    
+    generated = 0
+    first_level = last_level = None
+    difficulties = {}
+    
+    try:
+        for i in range(args.count):
+            generator.log(f"\n🔄 Generando puzzle {i + 1}/{args.count}...")
+            
+            # Con semilla, el puzzle i se puede regenerar solo: level_rng(semilla, i)
+            rng = level_rng(args.seed, i) if args.seed is not None else None
+            puzzle = generator.generate_puzzle(args.size, args.numbers, rng, board)
             
-            # Subir a Firebase si no se especifica --no-upload
-            if not args.no_upload:
-                if generator.upload_to_firebase(puzzle):
-                    print(f"✅ Puzzle {i + 1} generado y subido: Nivel {puzzle['level']}")
-                else:
-                    print(f"❌ Error subiendo puzzle {i + 1}")
+            if puzzle:
+                for sink in sinks:
+                    sink.write(puzzle)
+                generated += 1
+                diff = puzzle['difficulty']
+                difficulties[diff] = difficulties.get(diff, 0) + 1
+                if first_level is None:
+                    first_level = puzzle['level']
+                last_level = puzzle['level']
+                generator.log(f"✅ Puzzle {i + 1} generado: Nivel {puzzle['level']}")
             else:
-                print(f"✅ Puzzle {i + 1} generado: Nivel {puzzle['level']}")
+                print(f"❌ Error generando puzzle {i + 1}")
+    finally:
+        # Devolver los números reservados que no se usaron
+        generator.level_allocator.release()
+        
+        # Subir y cerrar lo pendiente aunque la ejecución se interrumpa
+        for sink in sinks:
+            sink.close()
+    
+    if uploader and generated:
+        if uploader.ok:
+            print(f"✅ Todos los puzzles subidos a Firebase")
         else:
-            print(f"❌ Error generando puzzle {i + 1}")
+            print(f"❌ Error subiendo puzzles a Firebase")
     
-    # Guardar en archivo si se especifica
-    if args.output and puzzles:
-        with open(args.output, 'w') as f:
-            json.dump(puzzles, f, indent=2)
-        print(f"\n💾 Puzzles guardados en: {args.output}")
+    if args.output and generated:
+        print(f"\n💾 Puzzles guardados en: {args.output} (JSONL, uno por línea)")
     
     # Mostrar estadísticas
-    if puzzles:
+    if generated:
         print(f"\n🎉 Proceso completado:")
-        print(f"   ✅ Puzzles generados: {len(puzzles)}")
-        
-        difficulties = {}
-        for puzzle in puzzles:
-            diff = puzzle['difficulty']
-            difficulties[diff] = difficulties.get(diff, 0) + 1
+        print(f"   ✅ Puzzles generados: {generated}")
         
         print(f"   📊 Distribución de dificultades:")
         for diff, count in difficulties.items():
             print(f"      {diff}: {count}")
         
-        print(f"   🔢 Niveles generados: {[p['level'] for p in puzzles]}")
+        print(f"   🔢 Niveles generados: {first_level} - {last_level}")
     
     else:
         print(f"\n❌ No se pudo generar ningún puzzle")
+    
+    print_metrics_summary(generator.metrics)
+    
+    # Exportar métricas si se pide
+    if args.metrics_json:
+        generator.metrics.write_json(args.metrics_json)
+        print(f"📈 Métricas guardadas en: {args.metrics_json}")
+    if args.metrics_prom:
+        generator.metrics.write_prometheus(args.metrics_prom)
+        print(f"📈 Métricas Prometheus guardadas en: {args.metrics_prom}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Destinos de los puzzles generados
+Los generadores entregan los puzzles uno a uno y cada destino los procesa en
+cuanto se aceptan, sin acumular la ejecución entera en memoria:
+
+- JsonlSink: un puzzle por línea (JSON Lines), escrito y vaciado al disco al
+  momento; si la ejecución se interrumpe, el fichero conserva todo lo
+  generado hasta entonces.
+- UploadSink: agrupa los puzzles y los sube en bloques de tamaño fijo.
+
+`read_puzzles` lee un fichero JSONL de forma perezosa.
+"""
+
+import os
+import json
+from typing import List, Dict, Callable, Iterator
+
+from bulk_upload import MAX_BATCH_WRITES, DEFAULT_MAX_IN_FLIGHT
+
+# Puzzles por subida: suficientes para llenar todos los lotes en vuelo
+STREAM_UPLOAD_BATCH = MAX_BATCH_WRITES * DEFAULT_MAX_IN_FLIGHT
+
+
+class JsonlSink:
+    """Escribe cada puzzle como una línea JSON en cuanto se genera"""
+
+    def __init__(self, filename: str, append: bool = False):
+        self.filename = filename
+        directory = os.path.dirname(os.path.abspath(filename))
+        os.makedirs(directory, exist_ok=True)
+        self.file = open(filename, 'a' if append else 'w')
+        self.written = 0
+
+    def write(self, puzzle: Dict):
+        self.file.write(json.dumps(puzzle, separators=(',', ':')) + "\n")
+        self.file.flush()
+        self.written += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class UploadSink:
+    """Sube los puzzles por bloques con `upload(puzzles) -> bool`"""
+
+    def __init__(self, upload: Callable[[List[Dict]], bool], batch_size: int = STREAM_UPLOAD_BATCH):
+        self.upload = upload
+        self.batch_size = max(1, batch_size)
+        self.buffer: List[Dict] = []
+        self.ok = True
+
+    def write(self, puzzle: Dict):
+        self.buffer.append(puzzle)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Sube lo pendiente"""
+        if self.buffer:
+            self.ok = self.upload(self.buffer) and self.ok
+            self.buffer = []
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_puzzles(filename: str) -> Iterator[Dict]:
+    """Puzzles de un fichero JSONL, uno a uno"""
+    with open(filename) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
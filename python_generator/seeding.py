@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Derivación de semillas por nivel
+Cada nivel se genera con una semilla derivada de (semilla de campaña, nivel,
+intento), de modo que el resultado de un nivel no depende de cuántos niveles
+se hayan generado antes ni de en qué proceso se genere.
+"""
+
+import hashlib
+import random
+
+
+def derive_seed(campaign_seed: int, *parts) -> int:
+    """Semilla de 64 bits estable derivada de la semilla de campaña y `parts`"""
+    key = ":".join(str(p) for p in (campaign_seed,) + parts)
+    digest = hashlib.sha256(key.encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def derive_level_seed(campaign_seed: int, level: int, attempt: int = 0) -> int:
+    """Semilla del intento `attempt` del nivel `level`"""
+    return derive_seed(campaign_seed, "level", level, attempt)
+
+
+def level_rng(campaign_seed: int, level: int, attempt: int = 0) -> random.Random:
+    """Generador privado para un intento de un nivel (no toca el `random` global)"""
+    return random.Random(derive_level_seed(campaign_seed, level, attempt))
+
+
+def new_campaign_seed() -> int:
+    """Semilla de campaña aleatoria (para runs sin --seed)"""
+    return random.SystemRandom().randrange(2 ** 32)
@@ -13,7 +13,8 @@ def check_dependencies():
     
     required_packages = [
         'firebase-admin',
-        'python-dotenv'
+        'python-dotenv',
+        'numpy'
     ]
     
     missing_packages = []
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Pruebas del benchmark (no requieren Firebase)
+"""
+
+import json
+
+from benchmark import (percentile, run_benchmark, find_regressions, compare_strategies, node_baseline,
+                       DEFAULT_BASELINE_FILE)
+from constructive_paths import ENGINE_BACKBITE
+from path_engine import SEARCH_STRATEGIES, STRATEGY_BEAM
+
+
+def test_percentile():
+    """Percentiles con interpolación lineal"""
+    values = [4.0, 1.0, 3.0, 2.0]
+    assert percentile(values, 0) == 1.0
+    assert percentile(values, 50) == 2.5
+    assert percentile(values, 100) == 4.0
+    assert percentile([], 95) == 0.0
+
+
+def test_benchmark_is_reproducible_and_flags_regressions():
+    """Con la misma semilla los nodos coinciden; más nodos cuenta como regresión"""
+    first = run_benchmark(ENGINE_BACKBITE, samples=2, seed=1, sizes=[4])
+    second = run_benchmark(ENGINE_BACKBITE, samples=2, seed=1, sizes=[4])
+    assert first["buckets"] and all(b["success_rate"] == 1.0 for b in first["buckets"])
+    assert [b["mean_nodes"] for b in first["buckets"]] == [b["mean_nodes"] for b in second["buckets"]]
+
+    baseline = {"buckets": [dict(b, mean_nodes=100.0) for b in first["buckets"]]}
+    current = {"buckets": [dict(b, mean_nodes=200.0) for b in first["buckets"]]}
+    assert len(find_regressions(current, baseline)) == len(first["buckets"])
+    assert not find_regressions(baseline, baseline)
+
+    # La línea base versionada no tiene latencias: solo se comparan nodos, éxitos y timeouts
+    nodes_only = node_baseline(first)
+    assert all("p50_ms" not in bucket for bucket in nodes_only["buckets"])
+    slower = {"buckets": [dict(b, p50_ms=b["p50_ms"] + 1000) for b in first["buckets"]]}
+    assert not find_regressions(slower, nodes_only) and find_regressions(slower, first)
+
+
+def test_tracked_node_baseline_matches():
+    """benchmark_nodes.json coincide con lo que expande la búsqueda actual"""
+    with open(DEFAULT_BASELINE_FILE) as f:
+        baseline = json.load(f)
+    assert baseline["buckets"] and all("p50_ms" not in bucket for bucket in baseline["buckets"])
+
+    small = [bucket for bucket in baseline["buckets"] if bucket["size"] == 4]
+    current = run_benchmark(baseline["engine"], baseline["samples"], baseline["seed"], sizes=[4])
+    assert node_baseline(current)["buckets"] == small
+
+
+def test_compare_strategies():
+    """Cada estrategia se mide en cada tamaño y se elige la más rápida"""
+    comparison = compare_strategies(samples=2, seed=1, sizes=[4, 5])
+    assert [entry["size"] for entry in comparison["sizes"]] == [4, 5]
+    for entry in comparison["sizes"]:
+        assert set(entry["strategies"]) == set(SEARCH_STRATEGIES)
+        assert entry["fastest"] in SEARCH_STRATEGIES and entry["fastest"] != STRATEGY_BEAM
+        assert all(result["success_rate"] == 1.0 for result in entry["strategies"].values())
+
+
+if __name__ == "__main__":
+    test_percentile()
+    test_benchmark_is_reproducible_and_flags_regressions()
+    test_tracked_node_baseline_matches()
+    test_compare_strategies()
+    print("✅ Pruebas del benchmark completadas")
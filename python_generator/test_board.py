@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Pruebas de los tableros generales: rectangulares, con huecos y con paredes
+(no requieren Firebase)
+"""
+
+import random
+
+from board import (Board, get_board_tables, board_search, board_feasible_pair, is_feasible_board_pair,
+                   sample_pair, BLOCKED_CELL)
+from path_engine import HamiltonianSearch, SEARCH_STRATEGIES, STRATEGY_WARNSDORFF
+from uniqueness import solve_clues, count_solutions, place_unique_clues, grid_from_positions
+from level_store import LocalLevelStore
+from bulk_upload import puzzle_to_firestore
+from production_generator import ProductionPuzzleGenerator
+
+# 3x4 con un hueco en el centro y una pared que corta la fila de arriba
+NOTCHED = Board.create(3, 4, blocked=[(1, 1)], walls=[((0, 1), (0, 2))])
+
+
+def all_paths(board: Board, start, end):
+    """Caminos hamiltonianos de start a end por fuerza bruta"""
+    found = []
+
+    def extend(path, seen):
+        if len(path) == board.n_open:
+            if path[-1] == end:
+                found.append(list(path))
+            return
+        x, y = path[-1]
+        for cell in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if cell not in seen and board.adjacent(path[-1], cell):
+                seen.add(cell)
+                path.append(cell)
+                extend(path, seen)
+                path.pop()
+                seen.remove(cell)
+
+    extend([start], {start})
+    return found
+
+
+def test_board_validation_and_serialization():
+    """Tableros inválidos dan ValueError; to_dict y to_firestore van y vuelven"""
+    for args in ((0, 3), (2, 2, [(2, 0)]), (2, 3, (), [((0, 0), (1, 1))]), (1, 3, [(0, 1)])):
+        try:
+            Board.create(*args)
+        except ValueError:
+            continue
+        raise AssertionError(f"Tablero aceptado: {args}")
+
+    assert Board.from_dict(NOTCHED.to_dict()) == NOTCHED
+    assert Board.from_firestore(NOTCHED.to_firestore()) == NOTCHED
+    assert NOTCHED.n_open == 11 and not NOTCHED.is_plain and Board.square(4).is_plain
+    assert NOTCHED.create_matrix()[1][1] == BLOCKED_CELL
+
+    tables = get_board_tables(NOTCHED)
+    assert tables.neighbors(1) == (0,)       # (0, 1): hueco abajo, pared a la derecha
+    assert tables.degrees[5] == 0 and tables.connected
+
+
+def test_board_search_matches_brute_force():
+    """La búsqueda encuentra camino justo cuando existe y respeta huecos y paredes"""
+    for start in NOTCHED.open_cells():
+        for end in NOTCHED.open_cells():
+            if not board_feasible_pair(NOTCHED, start, end):
+                assert not all_paths(NOTCHED, start, end)
+                continue
+            search = board_search(NOTCHED, start, end, SEARCH_STRATEGIES[STRATEGY_WARNSDORFF], random.Random(0))
+            status = search.run()
+            if all_paths(NOTCHED, start, end):
+                assert status == HamiltonianSearch.FOUND
+                path = search.get_path()
+                assert path[0] == start and path[-1] == end and NOTCHED.validate_path(path)
+            else:
+                assert status == HamiltonianSearch.EXHAUSTED
+
+
+def test_plain_rectangles_use_exact_oracle():
+    """En rectángulos sin huecos ni paredes los pares imposibles se descartan antes de buscar"""
+    rng = random.Random(3)
+    for rows, cols in ((2, 4), (3, 4), (4, 3), (3, 5)):
+        board = Board.create(rows, cols)
+        for start in board.open_cells():
+            for end in board.open_cells():
+                assert is_feasible_board_pair(board, start, end) == bool(all_paths(board, start, end))
+        for _ in range(20):
+            assert all_paths(board, *sample_pair(board, rng))
+
+
+def test_solver_counts_board_solutions():
+    """El solver de unicidad cuenta las mismas soluciones que la fuerza bruta"""
+    board = Board.create(3, 5, blocked=[(1, 1)], walls=[((0, 3), (1, 3))])
+    rng = random.Random(4)
+    start, end = sample_pair(board, rng)
+    while not all_paths(board, start, end):
+        start, end = sample_pair(board, rng)
+
+    paths = all_paths(board, start, end)
+    grid = grid_from_positions(board.rows, paths[0], [0, len(paths[0]) - 1], board)
+    assert count_solutions(grid, limit=100, board=board) == len(paths)
+
+    cells = [board.index(cell) for cell in paths[0]]
+    positions = place_unique_clues(board.rows, paths[0], [0, len(cells) - 1], board=board)
+    assert solve_clues(board.rows, [cells[p] for p in positions], board=board) == [cells]
+
+
+def test_generate_puzzle_on_board():
+    """El generador produce puzzles válidos y únicos en tableros no cuadrados"""
+    generator = ProductionPuzzleGenerator(store=LocalLevelStore(":memory:"), reserve_levels=False, quiet=True)
+    board = Board.create(5, 6, blocked=[(2, 2), (2, 3)], walls=[((0, 0), (0, 1))])
+    puzzle = generator.generate_puzzle(5, 6, random.Random(8), board)
+
+    path = [tuple(cell) for cell in puzzle["solution"]]
+    assert board.validate_path(path) and Board.from_dict(puzzle["board"]) == board
+    assert (puzzle["rows"], puzzle["cols"]) == (5, 6) and "gridSize" not in puzzle
+    assert puzzle["numbers"] == sum(1 for row in puzzle["grid"] for cell in row if cell > 0)
+    assert puzzle["grid"][2][2] == BLOCKED_CELL and count_solutions(puzzle["grid"], board=board) == 1
+
+    _, document = puzzle_to_firestore(puzzle)
+    assert Board.from_firestore(document["board"]) == board and document["cols"] == 6
+
+    # Un cuadrado completo sigue siendo el caso rápido: mismo puzzle con y sin board
+    plain = generator.generate_puzzle(5, 4, random.Random(9), Board.square(5))
+    assert "board" not in plain
+    assert generator.generate_puzzle(5, 4, random.Random(9))["solution"] == plain["solution"]
+
+
+if __name__ == "__main__":
+    test_board_validation_and_serialization()
+    test_board_search_matches_brute_force()
+    test_plain_rectangles_use_exact_oracle()
+    test_solver_counts_board_solutions()
+    test_generate_puzzle_on_board()
+    print("✅ Pruebas de tableros completadas")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la subida masiva (no requieren Firebase)
+"""
+
+import threading
+
+from bulk_upload import BulkUploader, RampUpLimiter, puzzle_to_firestore, MAX_BATCH_WRITES
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.writes = []
+
+    def set(self, ref, data):
+        self.writes.append(ref)
+
+    def commit(self):
+        self.db.commit(self.writes)
+
+
+class FakeDb:
+    """Base de datos en memoria; el primer commit de cada lote indicado falla"""
+
+    def __init__(self, failing_first=(), always_failing=()):
+        self.lock = threading.Lock()
+        self.stored = {}
+        self.commits = []
+        self.failing_first = set(failing_first)
+        self.always_failing = set(always_failing)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def collection(self, name):
+        return self
+
+    def document(self, doc_id):
+        return doc_id
+
+    def commit(self, writes):
+        with self.lock:
+            self.commits.append(len(writes))
+            first = writes[0]
+            if first in self.always_failing:
+                raise RuntimeError("unavailable")
+            if first in self.failing_first:
+                self.failing_first.discard(first)
+                raise RuntimeError("deadline exceeded")
+            for doc_id in writes:
+                self.stored[doc_id] = True
+
+
+def make_documents(count):
+    puzzles = [{"level": level, "difficulty": "fácil", "gridSize": 2,
+                "grid": [[1, 0], [0, 2]], "solution": [(0, 0), (0, 1), (1, 1), (1, 0)]}
+               for level in range(1, count + 1)]
+    return [puzzle_to_firestore(p) for p in puzzles]
+
+
+def unlimited():
+    return RampUpLimiter(initial_rate=1e12)
+
+
+def test_chunks_respect_batch_limit_and_retry_only_failures():
+    """Lotes de como mucho 500 y solo se reenvía el lote que falló"""
+    documents = make_documents(1234)
+    db = FakeDb(failing_first={"level_0501"})
+    report = BulkUploader(db, limiter=unlimited(), retry_delay=0).upload(documents)
+
+    assert report.ok and report.uploaded == 1234 and report.retries == 1
+    assert max(db.commits) <= MAX_BATCH_WRITES
+    assert sorted(db.commits) == [234, 500, 500, 500]
+    assert len(db.stored) == 1234
+
+
+def test_failed_chunks_are_reported():
+    """Un lote que nunca entra se reporta sin bloquear al resto"""
+    db = FakeDb(always_failing={"level_0001"})
+    report = BulkUploader(db, chunk_size=10, limiter=unlimited(), max_attempts=2,
+                          retry_delay=0).upload(make_documents(30))
+    assert report.uploaded == 20
+    assert report.failed == [f"level_{i:04d}" for i in range(1, 11)]
+
+
+def test_ramp_up_limiter():
+    """El ritmo empieza en el inicial y crece por tramos"""
+    now = [0.0]
+    waits = []
+    limiter = RampUpLimiter(initial_rate=500, ramp_interval=300, ramp_factor=1.5,
+                            clock=lambda: now[0], sleep=waits.append)
+    limiter.acquire(500)
+    limiter.acquire(500)
+    assert waits == [1.0]
+    now[0] = 600
+    assert limiter.current_rate() == 500 * 1.5 ** 2
+
+
+if __name__ == "__main__":
+    test_chunks_respect_batch_limit_and_retry_only_failures()
+    test_failed_chunks_are_reported()
+    test_ramp_up_limiter()
+    print("✅ Pruebas de subida masiva completadas")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Pruebas del diario de ejecución y --resume (no requieren Firebase)
+"""
+
+import os
+import json
+import tempfile
+from itertools import islice
+
+from checkpoint import RunJournal
+from level_store import LocalLevelStore
+from constructive_paths import ENGINE_BACKBITE
+from weekly_generator_based_on_production import WeeklyPuzzleGenerator
+
+
+def normalized(puzzles):
+    """Mismo formato que tras pasar por el diario (tuplas -> listas)"""
+    return json.loads(json.dumps(list(puzzles)))
+
+
+def test_resume_continues_interrupted_run():
+    """Una ejecución cortada y reanudada da lo mismo que una sin cortes"""
+    with tempfile.TemporaryDirectory() as directory:
+        reference = WeeklyPuzzleGenerator(engine=ENGINE_BACKBITE, store=LocalLevelStore(":memory:"), quiet=True)
+        expected = normalized(reference.iter_weekly_levels(6, seed=9, journal=RunJournal(os.path.join(directory, "a"))))
+
+        filename = os.path.join(directory, "b")
+        store = LocalLevelStore(":memory:")
+        first = WeeklyPuzzleGenerator(engine=ENGINE_BACKBITE, store=store, quiet=True)
+        levels = first.iter_weekly_levels(6, seed=9, journal=RunJournal(filename))
+        done = normalized(islice(levels, 3))
+        levels.close()    # caída a mitad de la ejecución
+
+        journal = RunJournal(filename)
+        assert journal.resumable and journal.run['seed'] == 9
+        # El bloque reservado no se devolvió: sigue siendo de esta ejecución
+        assert store.read_next_level() == 7
+
+        second = WeeklyPuzzleGenerator(engine=ENGINE_BACKBITE, store=store, quiet=True)
+        rest = normalized(second.iter_weekly_levels(journal=journal))
+
+        assert done + rest == expected
+        # Generación terminada; los niveles siguen pendientes de subir
+        reopened = RunJournal(filename)
+        assert reopened.finished and len(reopened.pending_uploads) == 6
+        assert store.read_next_level() == 7
+
+
+def test_pending_uploads():
+    """Solo quedan pendientes los niveles generados y no confirmados"""
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "journal.jsonl")
+        journal = RunJournal(filename)
+        journal.start_run(1, 3, 10, 13, engine=ENGINE_BACKBITE, minimal_clues=False, upload=True)
+        for slot in (10, 11, 12):
+            journal.record_level(slot, {"level": slot, "grid": [], "solution": []})
+        journal.record_uploaded([10, 11])
+        journal.finish()
+        journal.close()
+
+        # Una línea cortada al final no rompe la lectura
+        with open(filename, 'a') as f:
+            f.write('{"type": "uplo')
+
+        reopened = RunJournal(filename)
+        assert reopened.finished and reopened.resumable
+        assert list(reopened.pending_uploads) == [12]
+        assert [p["level"] for p in reopened.puzzles()] == [10, 11, 12]
+
+        reopened.record_uploaded([12])
+        reopened.close()
+        assert not RunJournal(filename).resumable
+
+
+if __name__ == "__main__":
+    test_resume_continues_interrupted_run()
+    test_pending_uploads()
+    print("✅ Pruebas del diario completadas")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Pruebas del índice de configuraciones libres (no requieren Firebase)
+"""
+
+import random
+
+from config_space import ConfigSpace
+from level_store import LocalLevelStore
+from constructive_paths import ENGINE_BACKBITE
+from weekly_generator_based_on_production import WeeklyPuzzleGenerator, Difficulty
+
+CONFIGS = {
+    Difficulty.FACIL: {'size_range': (4, 5), 'numbers_range': (3, 4), 'weight': 0.9},
+    Difficulty.EXTREMO: {'size_range': (6, 6), 'numbers_range': (6, 7), 'weight': 0.1},
+}
+
+
+def test_sampling_skips_used_configs():
+    """Nunca sale una configuración usada y quitar es O(1) con intercambio"""
+    space = ConfigSpace(CONFIGS, used={(4, 3, "facil"), (6, 6, "extremo"), (9, 9, "normal")})
+    assert (space.remaining(Difficulty.FACIL), space.remaining(Difficulty.EXTREMO)) == (3, 1)
+
+    rng = random.Random(1)
+    seen = {space.sample(rng) for _ in range(200)}
+    assert seen == {(4, 4, Difficulty.FACIL), (5, 3, Difficulty.FACIL), (5, 4, Difficulty.FACIL),
+                    (6, 7, Difficulty.EXTREMO)}
+
+    assert space.remove(Difficulty.FACIL, 5, 3) and not space.remove(Difficulty.FACIL, 5, 3)
+    assert sorted(space.free[Difficulty.FACIL]) == [(4, 4), (5, 4)]
+    assert all(space.position[Difficulty.FACIL][pair] == i for i, pair in enumerate(space.free[Difficulty.FACIL]))
+
+
+def test_exhaustion_is_explicit():
+    """Una dificultad agotada se conoce sin sortear; su peso pasa al resto"""
+    space = ConfigSpace(CONFIGS, used={(4, 3, "facil"), (4, 4, "facil"), (5, 3, "facil"), (5, 4, "facil")})
+    assert space.exhausted == [Difficulty.FACIL]
+
+    rng = random.Random(2)
+    assert {space.sample(rng)[2] for _ in range(50)} == {Difficulty.EXTREMO}
+    assert space.sample(rng, Difficulty.FACIL) is None
+
+    space.remove(Difficulty.EXTREMO, 6, 6)
+    space.remove(Difficulty.EXTREMO, 6, 7)
+    assert space.sample(rng) is None
+
+
+def test_planned_configs_are_unused():
+    """El plan semanal no repite configuraciones del catálogo"""
+    generator = WeeklyPuzzleGenerator(engine=ENGINE_BACKBITE, store=LocalLevelStore(":memory:"), quiet=True)
+    used = {(size, numbers, difficulty.value)
+            for _, size, numbers, difficulty in generator.plan_weekly_levels(40, 1, seed=3)}
+
+    generator.existing_configs = used
+    generator.config_space = ConfigSpace(generator.difficulty_configs, used)
+    for _, size, numbers, difficulty in generator.plan_weekly_levels(40, 1, seed=3):
+        assert size is None or (size, numbers, difficulty.value) not in used
+
+
+def test_plan_never_repeats_configs():
+    """Dentro de un plan cada configuración sale una sola vez, y repetirlo da lo mismo"""
+    generator = WeeklyPuzzleGenerator(engine=ENGINE_BACKBITE, store=LocalLevelStore(":memory:"), quiet=True)
+    plan = list(generator.plan_weekly_levels(100, 1, seed=5))
+    configs = [(size, numbers, difficulty) for _, size, numbers, difficulty in plan]
+    assert None not in {size for size, _, _ in configs}
+    assert len(set(configs)) == len(configs) == 100
+    assert generator.config_space.remaining(Difficulty.FACIL) == generator.config_space.totals[Difficulty.FACIL]
+
+    # Reanudar a mitad (o regenerar) repite el plan desde el primer nivel
+    assert list(generator.plan_weekly_levels(60, 41, seed=5, first_level=1)) == plan[40:]
+
+
+def test_emitted_configs_are_consumed():
+    """Cuenta como usada la configuración que sale (números colocados), no la planificada"""
+    generator = WeeklyPuzzleGenerator(engine=ENGINE_BACKBITE, store=LocalLevelStore(":memory:"),
+                                      minimal_clues=True, quiet=True)
+    plan = list(generator.plan_weekly_levels(6, 1, seed=4))
+    puzzles = generator.generate_weekly_levels(6, start_level=1, seed=4)
+    assert len(puzzles) == 6
+
+    for (_, size, planned, _), puzzle in zip(plan, puzzles):
+        placed = sum(1 for row in puzzle["grid"] for cell in row if cell > 0)
+        assert puzzle["numbers"] == placed
+        config = (size, placed, puzzle["difficulty"])
+        assert config in generator.existing_configs and generator.is_duplicate_config(*config)
+        assert (size, placed) not in generator.config_space.position[Difficulty(puzzle["difficulty"])]
+    # Con --minimal-clues los colocados no son los planificados
+    assert any(puzzle["numbers"] != planned for (_, _, planned, _), puzzle in zip(plan, puzzles))
+
+
+if __name__ == "__main__":
+    test_sampling_skips_used_configs()
+    test_exhaustion_is_explicit()
+    test_planned_configs_are_unused()
+    test_plan_never_repeats_configs()
+    test_emitted_configs_are_consumed()
+    print("✅ Pruebas del espacio de configuraciones completadas")
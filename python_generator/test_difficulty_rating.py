@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la valoración de dificultad con el solver (no requieren Firebase)
+"""
+
+import random
+
+from difficulty_rating import rate_puzzle, rating_band, RATING_BANDS
+from uniqueness import place_unique_clues, evenly_spaced_positions, grid_from_positions
+from constructive_paths import generate_backbite_path
+from level_store import LocalLevelStore
+from weekly_generator_based_on_production import WeeklyPuzzleGenerator, weekly_difficulty
+
+
+def unique_puzzle(size, num_numbers, seed):
+    path = generate_backbite_path(size, rng=random.Random(seed))
+    positions = place_unique_clues(size, path, evenly_spaced_positions(len(path), num_numbers))
+    return grid_from_positions(size, path, positions), path
+
+
+def test_fully_numbered_grid_is_forced():
+    """Con todas las celdas numeradas cada paso es un movimiento forzado"""
+    path = generate_backbite_path(5, rng=random.Random(1))
+    rating = rate_puzzle(grid_from_positions(5, path, range(len(path))), path)
+    assert rating.forced_moves == rating.steps == 24
+    assert rating.score == 0 and rating.band == RATING_BANDS[0][1]
+
+
+def test_rating_accounts_for_every_step():
+    """Cada paso es forzado, deducción o ramificación; y se repite igual"""
+    for seed in range(5):
+        grid, path = unique_puzzle(6, 6, seed)
+        rating = rate_puzzle(grid, path)
+        assert rating.forced_moves + rating.deductions + rating.branching_points == rating.steps
+        assert rating.search_nodes >= rating.branching_points
+        assert rate_puzzle(grid, path) == rating
+
+
+def test_fewer_clues_rate_harder():
+    """Sobre el mismo camino, quitar números no hace el puzzle más fácil"""
+    grid, path = unique_puzzle(6, 6, 3)
+    dense = grid_from_positions(6, path, range(0, len(path), 2))
+    assert rate_puzzle(dense, path).score <= rate_puzzle(grid, path).score
+
+
+def test_bands_are_ordered():
+    limits = [limit for limit, _ in RATING_BANDS]
+    assert limits == sorted(limits)
+    assert rating_band(0) == "muy_facil" and rating_band(1000) == "extremo"
+
+
+def test_generated_levels_carry_rating():
+    """Los niveles semanales llevan la valoración y regenerarlos la reproduce"""
+    generator = WeeklyPuzzleGenerator(engine="backbite", store=LocalLevelStore(":memory:"), quiet=True)
+    levels = generator.generate_weekly_levels(5, seed=11)
+    for puzzle in levels:
+        assert puzzle['rating']['band'] == rating_band(puzzle['rating']['score'])
+        # Se guarda la dificultad medida, no la planificada
+        assert puzzle['difficulty'] == puzzle['rating']['band']
+    assert "rating" in generator.metrics.totals.seconds
+
+    again = WeeklyPuzzleGenerator(engine="backbite", store=LocalLevelStore(":memory:"), quiet=True)
+    assert again.regenerate_level(levels[2]['level'], 11, levels[0]['level'])['rating'] == levels[2]['rating']
+
+
+def test_target_difficulty_hits_planned_band():
+    """En generación dirigida la dificultad medida es la planificada (muy fácil cuenta como fácil)"""
+    generator = WeeklyPuzzleGenerator(engine="backbite", store=LocalLevelStore(":memory:"),
+                                      quiet=True, target_difficulty=True)
+    levels = generator.generate_weekly_levels(15, seed=4)
+    planner = WeeklyPuzzleGenerator(engine="backbite", store=LocalLevelStore(":memory:"), quiet=True)
+    planned = {level: difficulty for level, _, _, difficulty
+               in planner.plan_weekly_levels(15, levels[0]['level'], seed=4)}
+    for puzzle in levels:
+        assert puzzle['difficulty'] == puzzle['rating']['band']
+        assert weekly_difficulty(puzzle['difficulty']) == planned[puzzle['level']]
+
+    bands = generator.metrics.bands
+    assert sum(band.levels for band in bands.values()) == 15
+    assert all(band.get("ratings") >= band.get("steered") > 0 for band in bands.values())
+
+    again = WeeklyPuzzleGenerator(engine="backbite", store=LocalLevelStore(":memory:"),
+                                  quiet=True, target_difficulty=True)
+    assert again.regenerate_level(levels[4]['level'], 4, levels[0]['level']) == levels[4]
+
+
+if __name__ == "__main__":
+    test_fully_numbered_grid_is_forced()
+    test_rating_accounts_for_every_step()
+    test_fewer_clues_rate_harder()
+    test_bands_are_ordered()
+    test_generated_levels_carry_rating()
+    test_target_difficulty_hits_planned_band()
+    print("✅ Pruebas de la valoración de dificultad completadas")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la huella canónica de puzzles (no requieren Firebase)
+"""
+
+import random
+
+from fingerprint import puzzle_fingerprint, grid_from_firestore, solution_from_firestore
+from path_corpus import transform_path, NUM_VARIANTS
+from uniqueness import grid_from_positions, evenly_spaced_positions
+from constructive_paths import generate_backbite_path
+from board import Board, BLOCKED_CELL
+
+
+def test_fingerprint_ignores_symmetries():
+    """Las 16 variantes de un nivel comparten huella; otro nivel no"""
+    rng = random.Random(4)
+    size = 5
+    path = generate_backbite_path(size, rng=rng)
+    positions = evenly_spaced_positions(len(path), 5)
+    fingerprint = puzzle_fingerprint(grid_from_positions(size, path, positions), path)
+
+    for variant in range(NUM_VARIANTS):
+        image = transform_path(path, size, variant)
+        image_positions = positions if variant < NUM_VARIANTS // 2 else [len(path) - 1 - p for p in positions]
+        grid = grid_from_positions(size, image, image_positions)
+        assert puzzle_fingerprint(grid, image) == fingerprint
+
+    other = generate_backbite_path(size, rng=rng)
+    assert puzzle_fingerprint(grid_from_positions(size, other, positions), other) != fingerprint
+
+
+def test_fingerprint_on_boards():
+    """En rectángulos solo cuentan las simetrías que conservan la forma; los huecos no se renumeran"""
+    board = Board.create(3, 4, blocked=[(1, 1), (0, 3)])
+    path = [(0, 0), (1, 0), (2, 0), (2, 1), (2, 2), (2, 3), (1, 3), (1, 2), (0, 2), (0, 1)]
+    grid = grid_from_positions(3, path, [0, 4, 9], board)
+    fingerprint = puzzle_fingerprint(grid, path)
+
+    # Giro 180° y recorrido al revés: mismo puzzle
+    turned = [(2 - x, 3 - y) for x, y in reversed(path)]
+    turned_grid = [[grid[2 - x][3 - y] for y in range(4)] for x in range(3)]
+    turned_grid = [[(4 - value if value > 0 else value) for value in row] for row in turned_grid]
+    assert puzzle_fingerprint(turned_grid, turned) == fingerprint
+    assert sum(value == BLOCKED_CELL for row in turned_grid for value in row) == 2
+
+    # Las paredes distinguen niveles con el mismo grid y solución
+    assert puzzle_fingerprint(grid, path, [((0, 0), (0, 1))]) != fingerprint
+
+
+def test_firestore_format():
+    """Los niveles guardados en Firestore se leen con el mismo formato que se generan"""
+    grid_data = {"1": [0, 2], "0": [1, 3]}
+    assert grid_from_firestore(grid_data) == [[1, 3], [0, 2]]
+    assert solution_from_firestore([{"x": 0, "y": 0}, {"x": 1, "y": 0}]) == [(0, 0), (1, 0)]
+
+
+if __name__ == "__main__":
+    test_fingerprint_ignores_symmetries()
+    test_fingerprint_on_boards()
+    test_firestore_format()
+    print("✅ Pruebas de huellas completadas")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la auditoría del catálogo (no requieren Firebase)
+"""
+
+import copy
+import random
+
+from level_audit import (audit_levels, audit_chunk, level_from_document, ISSUE_FORMAT, ISSUE_CELLS,
+                         ISSUE_CONTINUITY, ISSUE_COVERAGE, ISSUE_CLUES, ISSUE_AMBIGUOUS, ISSUE_UNCHECKED)
+from board import Board
+from level_store import LocalLevelStore
+from constructive_paths import generate_backbite_path
+from uniqueness import place_unique_clues, evenly_spaced_positions, grid_from_positions
+
+
+def make_level(level: int, size: int, rng: random.Random):
+    """Nivel correcto con solución única, como lo escriben los generadores"""
+    path = generate_backbite_path(size, rng=rng)
+    positions = place_unique_clues(size, path, evenly_spaced_positions(len(path), size))
+    return {"level": level, "difficulty": "normal", "gridSize": size,
+            "grid": grid_from_positions(size, path, positions), "solution": [list(cell) for cell in path]}
+
+
+def corrupted_levels(rng: random.Random):
+    """Un nivel estropeado de cada forma, con el problema que se espera"""
+    base = make_level(100, 5, rng)
+    broken = []
+
+    def variant(level: int, issue: str, change):
+        puzzle = copy.deepcopy(base)
+        puzzle["level"] = level
+        change(puzzle)
+        broken.append((puzzle, issue))
+
+    def swap_steps(p):
+        p["solution"][3], p["solution"][7] = p["solution"][7], p["solution"][3]
+
+    def repeat_cell(p):
+        p["solution"][-1] = p["solution"][-3]
+
+    def swap_clues(p):
+        (x1, y1), (x2, y2) = [cell for cell in p["solution"] if p["grid"][cell[0]][cell[1]] in (2, 3)]
+        p["grid"][x1][y1], p["grid"][x2][y2] = p["grid"][x2][y2], p["grid"][x1][y1]
+
+    def ambiguous(p):
+        p["grid"] = [[0] * 5 for _ in range(5)]
+        (x1, y1), (x2, y2) = p["solution"][0], p["solution"][-1]
+        p["grid"][x1][y1], p["grid"][x2][y2] = 1, 2
+
+    variant(101, ISSUE_CONTINUITY, swap_steps)
+    variant(102, ISSUE_COVERAGE, repeat_cell)
+    variant(103, ISSUE_CLUES, swap_clues)
+    variant(104, ISSUE_COVERAGE, lambda p: p["solution"].pop())
+    variant(105, ISSUE_CELLS, lambda p: p["solution"][-1].__setitem__(1, 9))
+    variant(106, ISSUE_FORMAT, lambda p: p["grid"].pop())
+    variant(107, ISSUE_FORMAT, lambda p: p.pop("solution"))
+    variant(108, ISSUE_FORMAT, lambda p: p["grid"][0].__setitem__(0, "x"))
+    variant(109, ISSUE_AMBIGUOUS, ambiguous)
+    return broken
+
+
+def documents(puzzles):
+    return [(f"level_{p['level']:04d}", p) for p in puzzles]
+
+
+def test_audit_flags_each_corruption():
+    """Cada forma de estropear un nivel se detecta y los niveles correctos pasan"""
+    rng = random.Random(6)
+    good = [make_level(level, rng.randint(4, 6), rng) for level in range(1, 31)]
+    broken = corrupted_levels(rng)
+
+    report = audit_levels(documents(good + [puzzle for puzzle, _ in broken]), chunk_size=7)
+    assert report.audited == len(good) + len(broken)
+
+    found = {issue.level: issue.issues for issue in report.issues}
+    assert set(found) == {puzzle["level"] for puzzle, _ in broken}
+    for puzzle, expected in broken:
+        assert expected in found[puzzle["level"]], (puzzle["level"], found[puzzle["level"]])
+    assert not report.ok and len(report.ambiguous) == 1 and len(report.corrupt) == len(broken) - 1
+
+    # Con un presupuesto mínimo la unicidad queda sin verificar, no se da por buena
+    unchecked = audit_chunk([level_from_document("x", broken[-1][0])], node_budget=1)
+    assert unchecked[0].issues == [ISSUE_UNCHECKED]
+
+
+def test_parallel_audit_matches_serial():
+    """Repartir los lotes entre procesos da el mismo informe"""
+    rng = random.Random(7)
+    puzzles = [make_level(level, 4, rng) for level in range(1, 21)] + [p for p, _ in corrupted_levels(rng)]
+    serial = audit_levels(documents(puzzles), chunk_size=5)
+    parallel = audit_levels(documents(puzzles), workers=2, chunk_size=5)
+    assert serial.issues == parallel.issues and serial.audited == parallel.audited
+
+
+def test_audit_reads_firestore_documents_and_boards():
+    """Documentos en formato Firestore (almacén local) y tableros con paredes"""
+    generated = []
+    rng = random.Random(8)
+    for level in range(1, 6):
+        generated.append(make_level(level, 5, rng))
+
+    # Un tablero con paredes: una pared atravesada por la solución es un paso inválido
+    board = Board.create(3, 3, walls=[((0, 0), (0, 1))])
+    snake = [(0, 0), (1, 0), (2, 0), (2, 1), (1, 1), (0, 1), (0, 2), (1, 2), (2, 2)]
+    grid = grid_from_positions(3, snake, range(9), board)
+    generated.append({"level": 6, "difficulty": "normal", "gridSize": 3, "grid": grid,
+                      "solution": snake, "board": board.to_dict()})
+    through_wall = [(0, 2), (0, 1), (0, 0), (1, 0), (2, 0), (2, 1), (1, 1), (1, 2), (2, 2)]
+    generated.append({"level": 7, "difficulty": "normal", "gridSize": 3,
+                      "grid": grid_from_positions(3, through_wall, range(9), board),
+                      "solution": through_wall, "board": board.to_dict()})
+
+    store = LocalLevelStore(":memory:")
+    store.write_levels(generated)
+    report = audit_levels(store.stream_levels())
+    assert report.audited == 7
+    assert [(issue.level, issue.issues) for issue in report.issues] == [(7, [ISSUE_CONTINUITY])]
+
+
+if __name__ == "__main__":
+    test_audit_flags_each_corruption()
+    test_parallel_audit_matches_serial()
+    test_audit_reads_firestore_documents_and_boards()
+    print("✅ Pruebas de la auditoría completadas")
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la reserva de números de nivel (no requieren Firebase)
+Las transacciones de level_counter.py corren sobre un Firestore falso en
+memoria: las escrituras se aplican al confirmar y se descartan si la
+función transaccional lanza una excepción.
+"""
+
+from level_counter import (LevelNumberAllocator, reserve_level_block, reserve_level_range,
+                           release_level_block, read_next_level)
+from level_store import FirestoreLevelStore, LocalLevelStore
+from constructive_paths import ENGINE_BACKBITE
+from production_generator import ProductionPuzzleGenerator
+from weekly_generator_based_on_production import WeeklyPuzzleGenerator
+
+
+class FakeSnapshot:
+    def __init__(self, data):
+        self.exists = data is not None
+        self._data = data or {}
+
+    def get(self, field):
+        return self._data[field]
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeDocument:
+    def __init__(self, db, path):
+        self.db = db
+        self.path = path
+
+    def get(self, transaction=None):
+        return FakeSnapshot(self.db.documents.get(self.path))
+
+
+class FakeQuery:
+    def __init__(self, db, collection):
+        self.db = db
+        self.collection = collection
+        self.count = None
+
+    def order_by(self, field, direction=None):
+        self.field = field
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def stream(self):
+        docs = [data for (collection, _), data in self.db.documents.items() if collection == self.collection]
+        docs.sort(key=lambda data: data[self.field], reverse=True)
+        return [FakeSnapshot(data) for data in docs[:self.count]]
+
+
+class FakeCollection(FakeQuery):
+    def document(self, doc_id):
+        return FakeDocument(self.db, (self.collection, doc_id))
+
+
+class FakeTransaction:
+    """Lo justo de Transaction para el decorador firestore.transactional"""
+    _read_only = False
+    _max_attempts = 1
+    _id = b"fake"
+
+    def __init__(self, db):
+        self.db = db
+        self.writes = []
+
+    def _clean_up(self):
+        self.writes = []
+
+    def _begin(self, retry_id=None):
+        self.db.transactions += 1
+
+    def _commit(self):
+        for path, data in self.writes:
+            self.db.documents[path] = {**self.db.documents.get(path, {}), **data}
+        self.writes = []
+
+    def _rollback(self):
+        self.writes = []
+
+    def set(self, ref, data):
+        self.writes.append((ref.path, data))
+
+    def update(self, ref, data):
+        self.writes.append((ref.path, data))
+
+
+class FakeFirestore:
+    def __init__(self, levels=()):
+        self.documents = {('levels', f'level_{level:04d}'): {'level': level} for level in levels}
+        self.transactions = 0
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+
+def fake_store(db: FakeFirestore) -> FirestoreLevelStore:
+    """FirestoreLevelStore sobre el Firestore falso (sin credenciales ni copia local)"""
+    store = FirestoreLevelStore.__new__(FirestoreLevelStore)
+    store.db = db
+    store.snapshot_file = None
+    return store
+
+
+def test_reserve_and_release():
+    """El contador arranca tras el nivel más alto y solo se devuelve el final del contador"""
+    db = FakeFirestore(levels=[1, 2, 7])
+    assert read_next_level(db) == 8
+    assert reserve_level_block(db, 5) == 8 and reserve_level_block(db, 3) == 13
+    assert read_next_level(db) == 16
+
+    # El primer bloque ya no está al final: no se puede devolver
+    assert not release_level_block(db, 13, 10)
+    assert release_level_block(db, 16, 14) and read_next_level(db) == 14
+
+
+def test_reserve_explicit_range():
+    """Un rango elegido a mano solo se reserva si nadie tiene esos números"""
+    db = FakeFirestore(levels=[4])
+    assert reserve_level_range(db, 10, 5) == 5 and read_next_level(db) == 15
+    try:
+        reserve_level_range(db, 12, 2)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Rango solapado aceptado")
+    assert read_next_level(db) == 15
+
+
+def test_allocator_blocks():
+    """Agotar el bloque reserva otro; restore continúa un bloque anterior"""
+    db = FakeFirestore()
+    allocator = LevelNumberAllocator(fake_store(db), block_size=2)
+    assert [allocator.next_level() for _ in range(5)] == [1, 2, 3, 4, 5]
+    assert db.transactions == 3 and allocator.block_end == 7
+
+    # Los números sin usar vuelven al contador
+    assert allocator.release() and read_next_level(db) == 6
+
+    resumed = LevelNumberAllocator(fake_store(db), block_size=2)
+    resumed.restore(4, 6)
+    assert [resumed.next_level() for _ in range(3)] == [4, 5, 6]
+
+    # Sin reservar solo se lee el contador y se cuenta localmente
+    dry = LevelNumberAllocator(fake_store(db), block_size=10, reserve=False)
+    assert dry.next_level() == read_next_level(db) and dry.release()
+
+
+def test_allocators_never_overlap():
+    """Dos generadores a la vez reciben números distintos aunque uno devuelva su sobrante"""
+    db = FakeFirestore(levels=range(1, 101))
+    first = LevelNumberAllocator(fake_store(db), block_size=3)
+    second = LevelNumberAllocator(fake_store(db), block_size=4)
+    given = []
+    for _ in range(7):
+        given += [first.next_level(), second.next_level()]
+    assert len(set(given)) == len(given) and min(given) == 101
+
+    # El segundo ya no es el último en reservar: su sobrante no se devuelve
+    assert not second.release()
+    assert first.release()
+    third = LevelNumberAllocator(fake_store(db), block_size=5)
+    assert not set(third.next_level() for _ in range(5)) & set(given)
+
+    # Un rango manual no puede caer dentro de lo ya repartido
+    claimed = LevelNumberAllocator(fake_store(db), block_size=3)
+    try:
+        claimed.claim(max(given))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Rango reservado dos veces")
+
+
+def test_reservation_errors_stop_generation():
+    """Un fallo al reservar no se cambia por un número inventado"""
+    class FailingStore(LocalLevelStore):
+        def reserve_levels(self, count):
+            raise ConnectionError("Firestore no disponible")
+
+    generator = ProductionPuzzleGenerator(engine=ENGINE_BACKBITE, store=FailingStore(":memory:"), quiet=True)
+    try:
+        generator.generate_puzzle(4, 4)
+    except ConnectionError:
+        pass
+    else:
+        raise AssertionError("Nivel generado sin número reservado")
+
+    # --start-level dentro de un bloque ya reservado por otra ejecución
+    store = LocalLevelStore(":memory:")
+    store.reserve_levels(10)
+    weekly = WeeklyPuzzleGenerator(engine=ENGINE_BACKBITE, store=store, quiet=True)
+    try:
+        weekly.generate_weekly_levels(2, start_level=5, seed=1)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Rango de --start-level sin reservar")
+    assert [p['level'] for p in weekly.generate_weekly_levels(2, start_level=11, seed=1)] == [11, 12]
+    assert store.read_next_level() == 13
+
+
+if __name__ == "__main__":
+    test_reserve_and_release()
+    test_reserve_explicit_range()
+    test_allocator_blocks()
+    test_allocators_never_overlap()
+    test_reservation_errors_stop_generation()
+    print("✅ Pruebas del contador de niveles completadas")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la copia local de niveles (no requieren Firebase)
+"""
+
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from level_snapshot import LevelSnapshot
+
+
+class FakeLevels:
+    """Colección `levels` en memoria que cuenta los documentos leídos"""
+
+    def __init__(self):
+        self.docs = {}
+        self.reads = 0
+
+    def add(self, level: int, created_at: datetime):
+        self.docs[f"level_{level:04d}"] = {
+            "level": level, "gridSize": 4, "difficulty": "fácil", "createdAt": created_at,
+            "grid": {"0": [1, 0, 0, 0], "1": [0, 0, 0, 0], "2": [0, 0, 0, 0], "3": [0, 0, 0, 2]},
+        }
+
+    def collection(self, name):
+        return self
+
+    def where(self, field, op, value):
+        assert (field, op) == ("createdAt", ">")
+        return SimpleNamespace(stream=lambda: self._stream(lambda d: d["createdAt"] > value))
+
+    def stream(self):
+        return self._stream(lambda d: True)
+
+    def _stream(self, keep):
+        for doc_id, data in self.docs.items():
+            if keep(data):
+                self.reads += 1
+                yield SimpleNamespace(id=doc_id, to_dict=lambda data=data: dict(data))
+
+
+def test_snapshot_refresh_is_incremental():
+    """Tras la primera sincronización solo se leen los documentos nuevos"""
+    t0 = datetime(2026, 1, 5, tzinfo=timezone.utc)
+    db = FakeLevels()
+    for level in range(1, 51):
+        db.add(level, t0)
+
+    snapshot = LevelSnapshot(":memory:")
+    assert snapshot.refresh(db) == 50
+    assert snapshot.watermark == t0
+
+    for level in range(51, 54):
+        db.add(level, t0 + timedelta(days=7))
+    db.reads = 0
+    assert snapshot.refresh(db) == 3
+    assert db.reads == 3
+
+    db.reads = 0
+    assert snapshot.refresh(db) == 0 and db.reads == 0
+
+    levels = snapshot.levels()
+    assert [lv["level"] for lv in levels] == list(range(1, 54))
+    assert levels[0]["num_numbers"] == 2 and levels[0]["fingerprint"]
+
+
+def test_snapshot_rectangles_and_old_schema():
+    """Los rectángulos (rows/cols) se guardan sin gridSize y una copia antigua se rehace"""
+    t0 = datetime(2026, 1, 5, tzinfo=timezone.utc)
+    db = FakeLevels()
+    db.add(1, t0)
+    rect = dict(db.docs["level_0001"], level=2, rows=4, cols=6)
+    del rect["gridSize"]
+    db.docs["level_0002"] = rect
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "levels.sqlite")
+        # Esquema de la versión 1: grid_size obligatorio y sin versión en meta
+        conn = sqlite3.connect(filename)
+        conn.executescript("""
+            CREATE TABLE levels (doc_id TEXT PRIMARY KEY, level INTEGER NOT NULL,
+                grid_size INTEGER NOT NULL, difficulty TEXT NOT NULL,
+                num_numbers INTEGER NOT NULL, fingerprint TEXT, created_at TEXT);
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            INSERT INTO meta VALUES ('watermark', '2030-01-01T00:00:00+00:00');
+        """)
+        conn.commit()
+        conn.close()
+
+        snapshot = LevelSnapshot(filename)
+        assert snapshot.watermark is None
+        assert snapshot.refresh(db) == 2
+        assert [lv["gridSize"] for lv in snapshot.levels()] == [4, None]
+
+
+if __name__ == "__main__":
+    test_snapshot_refresh_is_incremental()
+    test_snapshot_rectangles_and_old_schema()
+    print("✅ Pruebas de la copia local completadas")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Pruebas del almacén local de niveles (no requieren Firebase)
+"""
+
+import os
+import tempfile
+
+from level_store import LevelStore, LocalLevelStore
+from level_counter import LevelNumberAllocator
+from board import Board
+from uniqueness import grid_from_positions
+
+
+def make_puzzle(level: int):
+    return {"level": level, "difficulty": "fácil", "gridSize": 2,
+            "grid": [[1, 0], [0, 2]], "solution": [(0, 0), (0, 1), (1, 1), (1, 0)]}
+
+
+def test_local_store_round_trip():
+    """Lo que se escribe se vuelve a cargar con el mismo resumen que en Firestore"""
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "levels.sqlite")
+        store = LocalLevelStore(filename)
+        report = store.write_levels([make_puzzle(1), make_puzzle(2)])
+        assert report.ok and report.uploaded == 2
+
+        levels = LocalLevelStore(filename).load_levels()
+        assert [lv["level"] for lv in levels] == [1, 2]
+        assert levels[0]["num_numbers"] == 2 and levels[0]["fingerprint"]
+
+
+def test_level_blocks_do_not_overlap():
+    """Dos asignadores sobre el mismo fichero reciben bloques distintos"""
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "levels.sqlite")
+        LocalLevelStore(filename).write_levels([make_puzzle(1), make_puzzle(2)])
+
+        first = LevelNumberAllocator(LocalLevelStore(filename), block_size=5)
+        second = LevelNumberAllocator(LocalLevelStore(filename), block_size=5)
+        assert [first.next_level(), first.next_level()] == [3, 4]
+        assert second.next_level() == 8
+
+        # El primero no puede devolver sus números: el segundo reservó después
+        assert not first.release()
+        assert second.release()
+        assert LocalLevelStore(filename).read_next_level() == 9
+
+
+def test_board_levels_reload():
+    """Niveles rectangulares y con huecos se guardan y se vuelven a cargar con huella"""
+    rectangle = Board.create(4, 6)
+    snake = [(x, y if x % 2 == 0 else 5 - y) for x in range(4) for y in range(6)]
+    holed = Board.create(3, 3, blocked=[(1, 1)], walls=[((0, 0), (1, 0))])
+    ring = [(0, 0), (0, 1), (0, 2), (1, 2), (2, 2), (2, 1), (2, 0), (1, 0)]
+
+    puzzles = []
+    for level, (board, path) in enumerate(((rectangle, snake), (holed, ring)), 1):
+        puzzles.append({"level": level, "difficulty": "normal", "gridSize": board.rows,
+                        "grid": grid_from_positions(board.rows, path, [0, 5, len(path) - 1], board),
+                        "solution": path, "board": board.to_dict()})
+    # Los rectángulos llevan filas y columnas en vez de gridSize
+    del puzzles[0]["gridSize"]
+    puzzles[0].update(rows=4, cols=6)
+
+    store = LocalLevelStore(":memory:")
+    store.write_levels(puzzles)
+    levels = store.load_levels()
+    assert [lv["level"] for lv in levels] == [1, 2]
+    assert [lv["num_numbers"] for lv in levels] == [3, 3]
+    assert all(lv["fingerprint"] for lv in levels) and levels[0]["fingerprint"] != levels[1]["fingerprint"]
+    assert [lv["gridSize"] for lv in levels] == [None, 3]
+
+
+def test_incomplete_store_is_rejected():
+    """Un almacén al que le falta algún método (p. ej. reserve_level_range) no se puede crear"""
+    class ReadOnlyStore(LevelStore):
+        def load_levels(self):
+            return []
+
+    try:
+        ReadOnlyStore()
+    except TypeError as error:
+        assert "reserve_level_range" in str(error)
+    else:
+        raise AssertionError("Almacén incompleto instanciado")
+    assert not LocalLevelStore.__abstractmethods__
+
+
+if __name__ == "__main__":
+    test_local_store_round_trip()
+    test_level_blocks_do_not_overlap()
+    test_board_levels_reload()
+    test_incomplete_store_is_rejected()
+    print("✅ Pruebas del almacén local completadas")
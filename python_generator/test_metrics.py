@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Pruebas de las métricas de generación (no requieren Firebase)
+"""
+
+import os
+import json
+import tempfile
+
+from metrics import GenerationMetrics, LevelMetrics, STAGE_PATH_SEARCH, STAGE_UPLOAD
+from level_store import LocalLevelStore
+from constructive_paths import ENGINE_BACKBITE
+from weekly_generator_based_on_production import WeeklyPuzzleGenerator
+
+
+def test_levels_and_buckets():
+    """Los contadores van al nivel en curso, a su bucket y a los totales"""
+    metrics = GenerationMetrics()
+
+    metrics.start_level(5, 8, level=1)
+    metrics.count("nodes", 100)
+    metrics.count("duplicates")
+    with metrics.stage(STAGE_PATH_SEARCH):
+        pass
+    metrics.finish_level(1, True)
+
+    metrics.start_level(5, 8, level=2)
+    worker = LevelMetrics()
+    worker.add("nodes", 50)
+    metrics.merge(worker)
+    metrics.finish_level(2, False)
+
+    # Fuera de un nivel: solo totales
+    metrics.count("store_operations", 3)
+    with metrics.stage(STAGE_UPLOAD):
+        pass
+
+    assert [level.get("nodes") for level in metrics.levels] == [100, 50]
+    bucket = metrics.buckets[(5, 8)]
+    assert (bucket.levels, bucket.successes, bucket.get("nodes"), bucket.get("duplicates")) == (2, 1, 150, 1)
+    assert bucket.get("store_operations") == 0
+    assert metrics.totals.get("nodes") == 150 and metrics.totals.get("store_operations") == 3
+    assert STAGE_UPLOAD in metrics.totals.seconds and STAGE_UPLOAD not in bucket.seconds
+
+
+def test_exports():
+    """JSON y texto de Prometheus"""
+    metrics = GenerationMetrics()
+    metrics.start_level(4, 3, target="normal")
+    metrics.count("nodes", 7)
+    metrics.count("steered", 4)
+    metrics.count("off_target", 1)
+    metrics.finish_level(10, True)
+
+    text = metrics.prometheus_text()
+    assert 'puzzlepath_levels_total{size="4",numbers="3",result="ok"} 1' in text
+    assert 'puzzlepath_target_candidates_total{band="normal",result="accepted"} 3' in text
+    assert "puzzlepath_nodes_total 7" in text
+    assert "# TYPE puzzlepath_stage_seconds_total counter" in text
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "metrics.json")
+        metrics.write_json(filename)
+        with open(filename) as f:
+            data = json.load(f)
+    assert data["levels"][0]["level"] == 10
+    assert data["buckets"][0]["size"] == 4 and data["buckets"][0]["counts"]["nodes"] == 7
+
+
+def test_weekly_generator_records_levels():
+    """Una campaña registra un nivel por hueco con sus intentos"""
+    generator = WeeklyPuzzleGenerator(engine=ENGINE_BACKBITE, store=LocalLevelStore(":memory:"), quiet=True)
+    puzzles = generator.generate_weekly_levels(3, start_level=1, seed=5)
+
+    assert [level.level for level in generator.metrics.levels] == [p["level"] for p in puzzles]
+    assert generator.metrics.totals.get("attempts") >= 3
+    assert STAGE_PATH_SEARCH in generator.metrics.totals.seconds
+
+
+if __name__ == "__main__":
+    test_levels_and_buckets()
+    test_exports()
+    test_weekly_generator_records_levels()
+    print("✅ Pruebas de métricas completadas")
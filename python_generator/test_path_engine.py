@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Pruebas del motor de caminos hamiltonianos (no requieren Firebase)
+"""
+
+import random
+import tempfile
+
+from itertools import islice
+
+from path_engine import (search_hamiltonian_path, get_grid_tables, SearchStats, HamiltonianSearch,
+                         luby, restart_limits, RESTART_LUBY, RESTART_GEOMETRIC, RESTART_NONE,
+                         SEARCH_STRATEGIES, STRATEGY_BEAM, STRATEGY_WARNSDORFF, STRATEGY_HEURISTIC,
+                         strategy_for_size, parse_strategy_option, format_strategy_option,
+                         neighbors_connected, RING_SPLITS, get_neighbor_order, DEFAULT_DIRECTIONS)
+from feasibility import has_hamiltonian_path, is_feasible_pair, feasible_pairs
+from constructive_paths import generate_backbite_path, serpentine_path, ENGINE_BACKTRACKING
+from path_corpus import (encode_path, decode_path, transform_path, canonical_path, build_corpus,
+                         load_corpus, NUM_VARIANTS)
+
+
+def is_hamiltonian(path, size, start, end) -> bool:
+    """Comprueba que el camino recorra todas las celdas una vez, de start a end"""
+    if not path or path[0] != start or path[-1] != end:
+        return False
+    if len(path) != size * size or len(set(path)) != len(path):
+        return False
+    return all(abs(x1 - x2) + abs(y1 - y2) == 1 for (x1, y1), (x2, y2) in zip(path, path[1:]))
+
+
+def test_grid_tables():
+    """Las tablas precalculadas describen bien un grid 4x4"""
+    tables = get_grid_tables(4)
+    assert tables.n_cells == 16
+    assert tables.degrees[0] == 2      # esquina
+    assert tables.degrees[1] == 3      # borde
+    assert tables.degrees[5] == 4      # interior
+    assert tables.neighbor_masks[0] == (1 << 1) | (1 << 4)
+
+
+def test_bitboard_search_finds_path():
+    """El motor encuentra caminos válidos en varios tamaños"""
+    for size, start, end in ((3, (0, 0), (2, 2)), (4, (0, 0), (3, 0)), (6, (0, 0), (0, 5))):
+        stats = SearchStats()
+        path = search_hamiltonian_path(size, start, end, stats=stats)
+        assert is_hamiltonian(path, size, start, end)
+        assert stats.nodes >= size * size
+
+
+def test_bitboard_search_impossible_pair():
+    """Un par imposible (misma paridad en grid par) se agota sin camino"""
+    assert search_hamiltonian_path(4, (0, 0), (1, 1)) is None
+
+
+def test_search_suspend_and_resume():
+    """Una búsqueda troceada en presupuestos pequeños acaba igual que de una vez"""
+    whole = HamiltonianSearch(6, (0, 0), (0, 5))
+    assert whole.run() == HamiltonianSearch.FOUND
+
+    sliced = HamiltonianSearch(6, (0, 0), (0, 5))
+    while sliced.run(max_nodes=7) == HamiltonianSearch.SUSPENDED:
+        pass
+    assert sliced.status == HamiltonianSearch.FOUND
+    assert sliced.nodes == whole.nodes
+    assert sliced.get_path() == whole.get_path()
+
+
+def test_pruning_keeps_paths():
+    """Con poda el camino es el mismo que sin ella, con muchos menos nodos"""
+    rng = random.Random(11)
+    for size in (4, 5):
+        for _ in range(15):
+            start, end = rng.sample([(x, y) for x in range(size) for y in range(size)], 2)
+            directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+            rng.shuffle(directions)
+            plain = HamiltonianSearch(size, start, end, directions, prune=False)
+            pruned = HamiltonianSearch(size, start, end, directions)
+            assert pruned.run() == plain.run()
+            assert pruned.get_path() == plain.get_path()
+            assert pruned.nodes <= plain.nodes
+
+    search = HamiltonianSearch(8, (0, 0), (3, 4))
+    assert search.run(max_nodes=5000) == HamiltonianSearch.FOUND
+    assert search.pruned > 0 and is_hamiltonian(search.get_path(), 8, (0, 0), (3, 4))
+
+
+def test_connectivity_checks():
+    """Flood fill sobre bitboard y tabla local de cortes"""
+    tables = get_grid_tables(4)
+    column = sum(1 << (x * 4 + 1) for x in range(4))
+    region = tables.full_mask & ~column
+    left, right = 1 << 0, 1 << 2
+    assert not neighbors_connected(left | right, region, tables)
+    assert neighbors_connected(left | right, region | (1 << 13), tables)
+
+    # Centro con vecinos libres arriba y abajo y diagonales ocupadas: puede partir
+    assert RING_SPLITS[0b010_000_010]
+    # Vecinos de arriba y derecha unidos por la diagonal: no
+    assert not RING_SPLITS[0b000_000_110 | 0b000_100_000]
+
+
+def test_feasibility_oracle_matches_search():
+    """El oráculo coincide con la búsqueda exhaustiva en todos los pares 4x4"""
+    cells = [(i, j) for i in range(4) for j in range(4)]
+    for start in cells:
+        for end in cells:
+            if start == end:
+                continue
+            found = search_hamiltonian_path(4, start, end) is not None
+            assert found == is_feasible_pair(4, start, end)
+
+
+def test_feasibility_forbidden_cases():
+    """Casos prohibidos de rectángulos estrechos"""
+    assert not has_hamiltonian_path(1, 4, (0, 1), (0, 3))    # F1
+    assert not has_hamiltonian_path(2, 4, (0, 1), (1, 1))    # F2
+    assert has_hamiltonian_path(2, 4, (0, 0), (1, 0))
+    assert not has_hamiltonian_path(3, 4, (1, 0), (1, 3))    # F3
+    assert all(is_feasible_pair(5, s, e) for s, e in feasible_pairs(5))
+
+
+def test_backbite_paths_are_hamiltonian():
+    """El motor constructivo siempre devuelve caminos válidos, también en grids grandes"""
+    rng = random.Random(7)
+    for size in (3, 4, 8, 12):
+        path = generate_backbite_path(size, rng=rng)
+        assert is_hamiltonian(path, size, path[0], path[-1])
+
+
+def test_backbite_matches_full_reversals():
+    """Invertir el lado más corto da los mismos caminos que invertir siempre el tramo intermedio"""
+    def reference(size, rng):
+        path = serpentine_path(size)
+        neighbors = get_neighbor_order(size, DEFAULT_DIRECTIONS)
+        for _ in range(20 * size * size):
+            choice = rng.randrange(8)
+            options = neighbors[path[0] if choice < 4 else path[-1]]
+            if choice % 4 >= len(options):
+                continue
+            i = path.index(options[choice % 4])
+            if choice < 4 and i > 1:
+                path[:i] = path[i - 1::-1]
+            elif choice >= 4 and i < len(path) - 2:
+                path[i + 1:] = path[:i:-1]
+        return [divmod(c, size) for c in path]
+
+    for size in (2, 3, 5, 6):
+        for seed in range(10):
+            assert generate_backbite_path(size, rng=random.Random(seed)) == reference(size, random.Random(seed))
+
+
+def test_corpus_encoding_and_symmetries():
+    """Los caminos sobreviven al empaquetado y sus 16 imágenes comparten forma canónica"""
+    rng = random.Random(5)
+    for size in (3, 5, 8):
+        path = generate_backbite_path(size, rng=rng)
+        assert decode_path(encode_path(path, size), size) == path
+        canonical = canonical_path(path, size)
+        for variant in range(NUM_VARIANTS):
+            image = transform_path(path, size, variant)
+            assert is_hamiltonian(image, size, image[0], image[-1])
+            assert canonical_path(image, size) == canonical
+
+
+def test_corpus_build_is_incremental():
+    """El constructor añade caminos nuevos a un fichero existente sin repetir"""
+    rng = random.Random(9)
+    with tempfile.TemporaryDirectory() as directory:
+        assert build_corpus(5, 20, directory, rng=rng) == 20
+        assert build_corpus(5, 15, directory, rng=rng) == 15
+        corpus = load_corpus(5, directory)
+        assert len(corpus) == 35
+        paths = {tuple(corpus.get_path(i)) for i in range(len(corpus))}
+        assert len(paths) == 35
+        sampled = corpus.sample_path(rng)
+        assert is_hamiltonian(sampled, 5, sampled[0], sampled[-1])
+
+        # 3x3 solo tiene 3 caminos distintos salvo simetrías
+        assert build_corpus(3, 50, directory, rng=rng) == 3
+
+        # Con backtracking cada búsqueda tiene presupuesto: agotarlo es un fallo, no un cuelgue
+        assert build_corpus(6, 5, directory, engine=ENGINE_BACKTRACKING, rng=rng, node_budget=1) == 0
+        assert build_corpus(6, 5, directory, engine=ENGINE_BACKTRACKING, rng=rng) == 5
+
+
+def test_restart_schedules():
+    """Secuencia de Luby y cortes de cada calendario"""
+    assert [luby(i) for i in range(1, 16)] == [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8]
+    unit = next(restart_limits(RESTART_LUBY, 4))
+    assert list(islice(restart_limits(RESTART_LUBY, 4), 7)) == [unit * k for k in (1, 1, 2, 1, 1, 2, 4)]
+    geometric = list(islice(restart_limits(RESTART_GEOMETRIC, 4), 5))
+    assert geometric[0] == unit and geometric == sorted(geometric)
+    assert list(islice(restart_limits(RESTART_NONE, 4), 3)) == [None] * 3
+
+
+def test_weekly_search_with_restarts():
+    """Con calendario la búsqueda es reproducible y reinicia en vez de suspender"""
+    from level_store import LocalLevelStore
+    from weekly_generator_based_on_production import WeeklyPuzzleGenerator
+
+    generator = WeeklyPuzzleGenerator(store=LocalLevelStore(":memory:"), quiet=True)
+    paths = []
+    for _ in range(2):
+        rng = random.Random(5)
+        start, end = generator.select_start_end_points(7, rng)
+        paths.append(generator.find_hamiltonian_path(7, start, end, rng))
+    assert paths[0] == paths[1] and is_hamiltonian(paths[0], 7, paths[0][0], paths[0][-1])
+    assert not generator.suspended_searches
+
+
+def test_weekly_search_resumes_suspended_pair():
+    """El siguiente candidato del mismo tamaño continúa la búsqueda suspendida en vez de empezar otra"""
+    from level_store import LocalLevelStore
+    from weekly_generator_based_on_production import WeeklyPuzzleGenerator
+
+    generator = WeeklyPuzzleGenerator(store=LocalLevelStore(":memory:"), quiet=True, restart_schedule=RESTART_NONE)
+    start, end = (1, 2), (1, 5)
+    full = HamiltonianSearch(6, start, end)
+    assert full.run() == HamiltonianSearch.FOUND and full.nodes > 1000
+
+    # Presupuesto agotado a medias: la búsqueda queda guardada para su tamaño
+    assert generator.find_hamiltonian_path(6, start, end, random.Random(1), node_budget=full.nodes // 2) is None
+    assert generator.suspended_searches[6].nodes == full.nodes // 2
+
+    # Pedir otros extremos a mano no la toca
+    path = generator.find_hamiltonian_path(6, (0, 0), (5, 0), random.Random(1))
+    assert is_hamiltonian(path, 6, (0, 0), (5, 0)) and 6 in generator.suspended_searches
+
+    # El candidato toma los extremos suspendidos y termina con los nodos que faltaban
+    before = generator.metrics.totals.get("nodes")
+    path, _ = generator.build_puzzle_candidate(6, 6, random.Random(2))
+    resumed = generator.metrics.totals.get("nodes") - before
+    assert is_hamiltonian(path, 6, start, end) and not generator.suspended_searches
+    assert full.nodes // 2 + resumed == full.nodes < full.nodes // 2 + full.nodes
+
+
+def test_search_strategies():
+    """Todas las estrategias encuentran caminos válidos; la aleatoria es reproducible"""
+    for name, strategy in SEARCH_STRATEGIES.items():
+        for size, start, end in ((5, (0, 0), (4, 4)), (5, (0, 0), (2, 2))):
+            search = strategy.new_search(size, start, end, rng=random.Random(3))
+            assert search.run(max_nodes=200000) == HamiltonianSearch.FOUND, name
+            assert is_hamiltonian(search.get_path(), size, start, end), name
+
+    randomized = SEARCH_STRATEGIES["randomized"]
+    paths = [randomized.new_search(6, (0, 0), (5, 0), rng=random.Random(seed)) for seed in (1, 1, 2)]
+    for search in paths:
+        search.run()
+    assert paths[0].get_path() == paths[1].get_path()
+
+    # Sin generador no hay búsqueda: el desempate nunca sale del random global
+    try:
+        randomized.new_search(6, (0, 0), (5, 0))
+        assert False, "búsqueda sin rng aceptada"
+    except TypeError:
+        pass
+
+    # Beam de anchura 1 no prueba alternativas: como mucho un nodo por celda
+    beam = HamiltonianSearch(4, (0, 0), (0, 1), beam_width=1)
+    beam.run()
+    assert beam.nodes <= 16
+
+
+def test_strategy_selection():
+    """--strategy por tamaño y para todos; el resto usa la tabla por defecto"""
+    overrides = parse_strategy_option([STRATEGY_HEURISTIC, f"7={STRATEGY_BEAM}"])
+    assert overrides == {None: STRATEGY_HEURISTIC, 7: STRATEGY_BEAM}
+    assert parse_strategy_option(format_strategy_option(overrides)) == overrides
+    assert strategy_for_size(7, overrides).name == STRATEGY_BEAM
+    assert strategy_for_size(5, overrides).name == STRATEGY_HEURISTIC
+    assert strategy_for_size(12).name == STRATEGY_HEURISTIC
+
+    # La estrategia por defecto usa los mismos pesos que la búsqueda directa
+    search = strategy_for_size(6).new_search(6, (0, 0), (5, 0), rng=random.Random(1))
+    search.run()
+    assert search.get_path() == search_hamiltonian_path(6, (0, 0), (5, 0))
+    try:
+        parse_strategy_option(["dfs"])
+        assert False, "estrategia desconocida aceptada"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_grid_tables()
+    test_bitboard_search_finds_path()
+    test_bitboard_search_impossible_pair()
+    test_search_suspend_and_resume()
+    test_pruning_keeps_paths()
+    test_connectivity_checks()
+    test_feasibility_oracle_matches_search()
+    test_feasibility_forbidden_cases()
+    test_backbite_paths_are_hamiltonian()
+    test_backbite_matches_full_reversals()
+    test_corpus_encoding_and_symmetries()
+    test_corpus_build_is_incremental()
+    test_restart_schedules()
+    test_weekly_search_with_restarts()
+    test_weekly_search_resumes_suspended_pair()
+    test_search_strategies()
+    test_strategy_selection()
+    print("✅ Pruebas del motor completadas")
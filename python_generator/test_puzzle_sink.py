@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la salida en streaming (no requieren Firebase)
+"""
+
+import os
+import tempfile
+
+from puzzle_sink import JsonlSink, UploadSink, read_puzzles
+from level_store import LocalLevelStore
+from constructive_paths import ENGINE_BACKBITE
+from weekly_generator_based_on_production import WeeklyPuzzleGenerator
+
+
+def test_jsonl_sink_writes_each_puzzle_immediately():
+    """Cada puzzle está en disco en cuanto se escribe, sin esperar al cierre"""
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "levels.jsonl")
+        sink = JsonlSink(filename)
+        sink.write({"level": 1, "grid": [[1, 0], [0, 2]]})
+        assert [p["level"] for p in read_puzzles(filename)] == [1]
+
+        sink.write({"level": 2, "grid": [[0, 1], [2, 0]]})
+        sink.close()
+        assert [p["level"] for p in read_puzzles(filename)] == [1, 2]
+
+
+def test_upload_sink_batches():
+    """Se sube por bloques y lo que queda al cerrar"""
+    batches = []
+    sink = UploadSink(lambda puzzles: batches.append([p["level"] for p in puzzles]) or True, batch_size=2)
+    for level in range(5):
+        sink.write({"level": level})
+    assert batches == [[0, 1], [2, 3]]
+    sink.close()
+    assert batches == [[0, 1], [2, 3], [4]] and sink.ok
+
+
+def test_weekly_levels_are_lazy_and_match_parallel():
+    """El iterador entrega niveles uno a uno, igual en serie que en paralelo"""
+    serial = WeeklyPuzzleGenerator(engine=ENGINE_BACKBITE, store=LocalLevelStore(":memory:"), quiet=True)
+    levels = serial.iter_weekly_levels(6, start_level=101, seed=4)
+    first = next(levels)
+    assert first["level"] == 101
+    serial_puzzles = [first] + list(levels)
+
+    parallel = WeeklyPuzzleGenerator(engine=ENGINE_BACKBITE, store=LocalLevelStore(":memory:"), quiet=True)
+    assert list(parallel.iter_weekly_levels(6, start_level=101, seed=4, workers=2)) == serial_puzzles
+
+
+if __name__ == "__main__":
+    test_jsonl_sink_writes_each_puzzle_immediately()
+    test_upload_sink_batches()
+    test_weekly_levels_are_lazy_and_match_parallel()
+    print("✅ Pruebas de salida en streaming completadas")
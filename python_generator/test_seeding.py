@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la generación reproducible por nivel (no requieren Firebase)
+"""
+
+import os
+import random
+import tempfile
+
+from seeding import derive_level_seed, level_rng
+from constructive_paths import ENGINE_BACKBITE, ENGINE_BACKTRACKING, ENGINE_CORPUS
+from weekly_generator_based_on_production import WeeklyPuzzleGenerator
+from level_store import LocalLevelStore
+
+
+def test_level_seeds_are_independent():
+    """La semilla de un nivel solo depende de (campaña, nivel, intento)"""
+    assert derive_level_seed(7, 103) == derive_level_seed(7, 103)
+    assert derive_level_seed(7, 103) != derive_level_seed(7, 104)
+    assert derive_level_seed(7, 103) != derive_level_seed(7, 103, 1)
+    assert level_rng(7, 103).random() == level_rng(7, 103).random()
+
+
+def test_regenerate_level_matches_campaign():
+    """Un nivel regenerado por separado coincide con el de la campaña completa"""
+    state = random.getstate()
+    campaign = WeeklyPuzzleGenerator(engine=ENGINE_BACKBITE, store=LocalLevelStore(":memory:"))
+    puzzles = campaign.generate_weekly_levels(4, start_level=101, seed=11)
+    assert random.getstate() == state    # el `random` global no se toca
+
+    for puzzle in puzzles:
+        single = WeeklyPuzzleGenerator(engine=ENGINE_BACKBITE, store=LocalLevelStore(":memory:"))
+        assert single.regenerate_level(puzzle["level"], 11, start_level=101) == puzzle
+
+
+def test_workers_match_serial():
+    """Con la misma semilla, en serie y con --workers 2 salen los mismos niveles"""
+    serial = WeeklyPuzzleGenerator(engine=ENGINE_BACKTRACKING, store=LocalLevelStore(":memory:"), quiet=True)
+    parallel = WeeklyPuzzleGenerator(engine=ENGINE_BACKTRACKING, store=LocalLevelStore(":memory:"), quiet=True)
+    puzzles = serial.generate_weekly_levels(8, start_level=101, seed=21)
+    assert len(puzzles) == 8
+    assert parallel.generate_weekly_levels(8, start_level=101, seed=21, workers=2) == puzzles
+
+
+def test_worker_errors_stop_the_run():
+    """Un error dentro de un worker llega al llamador igual que en serie y devuelve los números"""
+    with tempfile.TemporaryDirectory() as tmp:
+        # Corpus con cabecera inválida: construir el candidato lanza ValueError
+        for size in range(4, 9):
+            with open(os.path.join(tmp, f"paths_{size}.bin"), "wb") as f:
+                f.write(b"roto" * 10)
+
+        for workers in (1, 2):
+            store = LocalLevelStore(":memory:")
+            generator = WeeklyPuzzleGenerator(engine=ENGINE_CORPUS, corpus_dir=tmp, store=store, quiet=True)
+            try:
+                generator.generate_weekly_levels(4, seed=3, workers=workers)
+            except ValueError as error:
+                assert "corpus" in str(error)
+            else:
+                raise AssertionError("Error del worker ignorado")
+            assert store.read_next_level() == 1
+
+
+if __name__ == "__main__":
+    test_level_seeds_are_independent()
+    test_regenerate_level_matches_campaign()
+    test_workers_match_serial()
+    test_worker_errors_stop_the_run()
+    print("✅ Pruebas de semillas completadas")
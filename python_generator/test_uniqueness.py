@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Pruebas del solver de unicidad y de la colocación de números (no requieren Firebase)
+"""
+
+import random
+
+from uniqueness import (solve_clues, count_solutions, has_unique_solution, place_unique_clues,
+                        evenly_spaced_positions, grid_from_positions)
+from constructive_paths import generate_backbite_path
+
+
+def test_count_solutions_small_grid():
+    """Un 3x3 con solo los extremos tiene varias soluciones; numerado entero, una"""
+    open_grid = [[1, 0, 0],
+                 [0, 0, 0],
+                 [0, 0, 2]]
+    assert count_solutions(open_grid, limit=10) == 2
+
+    snake = [(0, 0), (0, 1), (0, 2), (1, 2), (1, 1), (1, 0), (2, 0), (2, 1), (2, 2)]
+    full_grid = grid_from_positions(3, snake, range(9))
+    assert has_unique_solution(full_grid)
+
+
+def test_solver_respects_clue_order():
+    """Las soluciones encontradas pasan por los números en orden"""
+    clue_cells = [0, 5, 15]    # 4x4: (0,0) -> (1,1) -> (3,3)
+    for solution in solve_clues(4, clue_cells, limit=50):
+        positions = [solution.index(c) for c in clue_cells]
+        assert positions == sorted(positions)
+        assert solution[0] == 0 and solution[-1] == 15
+
+
+def test_place_unique_clues():
+    """Tras la colocación, el camino generado es la única solución"""
+    rng = random.Random(3)
+    for size, num_numbers in ((4, 3), (5, 4), (6, 6)):
+        path = generate_backbite_path(size, rng=rng)
+        initial = evenly_spaced_positions(len(path), num_numbers)
+        for minimize in (False, True):
+            positions = place_unique_clues(size, path, initial, minimize=minimize)
+            grid = grid_from_positions(size, path, positions)
+            cells = [x * size + y for x, y in path]
+            assert solve_clues(size, [cells[p] for p in positions]) == [cells]
+            assert has_unique_solution(grid)
+
+
+def test_solver_with_prefix():
+    """Con un prefijo solo se devuelven las soluciones que empiezan así"""
+    clue_cells = [0, 8]    # 3x3: (0,0) -> (2,2), dos soluciones
+    solutions = solve_clues(3, clue_cells, limit=10)
+    for solution in solutions:
+        assert solve_clues(3, clue_cells, limit=10, prefix=solution[:2]) == [solution]
+    assert solve_clues(3, clue_cells, prefix=[4]) == []
+
+
+if __name__ == "__main__":
+    test_count_solutions_small_grid()
+    test_solver_respects_clue_order()
+    test_place_unique_clues()
+    test_solver_with_prefix()
+    print("✅ Pruebas de unicidad completadas")
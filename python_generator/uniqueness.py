@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Solver de unicidad y colocación mínima de números
+Cuenta las soluciones de un puzzle (hasta un límite, normalmente 2) con las
+reglas del juego: el camino empieza en el 1, pasa por los números en orden,
+recorre todas las celdas y termina en el número más alto. Con esa cuenta se
+colocan los números de forma que la solución sea única.
+
+Con `board` (ver board.py) todo funciona igual sobre tableros rectangulares,
+con huecos o con paredes; sin él, sobre el grid cuadrado de `size`.
+"""
+
+from typing import List, Tuple, Optional, Dict, Iterable
+from dataclasses import dataclass
+
+from path_engine import get_grid_tables, get_neighbor_order, DEFAULT_DIRECTIONS, flood_adjacency
+from board import Board, get_board_tables, get_board_neighbor_order
+
+Cell = Tuple[int, int]
+
+# Soluciones alternativas que se recogen por ronda al reparar la unicidad
+REPAIR_SOLUTION_LIMIT = 8
+
+# Presupuesto de nodos de cada ronda de reparación
+REPAIR_NODE_BUDGET = 15000
+
+# Presupuesto de nodos de cada prueba de eliminación al minimizar números
+MINIMIZE_NODE_BUDGET = 15000
+
+
+class SolverBudgetExceeded(Exception):
+    """El solver agotó su presupuesto de nodos sin terminar"""
+
+
+@dataclass
+class SolverStats:
+    """Contadores del solver (acumulables entre llamadas)"""
+    nodes: int = 0
+    calls: int = 0
+
+
+def clues_from_grid(grid: List[List[int]]) -> List[int]:
+    """Celdas (índice x * columnas + y) de los números del grid, ordenadas por número"""
+    cols = len(grid[0])
+    numbered = [(value, x * cols + y) for x, row in enumerate(grid) for y, value in enumerate(row) if value > 0]
+    numbered.sort()
+    return [cell for _, cell in numbered]
+
+
+def solve_clues(size: int, clue_cells: List[int], limit: int = 2,
+                stats: Optional[SolverStats] = None,
+                max_nodes: Optional[int] = None,
+                prefix: Optional[List[int]] = None,
+                board: Optional[Board] = None) -> List[List[int]]:
+    """Busca hasta `limit` soluciones dadas las celdas de los números en orden
+
+    Poda con las reglas del puzzle y con propagación de movimientos forzados:
+    tras cada paso, un vecino libre del extremo con un solo vecino libre más
+    tiene que ser la siguiente celda (si hay dos, la rama muere), y uno sin
+    ninguno es un callejón sin salida salvo que sea la celda final. Además,
+    las celdas libres tienen que seguir conectadas al extremo (flood fill con
+    desplazamientos de bits). Si se pasa `max_nodes` y se agota, lanza
+    SolverBudgetExceeded. Con `prefix` (celdas desde el 1, respetando el
+    orden de los números) solo se buscan soluciones que empiezan así.
+    """
+    if board is not None and not board.is_plain:
+        tables = get_board_tables(board)
+        n_cells = tables.n_cells
+        n_open = tables.n_open
+        full_mask = tables.open_mask
+        order = get_board_neighbor_order(board, DEFAULT_DIRECTIONS)
+    else:
+        tables = get_grid_tables(size)
+        n_cells = n_open = tables.n_cells
+        full_mask = tables.full_mask
+        order = get_neighbor_order(size, DEFAULT_DIRECTIONS)
+        board = None
+
+    if len(clue_cells) < 2 or len(set(clue_cells)) != len(clue_cells):
+        return []
+
+    start = clue_cells[0]
+    end = clue_cells[-1]
+    last_number = len(clue_cells)
+
+    clue_number = [0] * n_cells
+    for number, cell in enumerate(clue_cells, 1):
+        clue_number[cell] = number
+
+    prefix = prefix or [start]
+    if prefix[0] != start:
+        return []
+
+    degree = list(tables.degrees)
+    free = full_mask
+    expected = 2
+    for cell in prefix:
+        for n in order[cell]:
+            degree[n] -= 1
+        free &= ~(1 << cell)
+        if clue_number[cell]:
+            expected = clue_number[cell] + 1
+
+    neighbor_masks = tables.neighbor_masks
+    not_first_col = full_mask & ~sum(1 << (x * size) for x in range(size))
+    not_last_col = full_mask & ~sum(1 << (x * size + size - 1) for x in range(size))
+
+    # Máscara de los números pendientes a partir de cada número esperado
+    later_clues = [0] * (last_number + 2)
+    for number in range(last_number, 0, -1):
+        later_clues[number] = later_clues[number + 1] | (1 << clue_cells[number - 1])
+
+    def flood(seed: int, allowed: int) -> int:
+        if board is not None:
+            return flood_adjacency(seed, allowed, neighbor_masks)
+        reach = seed & allowed
+        while True:
+            grown = (reach | ((reach & not_last_col) << 1) | ((reach & not_first_col) >> 1)
+                     | (reach << size) | (reach >> size)) & allowed
+            if grown == reach:
+                return reach
+            reach = grown
+
+    def connected(head: int, expected: int) -> bool:
+        """Celdas libres conectadas al extremo y siguiente número alcanzable
+
+        El siguiente número tiene que poder alcanzarse sin pisar los números
+        posteriores, que todavía no se pueden visitar.
+        """
+        seed = neighbor_masks[head]
+        if flood(seed, free) != free:
+            return False
+        target = 1 << clue_cells[expected - 1]
+        blocked = later_clues[expected + 1]
+        return bool(flood(seed, free & ~blocked) & target)
+
+    path = list(prefix)
+    solutions: List[List[int]] = []
+    nodes = 0
+
+    def extend(head: int, expected: int, remaining: int) -> bool:
+        """Devuelve True cuando ya se alcanzó el límite de soluciones"""
+        nonlocal free, nodes
+        nodes += 1
+        if max_nodes is not None and nodes > max_nodes:
+            raise SolverBudgetExceeded()
+
+        if remaining == 0:
+            if head == end:
+                solutions.append(list(path))
+            return len(solutions) >= limit
+
+        # Vecinos libres del extremo y detección de movimientos forzados
+        options = []
+        forced = -1
+        for n in order[head]:
+            if not free >> n & 1:
+                continue
+            if n != end and degree[n] <= 1:
+                if degree[n] == 0 and remaining > 1:
+                    return False
+                if forced >= 0:
+                    return False
+                forced = n
+            options.append(n)
+
+        # La celda final sin vecinos libres solo vale como último paso
+        if degree[end] == 0 and free >> end & 1 and not (remaining == 1 and end in options):
+            return False
+
+        if forced >= 0:
+            options = [forced]
+        elif not connected(head, expected):
+            return False
+        elif len(options) > 1:
+            # Warnsdorff: primero las celdas con menos salidas
+            options.sort(key=degree.__getitem__)
+
+        for n in options:
+            number = clue_number[n]
+            if number:
+                if number != expected:
+                    continue
+                if number == last_number and remaining != 1:
+                    continue
+                next_expected = expected + 1
+            else:
+                next_expected = expected
+
+            free ^= 1 << n
+            for m in order[n]:
+                degree[m] -= 1
+            path.append(n)
+
+            done = extend(n, next_expected, remaining - 1)
+
+            path.pop()
+            for m in order[n]:
+                degree[m] += 1
+            free |= 1 << n
+
+            if done:
+                return True
+
+        return False
+
+    try:
+        extend(prefix[-1], expected, n_open - len(prefix))
+    finally:
+        if stats is not None:
+            stats.nodes += nodes
+            stats.calls += 1
+
+    return solutions
+
+
+def count_solutions(grid: List[List[int]], limit: int = 2,
+                    stats: Optional[SolverStats] = None, board: Optional[Board] = None) -> int:
+    """Número de soluciones del puzzle, sin pasar de `limit`"""
+    return len(solve_clues(len(grid), clues_from_grid(grid), limit, stats, board=board))
+
+
+def has_unique_solution(grid: List[List[int]], stats: Optional[SolverStats] = None,
+                        board: Optional[Board] = None) -> bool:
+    """True si el puzzle tiene exactamente una solución"""
+    return count_solutions(grid, 2, stats, board) == 1
+
+
+def grid_from_positions(size: int, path: List[Cell], positions: Iterable[int],
+                        board: Optional[Board] = None) -> List[List[int]]:
+    """Matriz con números 1..K en las posiciones (índices del camino) dadas"""
+    matrix = (board or Board.square(size)).create_matrix()
+    for number, pos in enumerate(sorted(positions), 1):
+        x, y = path[pos]
+        matrix[x][y] = number
+    return matrix
+
+
+def place_unique_clues(size: int, path: List[Cell], positions: Iterable[int],
+                       minimize: bool = False,
+                       stats: Optional[SolverStats] = None,
+                       board: Optional[Board] = None) -> List[int]:
+    """Ajusta las posiciones de los números para que `path` sea la única solución
+
+    1. Mientras exista una solución alternativa, se toma la primera celda en
+       la que se separa del camino: esa celda y la que ocupa la alternativa
+       aparecen en orden inverso en ambas soluciones, así que numerarlas
+       elimina la alternativa (y el conjunto siempre crece, luego termina).
+       Si una ronda agota su presupuesto, se añade un número en mitad del
+       tramo más largo sin números y se vuelve a probar.
+    2. Con `minimize`, se intenta quitar cada número intermedio y se mantiene
+       fuera si la solución sigue siendo única. Cada prueba tiene un
+       presupuesto de nodos; si no termina, el número se conserva, así que el
+       resultado sigue siendo único aunque puede no ser del todo irreducible.
+
+    Devuelve las posiciones (índices de `path`) ordenadas.
+    """
+    n_cells = len(path)
+    cols = board.cols if board is not None else size
+    index_of: Dict[int, int] = {x * cols + y: i for i, (x, y) in enumerate(path)}
+    cells = [x * cols + y for x, y in path]
+
+    chosen = set(positions) | {0, n_cells - 1}
+
+    def alternatives(current, limit: int, max_nodes: Optional[int] = None) -> List[List[int]]:
+        clue_cells = [cells[p] for p in sorted(current)]
+        return [s for s in solve_clues(size, clue_cells, limit, stats, max_nodes, board=board) if s != cells]
+
+    while True:
+        try:
+            others = alternatives(chosen, REPAIR_SOLUTION_LIMIT, REPAIR_NODE_BUDGET)
+        except SolverBudgetExceeded:
+            # Demasiado abierto para resolverlo barato: partir el tramo más largo
+            ordered = sorted(chosen)
+            gap, left = max((b - a, a) for a, b in zip(ordered, ordered[1:]))
+            chosen.add(left + gap // 2)
+            continue
+        if not others:
+            break
+        for alt in others:
+            split = next(i for i in range(n_cells) if alt[i] != cells[i])
+            chosen.add(split)
+            chosen.add(index_of[alt[split]])
+
+    if minimize:
+        for pos in sorted(chosen - {0, n_cells - 1}):
+            candidate = chosen - {pos}
+            try:
+                if not alternatives(candidate, 2, MINIMIZE_NODE_BUDGET):
+                    chosen = candidate
+            except SolverBudgetExceeded:
+                # Sin prueba de unicidad a tiempo: el número se queda
+                continue
+
+    return sorted(chosen)
+
+
+def evenly_spaced_positions(n_cells: int, num_numbers: int) -> List[int]:
+    """Posiciones de los números repartidos uniformemente (reparto original)"""
+    num_numbers = min(num_numbers, n_cells)
+    step = n_cells // (num_numbers - 1) if num_numbers > 1 else 1
+    positions = []
+    for i in range(num_numbers):
+        if i == 0:
+            positions.append(0)
+        elif i == num_numbers - 1:
+            positions.append(n_cells - 1)
+        else:
+            positions.append(i * step)
+    return positions
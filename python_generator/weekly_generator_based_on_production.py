@@ -13,22 +13,62 @@ import os
 import json
 import random
 import argparse
-from typing import List, Tuple, Optional, Dict
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Optional, Dict, Iterator
 from dataclasses import dataclass
 from enum import Enum
-import firebase_admin
-from firebase_admin import credentials, firestore
 from dotenv import load_dotenv
 
+from path_engine import (HamiltonianSearch, path_node_budget, restart_limits, RESTART_SCHEDULES,
+                         RESTART_LUBY, RESTART_NONE, SEARCH_STRATEGIES, STRATEGY_HEURISTIC,
+                         DEFAULT_STRATEGY, strategy_for_size, parse_strategy_option, format_strategy_option)
+from feasibility import is_feasible_pair, sample_feasible_pair
+from constructive_paths import (generate_backbite_path, ENGINE_BACKTRACKING, ENGINE_BACKBITE,
+                                ENGINE_CORPUS, PATH_ENGINES, MAX_SIZE_BY_ENGINE)
+from path_corpus import sample_corpus_path, DEFAULT_CORPUS_DIR
+from fingerprint import puzzle_fingerprint
+from level_snapshot import DEFAULT_SNAPSHOT_FILE
+from level_counter import LevelNumberAllocator
+from level_store import (LevelStore, FirestoreLevelStore, LocalLevelStore, create_store,
+                         LEVEL_STORES, STORE_FIRESTORE)
+from uniqueness import place_unique_clues, evenly_spaced_positions, grid_from_positions
+from board import Board
+from seeding import derive_level_seed, derive_seed, new_campaign_seed
+from puzzle_sink import JsonlSink, UploadSink
+from checkpoint import RunJournal, DEFAULT_CHECKPOINT_FILE
+from config_space import ConfigSpace
+from difficulty_rating import rate_puzzle, DifficultyRating
+from metrics import (GenerationMetrics, print_metrics_summary, STAGE_PATH_SEARCH,
+                     STAGE_CLUE_PLACEMENT, STAGE_RATING, STAGE_DEDUP, STAGE_UPLOAD)
+
 # Cargar variables de entorno
 load_dotenv()
 
+# Intentos por nivel antes de darlo por fallido
+MAX_PUZZLE_ATTEMPTS = 20
+
+# Niveles adelantados por worker en generación paralela
+PREFETCH_PER_WORKER = 2
+
+# Mínimo de números de un puzzle
+MIN_NUMBERS = 3
+
 class Difficulty(Enum):
     FACIL = "facil"
     NORMAL = "normal"
     DIFICIL = "dificil"
     EXTREMO = "extremo"
 
+# De más fácil a más difícil (para comparar la medida con el objetivo)
+DIFFICULTY_ORDER = [Difficulty.FACIL, Difficulty.NORMAL, Difficulty.DIFICIL, Difficulty.EXTREMO]
+
+
+def weekly_difficulty(band: str) -> Difficulty:
+    """Dificultad del plan semanal de una banda medida: sin muy fácil, cuenta como fácil"""
+    return Difficulty.FACIL if band == "muy_facil" else Difficulty(band)
+
 @dataclass
 class PuzzleConfig:
     """Configuración para generar puzzles"""
@@ -39,23 +79,60 @@ class PuzzleConfig:
 class WeeklyPuzzleGenerator:
     """Generador de puzzles semanales basado en production_generator.py"""
     
-    def __init__(self):
+    def __init__(self, engine: str = ENGINE_BACKTRACKING, minimal_clues: bool = False,
+                 corpus_dir: str = DEFAULT_CORPUS_DIR, store: Optional[LevelStore] = None,
+                 reserve_levels: bool = True, quiet: bool = False, target_difficulty: bool = False,
+                 restart_schedule: str = RESTART_LUBY,
+                 search_strategies: Optional[Dict[Optional[int], str]] = None):
         self.directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]  # derecha, abajo, izquierda, arriba
         
-        # Inicializar Firebase
-        if not firebase_admin._apps:
-            cred = credentials.Certificate("service-account-key.json")
-            firebase_admin.initialize_app(cred)
+        # Generador aleatorio propio (nunca el módulo `random` global)
+        self.rng = random.Random()
+        
+        # Motor de caminos: backtracking (búsqueda), backbite (constructivo) o corpus (precalculado)
+        self.engine = engine
+        self.max_size = MAX_SIZE_BY_ENGINE[engine]
+        self.corpus_dir = corpus_dir
+        
+        # Reducir los números al mínimo que mantiene la solución única
+        self.minimal_clues = minimal_clues
         
-        self.db = firestore.client()
+        # Ajustar los números de cada candidato hasta que la dificultad medida
+        # sea la planificada (ver steer_numbers)
+        self.target_difficulty = target_difficulty
+        
+        # Almacén de niveles: Firebase salvo que se indique otro (ver level_store.py)
+        self.store = store or FirestoreLevelStore()
         
         # Cache de niveles existentes para evitar duplicados
         self.existing_levels = []
         self.existing_configs = set()  # (size, num_numbers, difficulty)
-        self.existing_hashes = set()   # hashes de grids
+        self.existing_hashes = set()   # huellas canónicas de grid + solución (ver fingerprint.py)
+        self.max_level: Optional[int] = None  # nivel más alto conocido (existentes y generados)
+        
+        # Números de nivel reservados en el contador del almacén (ver level_counter.py)
+        self.reserve_levels = reserve_levels
+        self.level_allocator: Optional[LevelNumberAllocator] = None
+        
+        # Calendario de reinicios de la búsqueda de caminos (ver path_engine.py)
+        self.restart_schedule = restart_schedule
         
-        # Estadísticas de operaciones Firebase
-        self.firebase_operations = 0
+        # Estrategia de búsqueda por tamaño (None: todos los tamaños); lo que
+        # no se indique usa DEFAULT_STRATEGY de path_engine.py
+        self.search_strategies = dict(search_strategies or {})
+        
+        # Búsqueda cortada por presupuesto de cada tamaño: el siguiente camino
+        # de ese tamaño la continúa con sus extremos en vez de sortear otros.
+        # Solo sin calendario de reinicios y en serie (generate_puzzle): los
+        # intentos con semilla empiezan sin ellas para no depender de los
+        # niveles anteriores
+        self.suspended_searches: Dict[int, HamiltonianSearch] = {}
+        
+        # Contadores y tiempos por etapa, nivel y bucket (ver metrics.py)
+        self.metrics = GenerationMetrics()
+        
+        # Sin mensajes por intento/nivel: solo resúmenes
+        self.quiet = quiet
         
         # Configuraciones de dificultad optimizadas para rendimiento
         self.difficulty_configs = {
@@ -83,493 +160,741 @@ class WeeklyPuzzleGenerator:
         
         # Cargar niveles existentes al inicializar
         self.load_existing_levels()
+        
+        # Configuraciones que el catálogo aún no usa (ver config_space.py)
+        self.config_space = ConfigSpace(self.difficulty_configs, self.existing_configs)
+        self.report_config_space()
+    
+    def log(self, message: str):
+        """Mensaje de progreso dentro del bucle de generación (se omite con quiet)"""
+        if not self.quiet:
+            print(message)
     
     def create_matrix(self, size: int) -> List[List[int]]:
         """Crea una matriz de tamaño NxN"""
         return [[0 for _ in range(size)] for _ in range(size)]
     
-    def select_start_end_points(self, size: int) -> Tuple[Tuple[int, int], Tuple[int, int]]:
-        """Selecciona puntos de inicio y fin aleatorios diferentes"""
-        all_points = [(i, j) for i in range(size) for j in range(size)]
-        start_point = random.choice(all_points)
-        
-        # Asegurar que el punto final sea diferente
-        remaining_points = [p for p in all_points if p != start_point]
-        end_point = random.choice(remaining_points)
-        
-        return start_point, end_point
-    
-    def find_hamiltonian_path(self, size: int, start: Tuple[int, int], end: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
-        """Busca un camino hamiltoniano optimizado con timeout"""
-        import time
-        
-        def is_valid(x: int, y: int) -> bool:
-            return 0 <= x < size and 0 <= y < size
-        
-        def get_neighbors(x: int, y: int) -> List[Tuple[int, int]]:
-            neighbors = []
-            for dx, dy in self.directions:
-                nx, ny = x + dx, y + dy
-                if is_valid(nx, ny) and (nx, ny) not in visited:
-                    neighbors.append((nx, ny))
-            return neighbors
-        
-        def count_accessible_cells(x: int, y: int) -> int:
-            """Cuenta cuántas celdas son accesibles desde una posición"""
-            count = 0
-            for dx, dy in self.directions:
-                nx, ny = x + dx, y + dy
-                if is_valid(nx, ny) and (nx, ny) not in visited:
-                    count += 1
-            return count
-        
-        def backtrack(current: Tuple[int, int], path: List[Tuple[int, int]], start_time: float, timeout: int) -> bool:
-            # Verificar timeout
-            if time.time() - start_time > timeout:
-                return False
-                
-            if len(path) == size * size:
-                return current == end
-            
-            # Obtener vecinos y ordenarlos por heurística
-            neighbors = get_neighbors(*current)
+    def select_start_end_points(self, size: int, rng: Optional[random.Random] = None) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """Selecciona puntos de inicio y fin aleatorios que admiten camino hamiltoniano"""
+        # Solo se muestrean pares factibles (paridad y casos prohibidos, ver feasibility.py)
+        return sample_feasible_pair(size, rng or self.rng)
+    
+    def find_hamiltonian_path(self, size: int, start: Tuple[int, int], end: Tuple[int, int],
+                              rng: Optional[random.Random] = None,
+                              node_budget: Optional[int] = None) -> Optional[List[Tuple[int, int]]]:
+        """Busca un camino hamiltoniano con presupuesto de nodos y calendario de reinicios
+        
+        Todo se mide en nodos, no en segundos: el resultado solo depende de
+        `rng`, no de la carga de la máquina (necesario para que N workers den
+        lo mismo que 1). Cada intento se corta según `restart_schedule` (ver
+        restart_limits) y el siguiente baraja el orden de direcciones y elige
+        otros extremos. `node_budget` cambia el presupuesto total (por defecto
+        path_node_budget).
+        """
+        rng = rng or self.rng
+        
+        # Copia local: barajar no modifica el estado compartido del generador
+        directions = list(self.directions)
+        
+        # Presupuesto total de nodos según el tamaño
+        if node_budget is None:
+            node_budget = path_node_budget(size)
+        
+        # Orden de los vecinos (Warnsdorff, heurística, beam...) según el tamaño
+        strategy = strategy_for_size(size, self.search_strategies)
+        
+        # Descartar pares imposibles antes de gastar intentos en la búsqueda
+        if not is_feasible_pair(size, start, end):
+            start, end = sample_feasible_pair(size, rng)
+        
+        # Sin calendario: continuar primero la búsqueda que se quedó a medias
+        # (build_puzzle_candidate ya pide sus extremos; con otros se conserva)
+        pending = self.suspended_searches.get(size)
+        if pending is not None and (pending.start, pending.end) == (start, end):
+            del self.suspended_searches[size]
+            spent, backtracked, pruned = pending.nodes, pending.backtracks, pending.pruned
+            status = pending.run(max_nodes=node_budget)
+            node_budget -= pending.nodes - spent
+            self.metrics.count("nodes", pending.nodes - spent)
+            self.metrics.count("backtracks", pending.backtracks - backtracked)
+            self.metrics.count("pruned", pending.pruned - pruned)
+            if status == HamiltonianSearch.FOUND:
+                return pending.get_path()
+            if status == HamiltonianSearch.SUSPENDED:
+                self.suspended_searches[size] = pending
+                self.metrics.count("timeouts")
+                return None
+        
+        # Sin calendario, pocos intentos largos; con él, tantos como quepan en el presupuesto
+        max_attempts = 10 if size <= 4 else (20 if size <= 5 else (30 if size <= 6 else (40 if size <= 7 else 50)))
+        attempts = range(max_attempts) if self.restart_schedule == RESTART_NONE else itertools.count()
+        
+        for attempt, limit in zip(attempts, restart_limits(self.restart_schedule, size)):
+            if node_budget <= 0:
+                self.metrics.count("timeouts")
+                break
+            if attempt > 0:
+                self.metrics.count("restarts")
             
-            # Heurística optimizada: preferir vecinos con menos opciones futuras
-            def heuristic_score(pos):
-                # Si es el final y estamos cerca del final del camino, dar prioridad máxima
-                if pos == end and len(path) == size * size - 1:
-                    return -10000
-                
-                # Contar opciones futuras
-                future_options = count_accessible_cells(*pos)
-                
-                # Penalizar esquinas y bordes si no son el final
-                if pos != end:
-                    if (pos[0] in [0, size-1] and pos[1] in [0, size-1]):
-                        future_options += 5  # Penalizar esquinas más
-                    elif pos[0] in [0, size-1] or pos[1] in [0, size-1]:
-                        future_options += 2  # Penalizar bordes
-                
-                # Priorizar movimientos hacia el centro para matrices grandes
-                if size > 5:
-                    center = size // 2
-                    dist_to_center = abs(pos[0] - center) + abs(pos[1] - center)
-                    future_options += dist_to_center
-                
-                return future_options
+            # Búsqueda iterativa sobre bitboard (ver path_engine.py)
+            search = strategy.new_search(size, start, end, rng, directions)
+            status = search.run(max_nodes=node_budget if limit is None else min(limit, node_budget))
+            node_budget -= search.nodes
+            self.metrics.count("nodes", search.nodes)
+            self.metrics.count("backtracks", search.backtracks)
+            self.metrics.count("pruned", search.pruned)
+            if status == HamiltonianSearch.FOUND:
+                return search.get_path()
             
-            neighbors.sort(key=heuristic_score)
+            if status == HamiltonianSearch.SUSPENDED and limit is None:
+                # Presupuesto agotado: guardar el estado en vez de tirar el trabajo hecho
+                self.suspended_searches[size] = search
+                self.metrics.count("timeouts")
+                return None
             
-            for next_pos in neighbors:
-                path.append(next_pos)
-                visited.add(next_pos)
-                
-                if backtrack(next_pos, path, start_time, timeout):
-                    return True
-                
-                path.pop()
-                visited.remove(next_pos)
+            # Reiniciar con un orden diferente de direcciones
+            rng.shuffle(directions)
             
-            return False
+            # Y con otros puntos de inicio/fin (sin calendario, solo en grids grandes)
+            if limit is not None or (size > 6 and attempt > 5):
+                start, end = sample_feasible_pair(size, rng)
         
-        # Configurar timeout basado en el tamaño
-        timeout = 5 if size <= 4 else (10 if size <= 5 else (15 if size <= 6 else (20 if size <= 7 else 25)))
-        start_time = time.time()
+        return None
+    
+    def place_unique_numbers(self, path: List[Tuple[int, int]], num_numbers: int,
+                             board: Board) -> List[List[int]]:
+        """Coloca los números de forma que el camino sea la única solución"""
+        # Partir del reparto uniforme y reparar/minimizar con el solver (ver uniqueness.py)
+        positions = evenly_spaced_positions(len(path), num_numbers)
+        positions = place_unique_clues(board.rows, path, positions, minimize=self.minimal_clues, board=board)
+        return grid_from_positions(board.rows, path, positions, board)
+    
+    def steer_numbers(self, path: List[Tuple[int, int]], num_numbers: int,
+                      target: Difficulty, board: Board) -> Optional[List[List[int]]]:
+        """Coloca los números de forma que la dificultad medida sea `target`
         
-        # Intentar múltiples veces con diferentes estrategias
-        max_attempts = 10 if size <= 4 else (20 if size <= 5 else (30 if size <= 6 else (40 if size <= 7 else 50)))
+        Con más números el puzzle es más fácil, así que se busca por bisección
+        cuántos poner, empezando por los planificados y valorando cada
+        colocación (ver difficulty_rating.py). Si ni con los mínimos
+        repartidos llega a la banda, se prueba con el mínimo que mantiene la
+        solución única. Valorar cuesta ~1 ms, mucho menos que otro camino: el
+        candidato solo se rechaza si ninguna colocación cae en la banda.
+        """
+        target_rank = DIFFICULTY_ORDER.index(target)
+        self.metrics.count("steered")
         
-        for attempt in range(max_attempts):
-            visited = {start}
-            path = [start]
+        low, high = MIN_NUMBERS, len(path)
+        count = min(max(num_numbers, low), high)
+        too_easy = False
+        while low <= high:
+            with self.metrics.stage(STAGE_CLUE_PLACEMENT):
+                positions = place_unique_clues(board.rows, path, evenly_spaced_positions(len(path), count),
+                                               board=board)
+                puzzle_matrix = grid_from_positions(board.rows, path, positions, board)
             
-            if backtrack(start, path, start_time, timeout):
-                return path
+            self.metrics.count("ratings")
+            measured, _ = self.calculate_difficulty(puzzle_matrix, path, board)
+            rank = DIFFICULTY_ORDER.index(measured)
+            if rank == target_rank:
+                return puzzle_matrix
             
-            # Si falla, intentar con un orden diferente de direcciones
-            random.shuffle(self.directions)
+            # Demasiado fácil: menos números; demasiado difícil: más
+            too_easy = rank < target_rank
+            if too_easy:
+                high = count - 1
+            else:
+                low = count + 1
+            count = (low + high) // 2
+        
+        if too_easy:
+            with self.metrics.stage(STAGE_CLUE_PLACEMENT):
+                positions = place_unique_clues(board.rows, path, [0, len(path) - 1], minimize=True, board=board)
+                puzzle_matrix = grid_from_positions(board.rows, path, positions, board)
             
-            # Para matrices grandes, también probar diferentes puntos de inicio/fin
-            if size > 6 and attempt > 5:
-                # Generar nuevos puntos de inicio/fin
-                all_points = [(i, j) for i in range(size) for j in range(size)]
-                start = random.choice(all_points)
-                remaining = [p for p in all_points if p != start]
-                end = random.choice(remaining)
+            self.metrics.count("ratings")
+            measured, _ = self.calculate_difficulty(puzzle_matrix, path, board)
+            if measured == target:
+                return puzzle_matrix
         
+        self.metrics.count("off_target")
+        self.log(f"   🎯 Ninguna colocación de números da {target.value}, descartando el camino")
         return None
     
-    def validate_and_add_numbers(self, path: List[Tuple[int, int]], num_numbers: int) -> Tuple[List[List[int]], bool]:
-        """Valida el camino y añade números secuenciales"""
-        if not path:
-            return [], False
-        
-        size = int(len(path) ** 0.5)
-        matrix = self.create_matrix(size)
-        
-        # Verificar que el camino use todas las celdas
-        if len(path) != size * size:
-            return matrix, False
-        
-        # Verificar que no haya celdas repetidas
-        if len(set(path)) != len(path):
-            return matrix, False
-        
-        # Verificar que el camino sea continuo
-        for i in range(len(path) - 1):
-            x1, y1 = path[i]
-            x2, y2 = path[i + 1]
-            if abs(x1 - x2) + abs(y1 - y2) != 1:
-                return matrix, False
-        
-        # Colocar números secuenciales
-        if num_numbers > len(path):
-            num_numbers = len(path)
-        
-        # Distribuir números uniformemente
-        step = len(path) // (num_numbers - 1) if num_numbers > 1 else 1
-        
-        for i in range(num_numbers):
-            if i == 0:
-                # Primer número en el inicio
-                pos = 0
-            elif i == num_numbers - 1:
-                # Último número en el final
-                pos = len(path) - 1
-            else:
-                # Números intermedios distribuidos
-                pos = i * step
-            
-            x, y = path[pos]
-            matrix[x][y] = i + 1
-        
-        return matrix, True
-    
-    def calculate_difficulty(self, size: int, num_numbers: int, path_length: int) -> Difficulty:
-        """Calcula la dificultad del puzzle"""
-        # Factores de dificultad
-        grid_complexity = size * size
-        number_density = num_numbers / grid_complexity
-        path_efficiency = path_length / grid_complexity
-        
-        # Puntuación de dificultad (0-100)
-        score = 0
-        
-        # Factor de tamaño
-        if size <= 4:
-            score += 10
-        elif size <= 5:
-            score += 25
-        elif size <= 6:
-            score += 40
-        elif size <= 7:
-            score += 60
-        else:
-            score += 90
-        
-        # Factor de densidad de números
-        if number_density <= 0.25:
-            score += 30
-        elif number_density <= 0.4:
-            score += 20
-        elif number_density <= 0.6:
-            score += 10
-        else:
-            score += 5
-        
-        # Factor de eficiencia del camino
-        if path_efficiency >= 0.95:
-            score += 20
-        elif path_efficiency >= 0.9:
-            score += 15
-        elif path_efficiency >= 0.8:
-            score += 10
-        else:
-            score += 5
-        
-        # Determinar dificultad (sin muy fácil)
-        if score <= 40:
-            return Difficulty.FACIL
-        elif score <= 60:
-            return Difficulty.NORMAL
-        elif score <= 80:
-            return Difficulty.DIFICIL
-        else:
-            return Difficulty.EXTREMO
+    def calculate_difficulty(self, puzzle_matrix: List[List[int]], path: List[Tuple[int, int]],
+                             board: Board) -> Tuple[Difficulty, DifficultyRating]:
+        """Calcula la dificultad resolviendo el puzzle (ver difficulty_rating.py)"""
+        with self.metrics.stage(STAGE_RATING):
+            rating = rate_puzzle(puzzle_matrix, path, board=board)
+        return weekly_difficulty(rating.band), rating
+    
+    def make_puzzle(self, path: List[Tuple[int, int]], puzzle_matrix: List[List[int]],
+                    size: int, difficulty: Difficulty, level: int) -> Dict:
+        """Puzzle con la dificultad medida por el solver
+        
+        Como en production_generator.py, `difficulty` es la banda de la
+        valoración (también `muy_facil`), no la planificada.
+        """
+        measured, rating = self.calculate_difficulty(puzzle_matrix, path, Board.square(size))
+        if measured != difficulty:
+            self.log(f"   📏 Dificultad medida: {rating.band} (puntuación {rating.score}, planificada {difficulty.value})")
+        return {
+            "difficulty": rating.band,
+            "gridSize": size,
+            "grid": puzzle_matrix,  # Usar 'grid' para compatibilidad con el juego
+            "solution": path,
+            "level": level,
+            "numbers": sum(1 for row in puzzle_matrix for cell in row if cell > 0),
+            "rating": rating.to_dict()
+        }
+    
+    def target_band(self, difficulty: Difficulty) -> Optional[str]:
+        """Banda objetivo de un nivel para las métricas (solo en generación dirigida)"""
+        return difficulty.value if self.target_difficulty else None
     
     def load_existing_levels(self):
-        """Carga todos los niveles existentes desde Firebase (una sola operación)"""
+        """Carga los niveles existentes desde el almacén (una sola operación)"""
         try:
-            print("🔍 Cargando niveles existentes desde Firebase...")
-            
-            levels_ref = self.db.collection('levels')
-            docs = levels_ref.stream()
+            print("🔍 Cargando niveles existentes...")
+            levels = self.store.load_levels()
             
-            for doc in docs:
-                data = doc.to_dict()
+            for summary in levels:
+                # Guardar configuración para evitar duplicados (los rectángulos
+                # no ocupan ninguna configuración de los cuadrados)
+                if summary['gridSize'] is not None:
+                    self.existing_configs.add((summary['gridSize'], summary['num_numbers'],
+                                               weekly_difficulty(summary['difficulty']).value))
                 
-                if 'level' in data and 'gridSize' in data and 'difficulty' in data:
-                    # Contar números en el grid
-                    num_numbers = 0
-                    if 'grid' in data:
-                        grid_data = data['grid']
-                        for row_key in grid_data:
-                            row = grid_data[row_key]
-                            num_numbers += sum(1 for cell in row if cell > 0)
-                    
-                    # Guardar configuración para evitar duplicados
-                    config = (data['gridSize'], num_numbers, data['difficulty'])
-                    self.existing_configs.add(config)
-                    
-                    # Guardar nivel completo
-                    self.existing_levels.append({
-                        'level': data['level'],
-                        'gridSize': data['gridSize'],
-                        'difficulty': data['difficulty'],
-                        'num_numbers': num_numbers
-                    })
+                # Huella canónica (cubre giros, espejos e inversión del recorrido)
+                if summary['fingerprint']:
+                    self.existing_hashes.add(summary['fingerprint'])
+                
+                # Guardar nivel completo
+                self.existing_levels.append({
+                    'level': summary['level'],
+                    'gridSize': summary['gridSize'],
+                    'difficulty': summary['difficulty'],
+                    'num_numbers': summary['num_numbers']
+                })
+                self.max_level = max(self.max_level or 0, summary['level'])
             
-            self.firebase_operations += 1
+            self.metrics.count("store_operations")
             print(f"✅ Cargados {len(self.existing_levels)} niveles existentes")
             print(f"   - Configuraciones únicas: {len(self.existing_configs)}")
+            print(f"   - Grids únicos (salvo simetrías): {len(self.existing_hashes)}")
             
         except Exception as e:
             print(f"⚠️  Error cargando niveles existentes: {e}")
             print("   Continuando sin verificación de duplicados")
     
-    def calculate_grid_hash(self, grid: List[List[int]]) -> str:
-        """Calcula un hash único para el grid"""
-        import hashlib
-        grid_str = json.dumps(grid, sort_keys=True)
-        return hashlib.md5(grid_str.encode()).hexdigest()
+    def calculate_grid_hash(self, grid: List[List[int]], solution: Optional[List[Tuple[int, int]]] = None) -> str:
+        """Calcula un hash del grid (y su solución) igual para giros, espejos e inversión"""
+        return puzzle_fingerprint(grid, solution)
     
     def is_duplicate_config(self, size: int, num_numbers: int, difficulty: str) -> bool:
         """Verifica si ya existe una configuración similar"""
         return (size, num_numbers, difficulty) in self.existing_configs
     
-    def is_duplicate_grid(self, grid: List[List[int]]) -> bool:
-        """Verifica si ya existe un grid similar"""
-        grid_hash = self.calculate_grid_hash(grid)
+    def is_duplicate_grid(self, grid: List[List[int]], solution: Optional[List[Tuple[int, int]]] = None) -> bool:
+        """Verifica si ya existe el mismo grid o una de sus variantes simétricas"""
+        grid_hash = self.calculate_grid_hash(grid, solution)
         return grid_hash in self.existing_hashes
     
     def get_next_level_number(self) -> int:
-        """Obtiene el siguiente número de nivel desde el cache local"""
-        try:
-            if self.existing_levels:
-                max_level = max(level['level'] for level in self.existing_levels)
-                return max_level + 1
-            else:
-                return 101
-        except Exception as e:
-            print(f"⚠️  Error obteniendo número de nivel: {e}")
-            print("   Usando nivel 101 como fallback")
-            return 101
+        """Obtiene el siguiente número de nivel (bloque reservado o cache local)
+        
+        Los errores al reservar se propagan: nunca se entrega un número sin
+        reservar que podría pisar el nivel de otra ejecución.
+        """
+        if self.level_allocator:
+            return self.level_allocator.peek()
+        if self.max_level is not None:
+            return self.max_level + 1
+        return 101
     
     def update_level_counter(self, new_level: int):
         """Actualiza el contador de niveles para evitar duplicados"""
-        self.existing_levels.append({
-            'level': new_level,
-            'gridSize': 0,  # Placeholder
-            'difficulty': 'placeholder',
-            'num_numbers': 0
-        })
+        if self.level_allocator:
+            # Consumir el número del bloque reservado
+            self.level_allocator.next_level()
+        
+        # Solo el máximo: la memoria no crece con los niveles generados
+        self.max_level = max(self.max_level or 0, new_level)
+    
+    def report_config_space(self):
+        """Configuraciones libres por dificultad (avisa de las agotadas)"""
+        space = self.config_space
+        free = ", ".join(f"{d.value} {space.remaining(d)}/{space.totals[d]}" for d in self.difficulty_configs)
+        print(f"   - Configuraciones libres: {free}")
+        for difficulty in space.exhausted:
+            print(f"⚠️  Sin configuraciones libres de {difficulty.value}: "
+                  f"{'sus niveles no se pueden generar' if difficulty == Difficulty.EXTREMO else 'se reparte su peso entre el resto'}")
+    
+    def get_random_difficulty_config(self, rng: Optional[random.Random] = None) -> Optional[Tuple[int, int, Difficulty]]:
+        """Configuración libre al azar, con la dificultad elegida por peso (None si no queda ninguna)"""
+        return self.config_space.sample(rng or self.rng)
+    
+    def get_extreme_difficulty_config(self, rng: Optional[random.Random] = None) -> Optional[Tuple[int, int, Difficulty]]:
+        """Configuración libre de dificultad extrema (None si no queda ninguna)"""
+        return self.config_space.sample(rng or self.rng, Difficulty.EXTREMO)
     
-    def get_random_difficulty_config(self) -> Tuple[int, int, Difficulty]:
-        """Obtiene una configuración aleatoria de dificultad (evitando duplicados)"""
-        max_attempts = 50
+    def is_valid_config(self, size: int, num_numbers: int, difficulty: Difficulty,
+                        check_duplicate: bool = True) -> bool:
+        """Valida los parámetros y (con `check_duplicate`) que la configuración no exista ya"""
+        if size < 4 or size > self.max_size:
+            print(f"❌ Tamaño de matriz inválido: {size} (debe ser entre 4 y {self.max_size})")
+            return False
         
-        for attempt in range(max_attempts):
-            difficulties = list(self.difficulty_configs.keys())
-            weights = [self.difficulty_configs[d]['weight'] for d in difficulties]
-            
-            difficulty = random.choices(difficulties, weights=weights)[0]
-            config = self.difficulty_configs[difficulty]
-            
-            size = random.randint(*config['size_range'])
-            numbers = random.randint(*config['numbers_range'])
-            max_numbers = min(numbers, size * size)
+        if num_numbers < 3 or num_numbers > size * size:
+            print(f"❌ Número de números inválido: {num_numbers}")
+            return False
+        
+        # Verificar si la configuración ya existe
+        if check_duplicate and self.is_duplicate_config(size, num_numbers, difficulty.value):
+            self.log(f"⚠️  Configuración duplicada detectada: {size}x{size} con {num_numbers} números ({difficulty.value})")
+            return False
+        
+        return True
+    
+    def constructed_path(self, size: int, rng: random.Random) -> List[Tuple[int, int]]:
+        """Camino sin búsqueda: del corpus precalculado o por backbite"""
+        if self.engine == ENGINE_CORPUS:
+            path = sample_corpus_path(size, rng, self.corpus_dir)
+            if path:
+                return path
+            self.log(f"   ⚠️  Sin corpus de caminos {size}x{size}, usando backbite")
+        return generate_backbite_path(size, rng=rng)
+    
+    def build_puzzle_candidate(self, size: int, num_numbers: int,
+                               rng: Optional[random.Random] = None,
+                               target: Optional[Difficulty] = None) -> Optional[Tuple[List[Tuple[int, int]], List[List[int]]]]:
+        """Un intento de puzzle: camino + números (sin nivel ni control de duplicados)
+        
+        Con `target_difficulty` los números se ajustan hasta que la dificultad
+        medida sea `target` (la planificada del nivel).
+        """
+        rng = rng or self.rng
+        self.metrics.count("attempts")
+        
+        with self.metrics.stage(STAGE_PATH_SEARCH):
+            if self.engine in (ENGINE_BACKBITE, ENGINE_CORPUS):
+                # 1-2. Tomar un camino del corpus o construirlo (sin búsqueda)
+                path = self.constructed_path(size, rng)
+                self.log(f"   📍 Inicio: {path[0]}, Fin: {path[-1]}")
+            else:
+                # 1. Seleccionar puntos de inicio y fin: los de la búsqueda
+                # suspendida de este tamaño, si la hay, para continuarla
+                pending = self.suspended_searches.get(size)
+                if pending is not None:
+                    start_point, end_point = pending.start, pending.end
+                    self.log(f"   ♻️  Continuando la búsqueda suspendida ({pending.nodes} nodos)")
+                else:
+                    start_point, end_point = self.select_start_end_points(size, rng)
+                self.log(f"   📍 Inicio: {start_point}, Fin: {end_point}")
+                
+                # 2. Buscar camino hamiltoniano
+                self.log(f"   🔍 Buscando camino hamiltoniano...")
+                path = self.find_hamiltonian_path(size, start_point, end_point, rng)
+        
+        if not path:
+            self.log(f"   ❌ No se encontró camino hamiltoniano")
+            return None
+        
+        self.log(f"   ✅ Camino encontrado: {len(path)} pasos")
+        
+        # El generador semanal solo usa grids cuadrados completos
+        board = Board.square(size)
+        if self.target_difficulty and target is not None:
+            puzzle_matrix = self.steer_numbers(path, num_numbers, target, board)
+            return (path, puzzle_matrix) if puzzle_matrix else None
+        
+        with self.metrics.stage(STAGE_CLUE_PLACEMENT):
+            # 3. Validar el camino
+            if not board.validate_path(path):
+                self.log(f"   ❌ Validación falló")
+                return None
             
-            # Verificar si esta configuración ya existe
-            if not self.is_duplicate_config(size, max_numbers, difficulty.value):
-                return size, max_numbers, difficulty
+            # 4. Colocar los números garantizando solución única
+            self.log(f"   🔢 Añadiendo números...")
+            puzzle_matrix = self.place_unique_numbers(path, num_numbers, board)
         
-        # Si no se encuentra configuración única, usar configuración aleatoria
-        print("⚠️  No se encontró configuración única, usando configuración aleatoria")
-        difficulty = random.choice(list(self.difficulty_configs.keys()))
-        config = self.difficulty_configs[difficulty]
-        size = random.randint(*config['size_range'])
-        numbers = random.randint(*config['numbers_range'])
-        max_numbers = min(numbers, size * size)
+        placed_numbers = sum(1 for row in puzzle_matrix for cell in row if cell > 0)
+        if placed_numbers != num_numbers:
+            self.log(f"   🔢 Números ajustados para solución única: {num_numbers} → {placed_numbers}")
         
-        return size, max_numbers, difficulty
+        return path, puzzle_matrix
     
-    def get_extreme_difficulty_config(self) -> Tuple[int, int, Difficulty]:
-        """Obtiene configuración para dificultad extrema"""
-        config = self.difficulty_configs[Difficulty.EXTREMO]
-        size = random.randint(*config['size_range'])
-        numbers = random.randint(*config['numbers_range'])
-        max_numbers = min(numbers, size * size)
+    def build_seeded_candidate(self, size: int, num_numbers: int, seed: int,
+                               target: Optional[Difficulty] = None) -> Optional[Tuple[List[Tuple[int, int]], List[List[int]]]]:
+        """Intento reproducible: solo depende de (size, num_numbers, seed, target)
         
-        return size, max_numbers, Difficulty.EXTREMO
+        No continúa búsquedas suspendidas de otros intentos (eso queda para
+        generate_puzzle en serie): el resultado no puede depender del orden.
+        """
+        # Sin estado heredado de niveles anteriores
+        self.suspended_searches.clear()
+        return self.build_puzzle_candidate(size, num_numbers, random.Random(seed), target)
     
-    def generate_puzzle(self, size: int, num_numbers: int, difficulty: Difficulty) -> Optional[Dict]:
-        """Genera un puzzle completo (evitando duplicados)"""
-        # Validar parámetros
-        if size < 4 or size > 8:
-            print(f"❌ Tamaño de matriz inválido: {size} (debe ser entre 4 y 8)")
-            return None
+    def is_duplicate_candidate(self, puzzle_matrix: List[List[int]], path: List[Tuple[int, int]]) -> bool:
+        """Control de duplicados de un candidato (cronometrado y contado)"""
+        with self.metrics.stage(STAGE_DEDUP):
+            duplicate = self.is_duplicate_grid(puzzle_matrix, path)
+        if duplicate:
+            self.metrics.count("duplicates")
+            self.log(f"   ⚠️  Grid duplicado, reintentando...")
+        return duplicate
+    
+    def finalize_puzzle(self, path: List[Tuple[int, int]], puzzle_matrix: List[List[int]],
+                        size: int, difficulty: Difficulty) -> Dict:
+        """Asigna número de nivel a un candidato aceptado y lo registra"""
+        # Obtener número de nivel
+        level_number = self.get_next_level_number()
         
-        if num_numbers < 3 or num_numbers > size * size:
-            print(f"❌ Número de números inválido: {num_numbers}")
-            return None
+        # Crear resultado
+        result = self.make_puzzle(path, puzzle_matrix, size, difficulty, level_number)
         
-        print(f"🔄 Generando puzzle {size}x{size} con {num_numbers} números ({difficulty.value})...")
+        # Actualizar contador para evitar duplicados de numeración
+        self.update_level_counter(level_number)
         
-        # Verificar si la configuración ya existe
-        if self.is_duplicate_config(size, num_numbers, difficulty.value):
-            print(f"⚠️  Configuración duplicada detectada: {size}x{size} con {num_numbers} números ({difficulty.value})")
+        # La configuración usada es la que salió (números colocados y
+        # dificultad medida); el plan de la campaña descuenta las suyas en su copia
+        measured = weekly_difficulty(result['difficulty'])
+        self.existing_configs.add((size, result['numbers'], measured.value))
+        self.config_space.remove(measured, size, result['numbers'])
+        
+        # Registrar el grid para que los siguientes niveles no lo repitan
+        self.existing_hashes.add(self.calculate_grid_hash(puzzle_matrix, path))
+        
+        self.log(f"✅ Puzzle generado: {result['difficulty']} (Nivel {level_number})")
+        return result
+    
+    def generate_puzzle(self, size: int, num_numbers: int, difficulty: Difficulty) -> Optional[Dict]:
+        """Genera un puzzle completo (evitando duplicados)"""
+        if not self.is_valid_config(size, num_numbers, difficulty):
             return None
         
+        self.log(f"🔄 Generando puzzle {size}x{size} con {num_numbers} números ({difficulty.value})...")
+        self.metrics.start_level(size, num_numbers, target=self.target_band(difficulty))
+        
         # Intentar generar puzzle hasta encontrar uno único
-        max_attempts = 20  # Aumentado para mejorar tasa de acierto
+        max_attempts = MAX_PUZZLE_ATTEMPTS
         
         for attempt in range(max_attempts):
-            print(f"   Intento {attempt + 1}/{max_attempts}...")
-            
-            # 1. Crear matriz
-            matrix = self.create_matrix(size)
-            
-            # 2. Seleccionar puntos de inicio y fin
-            start_point, end_point = self.select_start_end_points(size)
-            print(f"   📍 Inicio: {start_point}, Fin: {end_point}")
-            
-            # 3. Buscar camino hamiltoniano
-            print(f"   🔍 Buscando camino hamiltoniano...")
-            path = self.find_hamiltonian_path(size, start_point, end_point)
-            if not path:
-                print(f"   ❌ No se encontró camino hamiltoniano")
-                continue
+            self.log(f"   Intento {attempt + 1}/{max_attempts}...")
             
-            print(f"   ✅ Camino encontrado: {len(path)} pasos")
-            
-            # 4. Validar y añadir números
-            print(f"   🔢 Añadiendo números secuenciales...")
-            puzzle_matrix, is_valid = self.validate_and_add_numbers(path, num_numbers)
-            if not is_valid:
-                print(f"   ❌ Validación falló")
+            candidate = self.build_puzzle_candidate(size, num_numbers, target=difficulty)
+            if not candidate:
                 continue
+            path, puzzle_matrix = candidate
             
-            # 5. Verificar si el grid es duplicado
-            if self.is_duplicate_grid(puzzle_matrix):
-                print(f"   ⚠️  Grid duplicado, reintentando...")
+            # Verificar si el grid es duplicado
+            if self.is_duplicate_candidate(puzzle_matrix, path):
                 continue
             
-            # 6. Obtener número de nivel
-            level_number = self.get_next_level_number()
-            
-            # 7. Crear resultado
-            result = {
-                "difficulty": difficulty.value,
-                "gridSize": size,
-                "grid": puzzle_matrix,  # Usar 'grid' para compatibilidad con el juego
-                "solution": path,
-                "level": level_number
-            }
-            
-            # 8. Actualizar contador para evitar duplicados de numeración
-            self.update_level_counter(level_number)
-            
-            print(f"✅ Puzzle generado: {difficulty.value} (Nivel {level_number})")
-            return result
+            puzzle = self.finalize_puzzle(path, puzzle_matrix, size, difficulty)
+            self.metrics.finish_level(puzzle['level'], True)
+            return puzzle
         
+        self.metrics.finish_level(None, False)
         print(f"❌ No se pudo generar un puzzle único después de {max_attempts} intentos")
         return None
     
     def upload_batch_to_firebase(self, puzzles: List[Dict]) -> bool:
-        """Sube un lote de puzzles a Firebase (una sola operación)"""
+        """Sube los puzzles a Firebase en lotes concurrentes (ver bulk_upload.py)"""
         try:
-            print(f"📤 Subiendo lote de {len(puzzles)} niveles a Firebase...")
-            
-            batch = self.db.batch()
+            print(f"📤 Subiendo {len(puzzles)} niveles...")
             
-            for puzzle in puzzles:
-                # Generar ID único para el nivel
-                level_id = f"level_{puzzle['level']:04d}"
-                
-                # Convertir arrays anidados a formato compatible con Firestore
-                firestore_puzzle = {
-                    "difficulty": puzzle["difficulty"],
-                    "gridSize": puzzle["gridSize"],
-                    "level": puzzle["level"],
-                    "id": level_id,
-                    "createdAt": firestore.SERVER_TIMESTAMP,
-                    "isActive": True
-                }
-                
-                # Convertir grid a formato Firestore
-                grid_data = {}
-                for i, row in enumerate(puzzle["grid"]):
-                    grid_data[str(i)] = row
-                firestore_puzzle["grid"] = grid_data
-                
-                # Convertir solution a formato Firestore
-                solution_data = []
-                for x, y in puzzle["solution"]:
-                    solution_data.append({"x": x, "y": y})
-                firestore_puzzle["solution"] = solution_data
-                
-                # Añadir a batch
-                doc_ref = self.db.collection('levels').document(level_id)
-                batch.set(doc_ref, firestore_puzzle)
+            with self.metrics.stage(STAGE_UPLOAD):
+                report = self.store.write_levels(puzzles)
             
-            # Ejecutar batch
-            batch.commit()
+            self.metrics.count("store_operations", report.commits)
+            if not report.ok:
+                print(f"❌ {len(report.failed)} niveles sin subir: {', '.join(report.failed)}")
+                return False
             
-            self.firebase_operations += 1
-            print(f"✅ Lote de {len(puzzles)} niveles subido exitosamente")
+            print(f"✅ {report.uploaded} niveles subidos en {report.commits} lotes")
             return True
             
         except Exception as e:
             print(f"❌ Error subiendo lote: {e}")
             return False
     
-    def generate_weekly_levels(self, count: int = 100, start_level: Optional[int] = None) -> List[Dict]:
-        """Genera los niveles semanales con las nuevas reglas"""
-        if start_level is None:
-            start_level = self.get_next_level_number()
+    def plan_weekly_levels(self, count: int, start_level: int, seed: int,
+                           first_level: Optional[int] = None) -> Iterator[Tuple[int, int, int, Difficulty]]:
+        """Elige (nivel, tamaño, números, dificultad) de cada nivel de forma reproducible
+        
+        La campaña empieza en `first_level` (por defecto `start_level`) y cada
+        configuración elegida se quita de una copia del índice, así que un
+        plan no repite configuraciones. Los niveles anteriores a `start_level`
+        se vuelven a planificar sin entregarlos (reanudar o regenerar).
+        """
+        space = self.config_space.copy()
+        first_level = start_level if first_level is None else first_level
+        for current_level in range(first_level, start_level + count):
+            config = self.plan_level_config(current_level, seed, space)
+            if config is not None:
+                size, numbers, difficulty = config
+                space.remove(difficulty, size, numbers)
+            if current_level >= start_level:
+                yield (current_level,) + (config or (None, None, None))
+    
+    def plan_level_config(self, level: int, seed: int,
+                          space: Optional[ConfigSpace] = None) -> Optional[Tuple[int, int, Difficulty]]:
+        """Configuración de un nivel: depende de (semilla, nivel) y de las libres en `space`
+        
+        None si no quedan configuraciones libres para el nivel.
+        """
+        space = space or self.config_space
+        rng = random.Random(derive_seed(seed, "config", level))
+        if level % 5 == 0:
+            return space.sample(rng, Difficulty.EXTREMO)
+        return space.sample(rng)
+    
+    def regenerate_level(self, level: int, seed: int, start_level: Optional[int] = None) -> Optional[Dict]:
+        """Regenera un único nivel de una campaña sin repetir los anteriores
+        
+        `start_level` es el primer nivel de la campaña (por defecto el propio
+        nivel): el plan se repite desde ahí para quitar las configuraciones
+        de los niveles anteriores. Devuelve el mismo puzzle que generó la
+        campaña para ese hueco salvo que allí se descartara algún intento por
+        grid duplicado.
+        """
+        _, size, numbers, difficulty = next(self.plan_weekly_levels(1, level, seed, first_level=start_level))
+        if size is None:
+            return None
+        
+        for attempt in range(MAX_PUZZLE_ATTEMPTS):
+            candidate = self.build_seeded_candidate(size, numbers, derive_level_seed(seed, level, attempt), difficulty)
+            if candidate:
+                path, puzzle_matrix = candidate
+                return self.make_puzzle(path, puzzle_matrix, size, difficulty, level)
+        
+        return None
+    
+    def generate_weekly_levels(self, count: int = 100, start_level: Optional[int] = None,
+                               seed: Optional[int] = None, workers: int = 1) -> List[Dict]:
+        """Genera los niveles semanales y los devuelve en una lista
+        
+        Para ejecuciones grandes usar iter_weekly_levels, que no los acumula.
+        """
+        return list(self.iter_weekly_levels(count, start_level, seed, workers))
+    
+    def resume_from_journal(self, journal: RunJournal):
+        """Recupera el estado de una ejecución interrumpida a partir de su diario"""
+        run = journal.run
+        
+        # Los niveles ya generados cuentan como existentes para los duplicados
+        run_levels = set()
+        for puzzle in journal.puzzles():
+            self.existing_hashes.add(self.calculate_grid_hash(puzzle['grid'], puzzle['solution']))
+            self.max_level = max(self.max_level or 0, puzzle['level'])
+            run_levels.add(puzzle['level'])
+        
+        # La ejecución planificó sus configuraciones sin sus propios niveles,
+        # que pueden estar ya subidos: planificar el resto igual
+        self.existing_configs = {(level['gridSize'], level['num_numbers'], weekly_difficulty(level['difficulty']).value)
+                                 for level in self.existing_levels
+                                 if level['level'] not in run_levels and level['gridSize'] is not None}
+        self.config_space = ConfigSpace(self.difficulty_configs, self.existing_configs)
+        
+        # Seguir con el mismo bloque de números, sin reservar otro
+        if run['block_end'] is not None:
+            self.level_allocator = LevelNumberAllocator(self.store, run['count'], self.reserve_levels)
+            next_level = journal.last_level + 1 if journal.last_level is not None else run['start_level']
+            self.level_allocator.restore(next_level, run['block_end'])
+    
+    def iter_weekly_levels(self, count: int = 100, start_level: Optional[int] = None,
+                           seed: Optional[int] = None, workers: int = 1,
+                           journal: Optional[RunJournal] = None) -> Iterator[Dict]:
+        """Genera los niveles semanales con las nuevas reglas, entregándolos uno a uno
+        
+        Cada puzzle se entrega en cuanto se acepta y no se guarda, así que la
+        memoria no crece con `count`. Con `workers` > 1 los candidatos se
+        construyen en un pool de procesos; este proceso actúa de coordinador:
+        elige las configuraciones, comprueba duplicados y asigna números de
+        nivel en orden. Cada intento usa una semilla derivada de (seed, nivel,
+        intento), así que el resultado es el mismo con 1 o N workers.
+        
+        Con `journal` cada nivel terminado se anota antes de entregarlo (ver
+        checkpoint.py). Si el diario ya contiene una ejecución sin terminar,
+        se continúa esa (sus parámetros mandan sobre los argumentos) a partir
+        del primer hueco pendiente, y los números reservados no se devuelven
+        si la ejecución se interrumpe.
+        """
+        resumed = journal is not None and journal.run is not None and not journal.finished
+        first_slot = start_level
+        
+        if resumed:
+            run = journal.run
+            count, seed, first_slot = run['count'], run['seed'], run['start_level']
+            self.resume_from_journal(journal)
+            start_level = journal.next_slot
+            print(f"♻️  Reanudando la campaña {seed} desde el nivel {start_level}")
+        else:
+            # Un bloque con todos los niveles de la ejecución, reservado de una vez
+            self.level_allocator = LevelNumberAllocator(self.store, count, self.reserve_levels)
+            if start_level is None:
+                start_level = self.get_next_level_number()
+                first_slot = start_level
+            else:
+                # Con --start-level también se reserva ese rango en el contador
+                # (ValueError si otra ejecución ya lo tiene)
+                self.level_allocator.claim(start_level)
+            
+            if seed is None:
+                seed = new_campaign_seed()
+            
+            if journal is not None:
+                journal.start_run(seed, count, start_level,
+                                  self.level_allocator.block_end if self.level_allocator else None,
+                                  engine=self.engine, minimal_clues=self.minimal_clues,
+                                  target_difficulty=self.target_difficulty,
+                                  restart_schedule=self.restart_schedule,
+                                  search_strategies=format_strategy_option(self.search_strategies),
+                                  upload=self.reserve_levels)
+        
+        # Huecos del plan que quedan por generar
+        remaining = first_slot + count - start_level
         
         print(f"🎮 Generador Semanal para PuzzlePath")
         print(f"📊 Configuración:")
-        print(f"   - Niveles a generar: {count}")
+        print(f"   - Niveles a generar: {remaining}")
         print(f"   - Nivel inicial: {start_level}")
         print(f"   - Tamaños: 4x4 a 7x7")
         print(f"   - Números: 3 a 25")
         print(f"   - Dificultades: Fácil, Normal, Difícil, Extremo")
         print(f"   - Niveles extremos: cada 5 niveles (105, 110, 115...)")
+        print(f"   - Semilla de campaña: {seed}")
+        print(f"   - Workers: {workers}")
         
-        puzzles = []
+        plan = self.plan_weekly_levels(remaining, start_level, seed, first_level=first_slot)
         
-        for i in range(count):
-            current_level = start_level + i
-            is_extreme_level = current_level % 5 == 0
-            
-            print(f"\n🔄 Generando nivel {current_level} ({i + 1}/{count})...")
-            
-            if is_extreme_level:
-                print(f"🔥 Nivel {current_level} - DIFICULTAD EXTREMA")
-                size, numbers, difficulty = self.get_extreme_difficulty_config()
-            else:
-                size, numbers, difficulty = self.get_random_difficulty_config()
+        executor = None
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                           initargs=(self.engine, self.minimal_clues, self.corpus_dir, self.quiet,
+                                                     self.target_difficulty, self.restart_schedule,
+                                                     self.search_strategies))
+        
+        def submit(level: int, size: int, numbers: int, difficulty: Difficulty, attempt: int):
+            task = (size, numbers, derive_level_seed(seed, level, attempt), difficulty)
+            if executor:
+                return executor.submit(_build_candidate_task, task)
+            return task
+        
+        def result(handle):
+            if executor:
+                # Los contadores del worker se suman al nivel en curso
+                candidate, worker_metrics = handle.result()
+                self.metrics.merge(worker_metrics)
+                return candidate
+            return self.build_seeded_candidate(*handle)
+        
+        # En paralelo se adelanta el primer intento de los próximos niveles,
+        # con una ventana acotada para no acumular resultados en memoria
+        lookahead = workers * PREFETCH_PER_WORKER if executor else 1
+        window = deque()
+        
+        def fill_window():
+            while len(window) < lookahead:
+                planned = next(plan, None)
+                if planned is None:
+                    return
+                level, size, numbers, difficulty = planned
+                # El plan ya excluye las configuraciones del catálogo; las que
+                # salgan en esta ejecución no cuentan (en paralelo aún no se
+                # conocen al adelantar el nivel y el resultado cambiaría)
+                valid = size is not None and self.is_valid_config(size, numbers, difficulty, check_duplicate=False)
+                handle = submit(level, size, numbers, difficulty, 0) if valid else None
+                window.append((planned, handle))
+        
+        completed = False
+        try:
+            fill_window()
+            i = 0
+            while window:
+                (current_level, size, numbers, difficulty), handle = window.popleft()
+                fill_window()
+                i += 1
+                
+                if size is None:
+                    print(f"❌ Nivel {current_level}: no quedan configuraciones libres")
+                    if journal is not None:
+                        journal.record_level(current_level, None)
+                    continue
+                
+                self.log(f"\n🔄 Generando nivel {current_level} ({i}/{remaining})...")
+                if current_level % 5 == 0:
+                    self.log(f"🔥 Nivel {current_level} - DIFICULTAD EXTREMA")
+                
+                self.metrics.start_level(size, numbers, current_level, self.target_band(difficulty))
+                puzzle = None
+                if handle is not None:
+                    for attempt in range(MAX_PUZZLE_ATTEMPTS):
+                        if attempt > 0:
+                            handle = submit(current_level, size, numbers, difficulty, attempt)
+                        
+                        candidate = result(handle)
+                        if not candidate:
+                            continue
+                        path, puzzle_matrix = candidate
+                        
+                        # El coordinador es el único que decide duplicados
+                        if self.is_duplicate_candidate(puzzle_matrix, path):
+                            continue
+                        
+                        puzzle = self.finalize_puzzle(path, puzzle_matrix, size, difficulty)
+                        break
+                
+                self.metrics.finish_level(puzzle['level'] if puzzle else current_level, puzzle is not None)
+                if journal is not None:
+                    # Anotado antes de entregarlo: si se cae después, --resume lo tiene
+                    journal.record_level(current_level, puzzle)
+                
+                if puzzle:
+                    self.log(f"✅ Nivel {current_level} generado exitosamente")
+                    yield puzzle
+                else:
+                    print(f"❌ Error generando nivel {current_level}")
             
-            puzzle = self.generate_puzzle(size, numbers, difficulty)
+            completed = True
+            if journal is not None:
+                journal.finish()
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
             
-            if puzzle:
-                puzzles.append(puzzle)
-                print(f"✅ Nivel {current_level} generado exitosamente")
-            else:
-                print(f"❌ Error generando nivel {current_level}")
-        
-        return puzzles
+            # Devolver los números reservados de los niveles que fallaron (con
+            # diario, solo al terminar: una ejecución interrumpida los necesita)
+            if self.level_allocator and (completed or journal is None):
+                self.level_allocator.release()
+
+
+# Generador de cada proceso worker (sin Firebase)
+_worker_generator: Optional[WeeklyPuzzleGenerator] = None
+
+
+def _init_worker(engine: str, minimal_clues: bool, corpus_dir: str, quiet: bool = False,
+                 target_difficulty: bool = False, restart_schedule: str = RESTART_LUBY,
+                 search_strategies: Optional[Dict[Optional[int], str]] = None):
+    """Inicializa el generador del proceso worker"""
+    global _worker_generator
+    _worker_generator = WeeklyPuzzleGenerator(engine=engine, minimal_clues=minimal_clues,
+                                              corpus_dir=corpus_dir, store=LocalLevelStore(":memory:"),
+                                              quiet=quiet, target_difficulty=target_difficulty,
+                                              restart_schedule=restart_schedule,
+                                              search_strategies=search_strategies)
+
+
+def _build_candidate_task(task: Tuple[int, int, int, Difficulty]):
+    """Tarea del pool: construye un candidato a partir de (size, num_numbers, seed, dificultad)
+
+    Devuelve también los contadores del intento para que el coordinador los
+    sume al nivel que está generando.
+    """
+    size, num_numbers, seed, difficulty = task
+    _worker_generator.metrics.start_level(size, num_numbers)
+    candidate = _worker_generator.build_seeded_candidate(size, num_numbers, seed, difficulty)
+    return candidate, _worker_generator.metrics.current
 
 def main():
     """Función principal"""
@@ -582,12 +907,94 @@ def main():
     parser.add_argument('--no-upload', action='store_true', 
                        help='No subir a Firebase (solo generar)')
     parser.add_argument('--seed', type=int, help='Semilla para reproducibilidad')
+    parser.add_argument('--engine', choices=PATH_ENGINES, default=ENGINE_BACKTRACKING,
+                       help='Motor de caminos: backtracking, backbite (constructivo) o corpus (precalculado, default: backtracking)')
+    parser.add_argument('--corpus-dir', type=str, default=DEFAULT_CORPUS_DIR,
+                       help='Directorio del corpus de caminos para --engine corpus (default: corpus/)')
+    parser.add_argument('--minimal-clues', action='store_true',
+                       help='Usar el mínimo de números que mantiene la solución única')
+    parser.add_argument('--target-difficulty', action='store_true',
+                       help='Ajustar los números de cada nivel hasta que la dificultad medida sea la planificada')
+    parser.add_argument('--restarts', choices=RESTART_SCHEDULES, default=RESTART_LUBY,
+                       help='Calendario de reinicios de la búsqueda de caminos: luby, geometric o none (default: luby)')
+    parser.add_argument('--strategy', nargs='+', default=[], metavar='[TAMAÑO=]ESTRATEGIA',
+                       help=f'Estrategia de búsqueda de caminos para todos los tamaños o para uno '
+                            f'({", ".join(SEARCH_STRATEGIES)}; default: {DEFAULT_STRATEGY})')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Procesos para generar niveles en paralelo (default: 1)')
+    parser.add_argument('--store', choices=LEVEL_STORES, default=STORE_FIRESTORE,
+                       help='Almacén de niveles: firestore o local (SQLite, sin conexión, default: firestore)')
+    parser.add_argument('--store-path', type=str,
+                       help='Credenciales de Firebase o fichero SQLite del almacén local')
+    parser.add_argument('--snapshot', type=str, default=DEFAULT_SNAPSHOT_FILE,
+                       help='Copia local SQLite de los niveles de Firebase (default: cache/levels.sqlite)')
+    parser.add_argument('--no-snapshot', action='store_true',
+                       help='Leer siempre todos los niveles de Firebase (sin copia local)')
+    parser.add_argument('--regenerate-level', type=int,
+                       help='Regenerar solo este nivel de la campaña --seed que empezó en --start-level (sin subir)')
+    parser.add_argument('--quiet', action='store_true',
+                       help='Sin mensajes por intento ni por nivel (solo resúmenes)')
+    parser.add_argument('--metrics-json', type=str,
+                       help='Guardar las métricas (por nivel y bucket) en JSON')
+    parser.add_argument('--metrics-prom', type=str,
+                       help='Guardar las métricas en formato de texto de Prometheus (.prom)')
+    parser.add_argument('--checkpoint', type=str, default=DEFAULT_CHECKPOINT_FILE,
+                       help='Diario de la ejecución para poder reanudarla (default: checkpoints/weekly_run.jsonl)')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continuar la ejecución interrumpida del diario --checkpoint')
     
     args = parser.parse_args()
     
-    # Configurar semilla si se proporciona
-    if args.seed:
-        random.seed(args.seed)
+    try:
+        search_strategies = parse_strategy_option(args.strategy)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    if args.regenerate_level is not None:
+        if args.seed is None:
+            print(f"❌ --regenerate-level necesita la --seed de la campaña")
+            return
+        
+        generator = WeeklyPuzzleGenerator(engine=args.engine, minimal_clues=args.minimal_clues,
+                                          corpus_dir=args.corpus_dir, store=LocalLevelStore(":memory:"),
+                                          target_difficulty=args.target_difficulty, restart_schedule=args.restarts,
+                                          search_strategies=search_strategies)
+        puzzle = generator.regenerate_level(args.regenerate_level, args.seed, args.start_level)
+        if not puzzle:
+            print(f"❌ No se pudo regenerar el nivel {args.regenerate_level}")
+            return
+        
+        print(json.dumps(puzzle, indent=2))
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(puzzle, f, indent=2)
+            print(f"\n💾 Nivel guardado en: {args.output}")
+        return
+    
+    # Diario de la ejecución (ver checkpoint.py)
+    journal = RunJournal(args.checkpoint)
+    if args.resume:
+        if not journal.resumable:
+            print(f"❌ No hay ninguna ejecución que reanudar en {args.checkpoint}")
+            return
+        # La campaña se reanuda con sus propios parámetros
+        run = journal.run
+        args.engine, args.minimal_clues, args.no_upload = run['engine'], run['minimal_clues'], not run['upload']
+        args.count, args.seed = run['count'], run['seed']
+        args.target_difficulty = run.get('target_difficulty', False)
+        # Diarios anteriores a los calendarios: la búsqueda de entonces
+        args.restarts = run.get('restart_schedule', RESTART_NONE)
+        # Y anteriores a las estrategias: la heurística en todos los tamaños
+        search_strategies = parse_strategy_option(run.get('search_strategies', [STRATEGY_HEURISTIC]))
+        print(f"♻️  Reanudando desde {args.checkpoint}: {len(journal.pending_uploads)} niveles por subir"
+              f"{'' if journal.finished else f', siguiente nivel {journal.next_slot}'}")
+    elif journal.resumable:
+        print(f"❌ Hay una ejecución sin terminar en {args.checkpoint}")
+        print(f"   Usa --resume para continuarla o borra el diario para empezar otra")
+        return
+    
+    # Configurar semilla si se proporciona (cada nivel deriva la suya)
+    if args.seed is not None:
         print(f"🌱 Semilla configurada: {args.seed}")
     
     print(f"🎮 Generador Semanal para PuzzlePath")
@@ -595,35 +1002,70 @@ def main():
     print(f"   - Niveles a generar: {args.count}")
     print(f"   - Nivel inicial: {args.start_level or 'automático'}")
     print(f"   - Subir a Firebase: {'No' if args.no_upload else 'Sí'}")
+    print(f"   - Motor de caminos: {args.engine}")
+    print(f"   - Reinicios de la búsqueda: {args.restarts}")
+    print(f"   - Estrategias de búsqueda: {' '.join(format_strategy_option(search_strategies)) or 'por defecto'}")
+    print(f"   - Dificultad dirigida: {'Sí' if args.target_difficulty else 'No'}")
+    print(f"   - Workers: {args.workers}")
     
-    generator = WeeklyPuzzleGenerator()
+    generator = WeeklyPuzzleGenerator(engine=args.engine, minimal_clues=args.minimal_clues,
+                                      corpus_dir=args.corpus_dir,
+                                      store=create_store(args.store, args.store_path,
+                                                         None if args.no_snapshot else args.snapshot),
+                                      reserve_levels=not args.no_upload, quiet=args.quiet,
+                                      target_difficulty=args.target_difficulty, restart_schedule=args.restarts,
+                                      search_strategies=search_strategies)
     
-    # Generar niveles semanales
-    puzzles = generator.generate_weekly_levels(args.count, args.start_level)
+    # Detalle por nivel solo si se va a exportar (con miles de niveles ocupa memoria)
+    generator.metrics.keep_levels = bool(args.metrics_json)
     
-    # Subir a Firebase si no se especifica --no-upload
-    if not args.no_upload and puzzles:
-        if generator.upload_batch_to_firebase(puzzles):
-            print(f"✅ Todos los niveles subidos exitosamente")
-        else:
-            print(f"❌ Error subiendo niveles a Firebase")
+    def upload(puzzles: List[Dict]) -> bool:
+        # Solo lo confirmado se anota: --resume reintenta el resto
+        if not generator.upload_batch_to_firebase(puzzles):
+            return False
+        journal.record_uploaded([puzzle['level'] for puzzle in puzzles])
+        return True
     
-    # Guardar en archivo si se especifica
-    if args.output and puzzles:
-        with open(args.output, 'w') as f:
-            json.dump(puzzles, f, indent=2)
-        print(f"\n💾 Niveles guardados en: {args.output}")
+    # Cada nivel se escribe y se sube en cuanto se acepta (ver puzzle_sink.py)
+    sinks = []
+    if args.output:
+        sinks.append(JsonlSink(args.output))
+        if args.resume:
+            # El fichero de salida se rehace con lo que ya estaba generado
+            for puzzle in journal.puzzles():
+                sinks[-1].write(puzzle)
+    uploader = None
+    if not args.no_upload:
+        uploader = UploadSink(upload)
+        sinks.append(uploader)
+        # Primero lo que quedó generado y sin subir
+        for level in sorted(journal.pending_uploads):
+            uploader.write(journal.pending_uploads[level])
+        journal.pending_uploads = {}
     
-    # Mostrar estadísticas
-    if puzzles:
-        print(f"\n🎉 Proceso completado:")
-        print(f"   ✅ Niveles generados: {len(puzzles)}")
-        
-        difficulties = {}
-        sizes = {}
-        numbers = {}
-        
-        for puzzle in puzzles:
+    # Estadísticas acumuladas sin guardar los puzzles
+    generated = 0
+    first_level = last_level = None
+    difficulties = {}
+    sizes = {}
+    numbers = {}
+    extreme_levels = []
+    
+    # Una ejecución reanudada que ya terminó de generar solo tiene subidas pendientes
+    levels = iter(()) if args.resume and journal.finished else \
+        generator.iter_weekly_levels(args.count, args.start_level, seed=args.seed,
+                                     workers=args.workers, journal=journal)
+    
+    try:
+        for puzzle in levels:
+            for sink in sinks:
+                sink.write(puzzle)
+            
+            generated += 1
+            if first_level is None:
+                first_level = puzzle['level']
+            last_level = puzzle['level']
+            
             diff = puzzle['difficulty']
             size = puzzle['gridSize']
             nums = sum(1 for row in puzzle['grid'] for cell in row if cell > 0)
@@ -631,8 +1073,31 @@ def main():
             difficulties[diff] = difficulties.get(diff, 0) + 1
             sizes[size] = sizes.get(size, 0) + 1
             numbers[nums] = numbers.get(nums, 0) + 1
+            
+            # Verificar niveles extremos
+            if puzzle['level'] % 5 == 0:
+                extreme_levels.append(puzzle['level'])
+    finally:
+        # Subir y cerrar lo pendiente aunque la ejecución se interrumpa
+        for sink in sinks:
+            sink.close()
+        journal.close()
+    
+    if uploader:
+        if not uploader.ok:
+            print(f"❌ Error subiendo niveles a Firebase (usa --resume para reintentarlo)")
+        elif generated:
+            print(f"✅ Todos los niveles subidos exitosamente")
+    
+    if args.output and generated:
+        print(f"\n💾 Niveles guardados en: {args.output} (JSONL, uno por línea)")
+    
+    # Mostrar estadísticas
+    if generated:
+        print(f"\n🎉 Proceso completado:")
+        print(f"   ✅ Niveles generados: {generated}")
         
-        print(f"   📊 Distribución de dificultades:")
+        print(f"   📊 Distribución de dificultades (medida por el solver):")
         for diff, count in sorted(difficulties.items()):
             print(f"      {diff}: {count}")
         
@@ -644,17 +1109,24 @@ def main():
         for nums, count in sorted(numbers.items()):
             print(f"      {nums} números: {count}")
         
-        print(f"   🔢 Rango de niveles: {puzzles[0]['level']} - {puzzles[-1]['level']}")
-        
-        # Verificar niveles extremos
-        extreme_levels = [p['level'] for p in puzzles if p['level'] % 5 == 0]
+        print(f"   🔢 Rango de niveles: {first_level} - {last_level}")
         print(f"   🔥 Niveles extremos: {extreme_levels}")
         
         # Mostrar estadísticas de Firebase
-        print(f"   🔥 Operaciones Firebase: {generator.firebase_operations}")
+        print(f"   🔥 Operaciones Firebase: {generator.metrics.totals.get('store_operations')}")
     
     else:
         print(f"\n❌ No se pudo generar ningún nivel")
+    
+    print_metrics_summary(generator.metrics)
+    
+    # Exportar métricas si se pide
+    if args.metrics_json:
+        generator.metrics.write_json(args.metrics_json)
+        print(f"📈 Métricas guardadas en: {args.metrics_json}")
+    if args.metrics_prom:
+        generator.metrics.write_prometheus(args.metrics_prom)
+        print(f"📈 Métricas Prometheus guardadas en: {args.metrics_prom}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file